@@ -0,0 +1,216 @@
+"""整班批量批改：讀取 zip / 文件夾中的學生作業，經有界線程池交給模型批改，進度寫入磁盤可斷點續批。
+
+每位學生的結果完成後立即追加到檢查點文件（JSON Lines，逐行 fsync）。同一份作業再次批改時
+先讀取檢查點，已完成的學生直接沿用結果，程序崩潰或頁面刷新後不會重新計費。
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+BATCH_DIR = os.getenv("DSE_BATCH_DIR", os.path.join(".cache", "batch"))
+BATCH_WORKERS = int(os.getenv("DSE_BATCH_WORKERS", 4))
+MAX_SUBMISSIONS = 300
+# 解壓上限：在讀取前按 zip 目錄檢查，讀取時再按實際字節數截斷，防止壓縮炸彈耗盡內存
+MAX_ENTRIES = 2000  # 每個壓縮包的文件數
+MAX_FILE_BYTES = 20 * 1024 * 1024  # 單個文件解壓後的大小
+MAX_TOTAL_BYTES = 200 * 1024 * 1024  # 所有文件解壓後的總大小
+TEXT_TYPES = (".txt", ".md")
+IMAGE_TYPES = (".jpg", ".jpeg", ".png")
+GRADE_RE = re.compile(r"(?:GRADE|等級|等级|分數|分数)\s*[:：]\s*(.+)", re.IGNORECASE)
+
+
+class Submission:
+    """一位學生的作業：文本部分合併為一段，圖片保留原始字節"""
+
+    def __init__(self, student):
+        self.student = student
+        self.texts = []
+        self.images = []
+
+    def add(self, name, data):
+        if name.lower().endswith(TEXT_TYPES):
+            self.texts.append(data.decode("utf-8", errors="replace").strip())
+        else:
+            self.images.append(data)
+
+    @property
+    def text(self):
+        return "\n\n".join(t for t in self.texts if t)
+
+    def digest(self):
+        """內容哈希：作業內容不變時檢查點中的結果可以沿用"""
+        h = hashlib.sha256(self.student.encode())
+        for part in [t.encode() for t in self.texts] + self.images:
+            h.update(hashlib.sha256(part).digest())
+        return h.hexdigest()
+
+
+def _split(path):
+    return [p for p in re.split(r"[\\/]", path) if p]
+
+
+def _student_of(parts):
+    """學生標識：在子文件夾中時取文件夾名（一人多頁），否則取文件名"""
+    return parts[0] if len(parts) > 1 else os.path.splitext(parts[0])[0]
+
+
+def _accepted(path):
+    name = os.path.basename(path)
+    return "__MACOSX" not in path and not name.startswith(".") and name.lower().endswith(TEXT_TYPES + IMAGE_TYPES)
+
+
+def _read_zip(zf, path, budget):
+    """讀取壓縮包中可批改的文件；文件數、單個文件或總大小超過上限時拋出 ValueError"""
+    infos = zf.infolist()
+    if len(infos) > MAX_ENTRIES:
+        raise ValueError(f"{path} 中的文件過多（最多 {MAX_ENTRIES} 個）")
+    infos = [info for info in infos if not info.is_dir() and _accepted(info.filename)]
+    for info in infos:
+        if info.file_size > MAX_FILE_BYTES:
+            raise ValueError(f"{info.filename} 解壓後超過 {MAX_FILE_BYTES // 1024 // 1024} MB")
+    if sum(info.file_size for info in infos) > budget:
+        raise ValueError(f"作業文件總大小超過 {MAX_TOTAL_BYTES // 1024 // 1024} MB")
+    entries = []
+    for info in infos:
+        # 目錄中記錄的大小可以偽造，按實際讀出的字節數再檢查一次
+        with zf.open(info) as f:
+            data = f.read(min(MAX_FILE_BYTES, budget) + 1)
+        if len(data) > MAX_FILE_BYTES:
+            raise ValueError(f"{info.filename} 解壓後超過 {MAX_FILE_BYTES // 1024 // 1024} MB")
+        budget -= len(data)
+        if budget < 0:
+            raise ValueError(f"作業文件總大小超過 {MAX_TOTAL_BYTES // 1024 // 1024} MB")
+        entries.append((info.filename, data))
+    return entries
+
+
+def load_submissions(files):
+    """files 為 (路徑, 字節) 序列；zip 文件會被展開。返回按學生排序的 Submission 列表"""
+    entries = []
+    for path, data in files:
+        if path.lower().endswith(".zip"):
+            try:
+                with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                    entries += _read_zip(zf, path, MAX_TOTAL_BYTES - sum(len(d) for _, d in entries))
+            except zipfile.BadZipFile:
+                raise ValueError(f"無法解壓：{path}") from None
+        elif _accepted(path):
+            entries.append((path, data))
+        if sum(len(d) for _, d in entries) > MAX_TOTAL_BYTES:
+            raise ValueError(f"作業文件總大小超過 {MAX_TOTAL_BYTES // 1024 // 1024} MB")
+    # 去掉所有文件共同的外層文件夾（如壓縮包內的「4A班/」）
+    split = [_split(path) for path, _ in entries]
+    common = 0
+    while split and all(len(p) > common + 1 and p[common] == split[0][common] for p in split):
+        common += 1
+    by_student = {}
+    for parts, (path, data) in zip(split, entries):
+        student = _student_of(parts[common:])
+        by_student.setdefault(student, Submission(student)).add(path, data)
+    if len(by_student) > MAX_SUBMISSIONS:
+        raise ValueError(f"每次最多批改 {MAX_SUBMISSIONS} 份作業")
+    return [by_student[s] for s in sorted(by_student)]
+
+
+def batch_id(feature, instruction, submissions):
+    """同一功能、同一批改要求、同一批作業得到相同的 ID，用於定位檢查點文件"""
+    h = hashlib.sha256(f"{feature}\n{instruction}".encode())
+    for sub in submissions:
+        h.update(sub.digest().encode())
+    return h.hexdigest()[:16]
+
+
+def extract_grade(text):
+    """從回答中取出「GRADE: ...」一行作為表格中的等級 / 分數"""
+    m = GRADE_RE.search(text or "")
+    return m.group(1).strip().strip("*").strip() if m else ""
+
+
+class Checkpoint:
+    """批改進度檢查點：每完成一位學生追加一行 JSON；讀取時以作業內容哈希匹配"""
+
+    def __init__(self, job_id, directory=BATCH_DIR):
+        self.path = os.path.join(directory, f"{job_id}.jsonl")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self):
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                # 崩潰時寫了一半的最後一行：截掉，否則之後追加的記錄會接在它後面一起損壞
+                data = data[:data.rfind(b"\n") + 1]
+                f.truncate(len(data))
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[row["digest"]] = row
+        return done
+
+    def save(self, row):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def run_batch(submissions, grade, checkpoint, workers=BATCH_WORKERS):
+    """批改全部作業，按完成順序逐個產出結果行（dict）。
+
+    grade(submission) 返回回答文本。已在檢查點中的學生直接產出（resumed=True），其餘交給線程池；
+    單個學生出錯只記錄在該行中，不寫入檢查點，下次續批時會重試。
+    """
+    done = checkpoint.load()
+    pending = []
+    for sub in submissions:
+        row = done.get(sub.digest())
+        if row:
+            yield dict(row, resumed=True)
+        else:
+            pending.append(sub)
+    if not pending:
+        return
+
+    def task(sub):
+        started = time.perf_counter()
+        try:
+            text = grade(sub)
+        except Exception as e:
+            return {"student": sub.student, "digest": sub.digest(), "grade": "", "feedback": "",
+                    "error": str(e), "seconds": round(time.perf_counter() - started, 2)}
+        row = {"student": sub.student, "digest": sub.digest(), "grade": extract_grade(text),
+               "feedback": text, "error": "", "seconds": round(time.perf_counter() - started, 2)}
+        checkpoint.save(row)
+        return row
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch-grade") as pool:
+        futures = [pool.submit(task, sub) for sub in pending]
+        try:
+            for future in as_completed(futures):
+                yield dict(future.result(), resumed=False)
+        finally:
+            # 頁面中途停止時不再發出尚未開始的請求
+            for future in futures:
+                future.cancel()
+
+
+def to_csv(rows):
+    """導出為 CSV（帶 BOM，Excel 可直接打開中文）"""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["student", "grade", "feedback", "error"])
+    for row in sorted(rows, key=lambda r: r["student"]):
+        writer.writerow([row["student"], row["grade"], row["feedback"], row["error"]])
+    return out.getvalue().encode("utf-8-sig")
@@ -0,0 +1,97 @@
+"""測量自測題庫在大題量下的表現：編譯、內存映射打開、選題與作答記錄的耗時。
+
+在臨時目錄中生成合成題目（默認 10 萬題，分 4 科、每科 20 個課題），編譯成 Arrow 題庫後打開，
+再模擬學生連續選題、作答。選題的 p95 應在 1 毫秒以內，否則以非零狀態退出。
+
+用法：python benchmarks/bench_item_bank.py [題數] [--answers 2000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from item_bank import ItemBank, QuizStore, build_bank, select_item  # noqa: E402
+
+SUBJECTS = ["math", "eng", "chi", "csd"]
+SELECT_BUDGET = 1e-3
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def write_items(items_dir, count):
+    """按科目寫 JSONL，每題 4 個選項、隨機課題與難度"""
+    rng = random.Random(0)
+    os.makedirs(items_dir)
+    files = {s: open(os.path.join(items_dir, f"{s}.jsonl"), "w", encoding="utf-8") for s in SUBJECTS}
+    for n in range(count):
+        subject = SUBJECTS[n % len(SUBJECTS)]
+        item = {"id": f"{subject}-{n:06d}", "subject": subject, "topic": f"課題{rng.randrange(20):02d}",
+                "difficulty": rng.randint(1, 5), "question": f"第 {n} 題：合成題目的題幹文字。" * 3,
+                "options": [f"選項 {c}" for c in "ABCD"], "answer": rng.randrange(4)}
+        files[subject].write(json.dumps(item, ensure_ascii=False) + "\n")
+    for f in files.values():
+        f.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("count", type=int, nargs="?", default=100_000)
+    parser.add_argument("--answers", type=int, default=2000, help="模擬作答次數")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    items_dir, bank_dir = os.path.join(tmp, "items"), os.path.join(tmp, "bank")
+    content = os.path.join(tmp, "content.json")
+    with open(content, "w", encoding="utf-8") as f:
+        json.dump({}, f)
+    write_items(items_dir, args.count)
+
+    started = time.perf_counter()
+    build_bank(bank_dir, items_dir, content)
+    build = time.perf_counter() - started
+    started = time.perf_counter()
+    bank = ItemBank(bank_dir)
+    opened = time.perf_counter() - started
+    print(f"{len(bank)} 題：編譯 {build:.2f}s，打開 {opened * 1e3:.0f}ms，"
+          f"題庫文件 {os.path.getsize(os.path.join(bank_dir, 'items.arrow')) / 1e6:.1f} MB")
+
+    store = QuizStore(os.path.join(tmp, "quiz.sqlite3"))
+    rng = random.Random(1)
+    selects, records, fetches = [], [], []
+    seen = {s: np.zeros(len(bank), dtype=bool) for s in SUBJECTS}
+    for n in range(args.answers):
+        subject = SUBJECTS[n % len(SUBJECTS)]
+        topic = None if n % 2 else f"課題{rng.randrange(20):02d}"
+        theta, _ = store.ability("bench", subject)
+        started = time.perf_counter()
+        pos = select_item(theta, bank.difficulty, bank.candidates(subject, topic), seen[subject])
+        selects.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        bank.item(pos)
+        fetches.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        store.record("bench", bank, pos, rng.random() < 0.6)
+        records.append(time.perf_counter() - started)
+        seen[subject][pos] = True
+
+    print(f"{'操作':<10}{'p50':>10}{'p95':>10}{'最大':>10}")
+    for name, values in (("選題", selects), ("取題", fetches), ("記錄作答", records)):
+        print(f"{name:<10}{percentile(values, 0.5) * 1e3:>8.3f}ms{percentile(values, 0.95) * 1e3:>8.3f}ms"
+              f"{max(values) * 1e3:>8.3f}ms")
+    if percentile(selects, 0.95) > SELECT_BUDGET:
+        sys.exit(f"選題 p95 超過 {SELECT_BUDGET * 1e3:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
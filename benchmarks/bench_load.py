@@ -0,0 +1,164 @@
+"""離線壓力測試：N 個並發會話反覆操作各功能，報告每次交互（rerun）的延遲、吞吐量和內存。
+
+AI 調用走模擬客戶端（stub_client.py，DSE_LLM_STUB=1），按錄製文件重放回答並模擬延遲，不需要 API Key。
+每個會話是一個 streamlit.testing 的 AppTest。AppTest 依賴進程級的 Runtime 單例，不能在同一進程中
+並發運行，所以每個會話在獨立的子進程中運行：SQLite 存儲（會話、回答緩存、遙測）由所有會話共享，
+進程內緩存與 AI 調度器則每個會話各有一份，內存數字因此是「每個會話一個進程」的上限。
+每個會話的輸入都帶有會話編號，避免回答緩存讓 AI 功能直接命中。
+
+用法：python benchmarks/bench_load.py [--sessions 8] [--rounds 2] [--ttfb 0.8] [--chunk-delay 0.05]
+                                     [--only math_grapher,eng_word ...]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MATHS, ENGLISH, CHINESE, CSD = "🧮 數學 (Maths)", "🇬🇧 英文 (English)", "🏮 中文 (Chinese)", "🌏 公社科 (CSD)"
+ESSAY = "Teamwork helps students learn from each other. In my school, group projects taught me to listen. " * 3
+
+# 功能 -> (科目, 選中鍵, 輸入 {控件 key: 值}, 觸發按鈕 key)；值中的 {n} 替換為會話編號
+SCENARIOS = {
+    "math_grapher": (MATHS, "math_selected", {"math_eq_grapher": "x^2*sin(x) + {n}"}, None),
+    "math_eq": (MATHS, "math_selected", {"math_eq_solver": "x**2 - {n}*x - 4 = 0"}, "math_eq_solve_btn"),
+    "math_stats": (MATHS, "math_selected", {"math_stats_data": "{n}, 12, 15, 9, 20, 18, 11, 14"}, "math_stats_btn"),
+    "math_step": (MATHS, "math_selected", {"math_step_text": "Solve x^2 - {n}x + 6 = 0."}, "math_step_solve"),
+    "math_trap": (MATHS, "math_selected", {}, "math_trap_scan"),
+    "math_hw": (MATHS, "math_selected", {"math_hw_text": "x = {n}, y = 2"}, "math_hw_check"),
+    "eng_essay": (ENGLISH, "eng_selected", {"eng_essay_text": "Essay {n}. " + ESSAY}, "eng_correct"),
+    "eng_sample": (ENGLISH, "eng_selected", {}, "eng_sample_btn"),
+    "eng_speak": (ENGLISH, "eng_selected", {"eng_speak_topic": "Online learning {n}"}, "eng_speak_btn"),
+    "eng_read": (ENGLISH, "eng_selected", {"eng_read_passage": "Passage {n}. " + ESSAY}, "eng_read_btn"),
+    "eng_word": (ENGLISH, "eng_selected", {"eng_word_card": "resilience{n}"}, "eng_word_btn"),
+    "eng_sent": (ENGLISH, "eng_selected", {"eng_sent_trans": "Sentence {n}: I like reading."}, "eng_sent_btn"),
+    "eng_past": (ENGLISH, "eng_selected", {"eng_past_ans": "Answer {n}. " + ESSAY}, "eng_past_submit"),
+    "chi_wyw": (CHINESE, "chi_selected", {"chi_wyw_text": "學而時習之，不亦說乎？（{n}）"}, "chi_wyw_btn"),
+    "chi_read": (CHINESE, "chi_selected", {"chi_read_passage": "第{n}段：春天來了，萬物復甦。" * 5}, "chi_read_btn"),
+    "chi_essay": (CHINESE, "chi_selected", {"chi_essay_text": "第{n}篇：诚信是立身之本。" * 20}, "chi_correct"),
+    "chi_write": (CHINESE, "chi_selected", {"chi_write_topic": "我的中學生活{n}"}, "chi_write_btn"),
+    "chi_word": (CHINESE, "chi_selected", {"chi_word_note": "宴遊{n}"}, "chi_word_btn"),
+    "chi_idiom": (CHINESE, "chi_selected", {"chi_idiom_text": "画龙点睛{n}"}, "chi_idiom_btn"),
+    "chi_past": (CHINESE, "chi_selected", {"chi_past_ans": "第{n}份答案：人無信不立。" * 10}, "chi_past_submit"),
+    "chi_poem": (CHINESE, "chi_selected", {"chi_poem_text": "床前明月光，疑是地上霜。（{n}）"}, "chi_poem_btn"),
+    "csd_kw": (CSD, "csd_selected", {"csd_kw_text": "全球化{n}"}, "csd_kw_btn"),
+    "csd_event": (CSD, "csd_selected", {"csd_event_text": "本港人口老化問題（{n}）"}, "csd_event_btn"),
+    "csd_data": (CSD, "csd_selected", {"csd_data_text": "2023 年失業率 {n}%，2024 年 2.9%"}, "csd_data_btn"),
+    "csd_news": (CSD, "csd_selected", {"csd_news_text": "第{n}則新聞：政府公布新一份施政報告。"}, "csd_news_btn"),
+    "csd_view": (CSD, "csd_selected", {"csd_view_text": "觀點{n}：應延長退休年齡。"}, "csd_view_btn"),
+    "csd_qbank": (CSD, "csd_selected", {"csd_qbank_ans": "第{n}份答案：全球化帶來機遇與挑戰。"}, "csd_qbank_submit"),
+    "csd_past": (CSD, "csd_selected", {"csd_past_ans": "第{n}份答案：香港是中西文化交匯之地。"}, "csd_past_submit"),
+    "csd_term": (CSD, "csd_selected", {"csd_term_text": "可持續發展{n}"}, "csd_term_btn"),
+    "csd_world": (CSD, "csd_selected", {"csd_world_text": "氣候變化{n}"}, "csd_world_btn"),
+}
+
+
+def peak_rss_mb():
+    """進程峰值常駐內存（MB）；不支持 resource 模塊的平台返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def child(n, features, rounds):
+    """子進程中的一個會話：依次打開各功能、填入輸入並點擊按鈕，輸出每次交互耗時的 JSON"""
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    timings, errors = {}, []
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300)
+    at.query_params["uid"] = f"bench-{n}"
+    at.run()
+    for r in range(rounds):
+        for feature in features:
+            subject, state_key, inputs, button = SCENARIOS[feature]
+            at.session_state["selected_subject"] = subject
+            at.session_state[state_key] = feature
+            values = {k: v.replace("{n}", f"{n}-{r}") for k, v in inputs.items()}
+            for key, value in values.items():
+                at.session_state[key] = value
+            started = time.perf_counter()
+            at.run()
+            if button and not at.exception:
+                next(b for b in at.button if b.key == button).click().run()
+            timings.setdefault(feature, []).append(time.perf_counter() - started)
+            if at.exception:
+                errors.append(f"{feature}（會話 {n}）：{at.exception[0].message}")
+    print(json.dumps({"timings": timings, "errors": errors, "rss": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--ttfb", type=float, default=0.8, help="模擬首字延遲（秒）")
+    parser.add_argument("--chunk-delay", type=float, default=0.05, help="模擬片段間隔（秒）")
+    parser.add_argument("--only", help="逗號分隔的功能名，默認全部")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    features = args.only.split(",") if args.only else list(SCENARIOS)
+    if args.child is not None:
+        child(args.child, features, args.rounds)
+        return
+
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ, **{
+        "DSE_LLM_STUB": "1", "DSE_STUB_TTFB": str(args.ttfb), "DSE_STUB_CHUNK_DELAY": str(args.chunk_delay),
+        "DSE_SESSION_PATH": os.path.join(tmp, "sessions.sqlite3"),
+        "DSE_LLM_CACHE_PATH": os.path.join(tmp, "llm_cache.sqlite3"),
+        "DSE_METRICS_PATH": os.path.join(tmp, "metrics.sqlite3"),
+        "DSE_WRONGBOOK_PATH": os.path.join(tmp, "wrongbook.sqlite3"),
+        "DSE_FLASHCARDS_PATH": os.path.join(tmp, "flashcards.sqlite3"),
+        "DSE_QUIZ_PATH": os.path.join(tmp, "quiz.sqlite3"),
+        "DSE_ITEM_BANK_DIR": os.path.join(tmp, "item_bank"),
+        "DSE_JOBS_PATH": os.path.join(tmp, "jobs.sqlite3"),
+    })
+    command = [sys.executable, __file__, "--rounds", str(args.rounds), "--only", ",".join(features)]
+    started = time.perf_counter()
+    procs = [subprocess.Popen(command + ["--child", str(n)], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              text=True, cwd=ROOT, env=env) for n in range(args.sessions)]
+    results = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        if proc.returncode:
+            sys.exit(f"會話子進程以狀態 {proc.returncode} 退出")
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    wall = time.perf_counter() - started
+    timings, errors = {}, []
+    for result in results:
+        for feature, values in result["timings"].items():
+            timings.setdefault(feature, []).extend(values)
+        errors += result["errors"]
+    rss = [r["rss"] for r in results if r["rss"] is not None]
+
+    print(f"{args.sessions} 個會話 × {args.rounds} 輪，模擬首字 {args.ttfb}s")
+    print(f"{'功能':<14}{'次數':>6}{'p50':>10}{'p95':>10}{'最大':>10}")
+    total = 0
+    for feature in features:
+        values = timings.get(feature, [])
+        total += len(values)
+        print(f"{feature:<14}{len(values):>6}{percentile(values, 0.5) * 1e3:>8.0f}ms"
+              f"{percentile(values, 0.95) * 1e3:>8.0f}ms{max(values or [0]) * 1e3:>8.0f}ms")
+    print(f"總計 {total} 次交互，用時 {wall:.1f}s（含各子進程啟動），吞吐量 {total / wall:.2f} 次/秒")
+    if rss:
+        print(f"每個會話進程峰值內存：平均 {sum(rss) / len(rss):.0f} MB，最大 {max(rss):.0f} MB")
+    if errors:
+        sys.exit("出錯：\n" + "\n".join(errors[:10]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""比較受限解析器 expr_parser.parse_expression 與 sp.sympify 在常見 DSE 輸入上的速度。
+
+用法：python benchmarks/bench_parser.py [重複次數]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sympy as sp  # noqa: E402
+
+from expr_parser import parse_expression  # noqa: E402
+
+# sympify 不支持 ^ 與隱式乘法，這裡給出兩邊語義相同的寫法
+CASES = [
+    ("x*sin(x)", "x*sin(x)"),
+    ("x^2+3x-5", "x**2+3*x-5"),
+    ("2(x+1)(x-1)", "2*(x+1)*(x-1)"),
+    ("(x+1)^2/(x-1)", "(x+1)**2/(x-1)"),
+    ("sqrt(x^2+1) - 3cos(2x)", "sqrt(x**2+1) - 3*cos(2*x)"),
+    ("a*x^2 + b*x + c", "a*x**2 + b*x + c"),
+    ("e^(-x^2/2)", "exp(-x**2/2)"),
+]
+
+
+def main(number=200):
+    print(f"{'表達式':<28}{'parse_expression':>18}{'sympify':>12}{'加速':>8}")
+    total_ours = total_sympify = 0.0
+    for ours, theirs in CASES:
+        assert sp.simplify(parse_expression(ours) - sp.sympify(theirs)) == 0, ours
+        t_ours = timeit.timeit(lambda: parse_expression(ours), number=number) / number
+        t_sympify = timeit.timeit(lambda: sp.sympify(theirs), number=number) / number
+        total_ours += t_ours
+        total_sympify += t_sympify
+        print(f"{ours:<28}{t_ours * 1e6:>15.1f} µs{t_sympify * 1e6:>9.1f} µs{t_sympify / t_ours:>7.1f}x")
+    print(f"{'合計':<28}{total_ours * 1e6:>15.1f} µs{total_sympify * 1e6:>9.1f} µs{total_sympify / total_ours:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,65 @@
+"""測量各科目的冷啟動與 rerun 時間，並列出每條路徑實際加載了哪些重依賴。
+
+每個科目在獨立的子進程中用 streamlit.testing 的 AppTest 運行 app.py：第一次運行即冷啟動
+（包括導入該科目的模塊），之後重複 rerun 取平均。英文 / 中文 / 公社科路徑不應加載 sympy、pandas，
+否則以非零狀態退出。
+
+用法：python benchmarks/bench_startup.py [rerun 次數]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 要檢查的重依賴。plotly 不在其中：import streamlit 時已為其主題加載 plotly.graph_objects；
+# numpy 則由側邊欄的 st.image 導入，與科目無關
+HEAVY = ["sympy", "numpy", "pandas", "fpdf", "google.genai"]
+MATHS_ONLY = ["sympy", "pandas"]
+SUBJECTS = ["🧮 數學 (Maths)", "🇬🇧 英文 (English)", "🏮 中文 (Chinese)", "🌏 公社科 (CSD)"]
+
+
+def child(subject, reruns):
+    """子進程：冷啟動一次 + rerun 若干次，輸出 JSON"""
+    from streamlit.testing.v1 import AppTest
+
+    preloaded = {m for m in HEAVY if m in sys.modules}
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    at.secrets["GEMINI_API_KEY"] = "benchmark"  # 只渲染頁面，不會發出 AI 請求
+    at.session_state["selected_subject"] = subject
+    started = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    started = time.perf_counter()
+    for _ in range(reruns):
+        at.run()
+    rerun = (time.perf_counter() - started) / reruns
+    loaded = [m for m in HEAVY if m in sys.modules and m not in preloaded]
+    print(json.dumps({"cold": cold, "rerun": rerun, "loaded": loaded}))
+
+
+def main(reruns=20):
+    env = dict(os.environ, DSE_SESSION_PATH=os.path.join(tempfile.mkdtemp(), "sessions.sqlite3"))
+    print(f"{'科目':<20}{'冷啟動':>10}{'rerun':>10}  加載的重依賴")
+    leaked = []
+    for subject in SUBJECTS:
+        out = subprocess.run([sys.executable, __file__, "--child", subject, str(reruns)],
+                             capture_output=True, text=True, cwd=ROOT, env=env, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{subject:<20}{result['cold'] * 1e3:>8.0f} ms{result['rerun'] * 1e3:>7.1f} ms  "
+              f"{', '.join(result['loaded']) or '—'}")
+        if subject != SUBJECTS[0]:
+            leaked += [f"{subject}: {m}" for m in MATHS_ONLY if m in result["loaded"]]
+    if leaked:
+        sys.exit("非數學路徑加載了數學依賴：" + "；".join(leaked))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,77 @@
+"""AI 助手的對話記憶：每個會話一份歷史，發送時按 token 預算截斷，較早的輪次滾動壓縮成摘要。
+
+每次提問發送「摘要 + 預算內最近的原文輪次 + 本次問題」，請求大小不隨對話變長而增長。
+原文歷史超過預算時，最早的若干輪連同舊摘要交給模型壓縮成新摘要（見 prompts.py 的 chat_summary），
+最近 KEEP_MESSAGES 條消息始終保留原文。摘要失敗時只截斷，不影響回答。
+
+    DSE_CHAT_HISTORY_TOKENS=2000   發送的原文歷史上限（估算 token，不含摘要與本次問題）
+"""
+import os
+
+from prompts import estimate_tokens
+
+HISTORY_TOKENS = int(os.getenv("DSE_CHAT_HISTORY_TOKENS", 2000))
+KEEP_MESSAGES = 4  # 最近兩輪（問 + 答）不參與摘要
+_ROLES = {"user": "user", "assistant": "model"}
+_NAMES = {"user": "学生", "assistant": "助手"}
+
+
+class Conversation:
+    """一個會話的對話歷史；messages 為 [{"role": "user" / "assistant", "text", "tokens"}]，按時間順序"""
+
+    def __init__(self, budget=HISTORY_TOKENS):
+        self.budget = budget
+        self.messages = []
+        self.summary = ""
+        self.folded = 0  # 已壓縮進摘要的消息數
+
+    def add(self, question, answer):
+        """記下完整的一輪；回答中斷或失敗的問題不記入，避免歷史中出現沒有回答的提問"""
+        for role, text in (("user", question), ("assistant", answer)):
+            self.messages.append({"role": role, "text": text, "tokens": estimate_tokens(text)})
+
+    def clear(self):
+        self.messages, self.summary, self.folded = [], "", 0
+
+    def tokens(self):
+        return sum(m["tokens"] for m in self.messages)
+
+    def history(self):
+        """發送給模型的歷史（google-genai 的 Content 字典）：摘要 + 預算內最近的完整輪次"""
+        kept, used = [], 0
+        for message in reversed(self.messages):
+            used += message["tokens"]
+            if used > self.budget:
+                break
+            kept.append(message)
+        kept.reverse()
+        # 從提問開始，保持問答交替
+        while kept and kept[0]["role"] != "user":
+            kept.pop(0)
+        contents = []
+        if self.summary:
+            contents += [{"role": "user", "parts": [{"text": f"（此前对话的摘要）\n{self.summary}"}]},
+                         {"role": "model", "parts": [{"text": "好的，我记得之前的对话。"}]}]
+        return contents + [{"role": _ROLES[m["role"]], "parts": [{"text": m["text"]}]} for m in kept]
+
+    def to_fold(self):
+        """原文歷史超過預算時應壓縮的最早消息數（整輪），壓縮後剩餘不超過預算的一半；不需要時返回 0"""
+        if self.tokens() <= self.budget:
+            return 0
+        remaining, count = self.tokens(), 0
+        while count + 2 <= len(self.messages) - KEEP_MESSAGES and remaining > self.budget / 2:
+            remaining -= self.messages[count]["tokens"] + self.messages[count + 1]["tokens"]
+            count += 2
+        return count
+
+    def dialogue(self, count):
+        """交給模型壓縮的文本：舊摘要 + 最早 count 條消息"""
+        lines = [f"此前摘要：{self.summary}"] if self.summary else []
+        lines += [f"{_NAMES[m['role']]}：{m['text']}" for m in self.messages[:count]]
+        return "\n\n".join(lines)
+
+    def fold(self, count, summary):
+        """用新摘要替換最早的 count 條消息"""
+        self.summary = summary.strip()
+        del self.messages[:count]
+        self.folded += count
@@ -0,0 +1,100 @@
+"""靜態教學內容（必讀篇章、自測題）的讀取、校驗與搜索索引。
+
+內容保存在 data/content.json 中，頂層帶 version 字段；結構變化時提升版本號，舊文件會被拒絕而不是
+讀出缺字段的數據。篇章的標題、作者、節選和要點分析建立倒排索引，搜索只需查表，不隨篇數線性增長。
+自測題在這裡只做校驗，由 item_bank.py 編譯進題庫後使用。
+"""
+import json
+import os
+import re
+from collections import defaultdict
+
+DEFAULT_CONTENT_PATH = os.getenv(
+    "DSE_CONTENT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "content.json")
+)
+SCHEMA_VERSION = 1
+PASSAGE_FIELDS = ("id", "collection", "title", "author", "source", "excerpt", "translation", "analysis", "exam_tips")
+QUIZ_FIELDS = ("id", "subject", "question", "options", "answer")
+# 搜索字段及權重：標題命中比正文命中更相關
+SEARCH_FIELDS = {"title": 3.0, "author": 2.0, "excerpt": 1.0, "analysis": 1.0}
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[^\W\d_a-z]+")
+_CJK_RE = re.compile(r"[㐀-鿿豈-﫿]")
+
+
+class ContentError(ValueError):
+    """內容文件缺失、版本不符或格式有誤"""
+
+
+def tokenize(text):
+    """英文按單詞切分；中文沒有空格，按單字和相鄰兩字（bigram）切分，兩字詞即可直接命中"""
+    tokens = []
+    for word in _WORD_RE.findall(text.lower()):
+        if _CJK_RE.match(word):
+            tokens.extend(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class ContentStore:
+    """已校驗的內容及其搜索索引；只讀，可在會話之間共享"""
+
+    def __init__(self, data):
+        self.version = data["version"]
+        self.passages = tuple(data["passages"])
+        self._index = defaultdict(dict)  # token -> {篇章序號: 權重}
+        for pos, passage in enumerate(self.passages):
+            for field, weight in SEARCH_FIELDS.items():
+                value = passage[field]
+                text = " ".join(value) if isinstance(value, list) else value
+                for token in tokenize(text):
+                    postings = self._index[token]
+                    postings[pos] = postings.get(pos, 0.0) + weight
+        self._index = dict(self._index)
+
+    def collection(self, name):
+        return [p for p in self.passages if p["collection"] == name]
+
+    def search(self, query, collection=None, limit=50):
+        """返回包含全部查詢詞的篇章，按加權命中次數排序"""
+        tokens = set(tokenize(query))
+        if not tokens:
+            return self.collection(collection) if collection else list(self.passages)
+        postings = [self._index.get(t, {}) for t in tokens]
+        matched = set.intersection(*(set(p) for p in postings))
+        scores = {pos: sum(p[pos] for p in postings) for pos in matched}
+        hits = [self.passages[pos] for pos in sorted(matched, key=lambda pos: (-scores[pos], pos))]
+        if collection:
+            hits = [p for p in hits if p["collection"] == collection]
+        return hits[:limit]
+
+
+def _validate(data):
+    if not isinstance(data, dict) or data.get("version") != SCHEMA_VERSION:
+        raise ContentError(f"內容文件版本不符（需要 version {SCHEMA_VERSION}）")
+    for kind, fields in (("passages", PASSAGE_FIELDS), ("quizzes", QUIZ_FIELDS)):
+        seen = set()
+        for item in data.get(kind, []):
+            missing = [f for f in fields if f not in item]
+            if missing:
+                raise ContentError(f"{kind} 條目 {item.get('id', '?')} 缺少字段：{', '.join(missing)}")
+            if item["id"] in seen:
+                raise ContentError(f"重複的 id：{item['id']}")
+            seen.add(item["id"])
+    for item in data.get("quizzes", []):
+        if not 0 <= item["answer"] < len(item["options"]):
+            raise ContentError(f"題目 {item['id']} 的答案序號超出選項範圍")
+
+
+def load_content(path=DEFAULT_CONTENT_PATH):
+    """讀取並校驗內容文件，返回 ContentStore"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ContentError(f"無法讀取內容文件 {path}：{e}") from None
+    _validate(data)
+    data.setdefault("passages", [])
+    return ContentStore(data)
@@ -0,0 +1,21 @@
+"""各 SQLite 存儲共用的連接：每次操作使用獨立連接，線程 / 進程之間互不干擾。"""
+import contextlib
+import sqlite3
+
+TIMEOUT = 10  # 其他連接持有寫鎖時最多等待的秒數
+
+
+@contextlib.contextmanager
+def connect(path, row_factory=None):
+    """打開連接並在 with 塊結束時提交（出錯時回滾）並關閉。
+
+    sqlite3 連接自身的 with 只負責提交 / 回滾，不會關閉連接；每次操作都新建連接時須在這裡關閉，否則會洩漏文件句柄。
+    """
+    conn = sqlite3.connect(path, timeout=TIMEOUT)
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
@@ -0,0 +1,219 @@
+"""DSE 數學表達式的受限解析器：直接構建 SymPy 表達式樹，取代 sp.sympify（內部使用 eval）。
+
+支持：+ - * / ^ **、括號、科學記數法（1e5）、隱式乘法（2x、2(x+1)、(x+1)(x-1)、x sin(x)）、常用函數與常數 pi / e。
+對輸入長度、token 數、嵌套深度和冪的大小都有限制，9**9**9 這類輸入會直接報錯而不會卡死。
+"""
+import math
+import re
+
+import sympy as sp
+
+MAX_LENGTH = 500  # 輸入最大字符數
+MAX_TOKENS = 300
+MAX_DEPTH = 40  # 括號 / 一元運算的最大嵌套深度
+MAX_POWER_DIGITS = 1000  # 數字冪運算結果的最大位數
+MAX_EXPONENT = 1000  # 冪指數的最大絕對值
+MAX_INT_DIGITS = 30  # 單個整數字面量的最大位數
+
+FUNCTIONS = {
+    "sin": sp.sin, "cos": sp.cos, "tan": sp.tan,
+    "asin": sp.asin, "acos": sp.acos, "atan": sp.atan,
+    "arcsin": sp.asin, "arccos": sp.acos, "arctan": sp.atan,
+    "sinh": sp.sinh, "cosh": sp.cosh, "tanh": sp.tanh,
+    "sqrt": sp.sqrt, "exp": sp.exp, "log": sp.log, "ln": sp.log,
+    "abs": sp.Abs, "Abs": sp.Abs,
+}
+CONSTANTS = {"pi": sp.pi, "π": sp.pi, "e": sp.E, "E": sp.E, "I": sp.I}
+
+# 數字可帶科學記數法指數（1e5、2.5E-3）；e 後面沒有數字時仍是常數 e（如 2e 即 2·e）
+_TOKEN_RE = re.compile(r"\s*(?:((?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)|([^\W\d]\w*)|(\*\*|[-+*/^(),]))")
+_REPLACE = str.maketrans({"×": "*", "÷": "/", "−": "-", "（": "(", "）": ")", "，": ","})
+
+
+class ParseError(ValueError):
+    """表達式不合法或超出大小限制"""
+
+
+def tokenize(text):
+    """切分為 (類型, 值) 列表；未知的多字母名稱（如 xy、sinx）拆開處理"""
+    text = text.translate(_REPLACE)
+    if len(text) > MAX_LENGTH:
+        raise ParseError(f"表達式過長（最多 {MAX_LENGTH} 個字符）")
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m:
+            raise ParseError(f"無法識別的字符：{text[pos:].strip()[:1]!r}（位置 {pos + 1}）")
+        number, name, op = m.groups()
+        if number:
+            # 兩個數字相鄰（3.5.2、1 2）多半是輸入錯誤，不當作隱式乘法
+            if tokens and tokens[-1][0] == "num":
+                raise ParseError(f"數字之間缺少運算符：{tokens[-1][1]} {number}")
+            tokens.append(("num", number))
+        elif name:
+            if name in FUNCTIONS or name in CONSTANTS or len(name) == 1:
+                tokens.append(("name", name))
+            elif name.isalpha():
+                tokens.extend(("name", part) for part in _split_name(name))
+            else:
+                raise ParseError(f"無法識別的名稱：{name}")
+        else:
+            tokens.append(("op", "^" if op == "**" else op))
+        pos = m.end()
+        if len(tokens) > MAX_TOKENS:
+            raise ParseError("表達式過於複雜")
+    return tokens
+
+
+def _split_name(name):
+    """sinx -> sin, x；xy -> x, y（DSE 題目中的變量都是單字母）"""
+    for length in range(len(name), 1, -1):
+        if name[:length] in FUNCTIONS or name[:length] in CONSTANTS:
+            return [name[:length]] + _split_name(name[length:])
+    return [name[0]] + _split_name(name[1:]) if name else []
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.depth = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        tok = self.peek()
+        if tok[0] is None or (value is not None and tok[1] != value):
+            raise ParseError(f"缺少 {value!r}" if value else "表達式不完整")
+        self.pos += 1
+        return tok
+
+    def enter(self):
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ParseError("括號嵌套過深")
+
+    def starts_operand(self):
+        kind, value = self.peek()
+        return kind in ("num", "name") or value == "("
+
+    def expr(self):
+        terms = [self.term()]
+        while self.peek()[1] in ("+", "-"):
+            op = self.take()[1]
+            rhs = self.term()
+            terms.append(rhs if op == "+" else -rhs)
+        return sp.Add(*terms)
+
+    def term(self):
+        factors = [self.unary()]
+        while True:
+            kind, value = self.peek()
+            if value in ("*", "/"):
+                self.take()
+                rhs = self.unary()
+                factors.append(rhs if value == "*" else _power(rhs, sp.Integer(-1)))
+            elif self.starts_operand():
+                # 隱式乘法：2x、2(x+1)、(x+1)(x-1)、x sin(x)
+                factors.append(self.power())
+            else:
+                return sp.Mul(*factors)
+
+    def unary(self):
+        if self.peek()[1] in ("+", "-"):
+            op = self.take()[1]
+            self.enter()
+            node = self.unary()
+            self.depth -= 1
+            return -node if op == "-" else node
+        return self.power()
+
+    def power(self):
+        base = self.primary()
+        if self.peek()[1] == "^":
+            self.take()
+            # 冪運算右結合，且指數可帶負號：2^-x、x^2^3 = x^(2^3)
+            self.enter()
+            exponent = self.unary()
+            self.depth -= 1
+            return _power(base, exponent)
+        return base
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == "num":
+            exponent = value.lower().partition("e")[2]
+            if exponent and abs(int(exponent)) > MAX_EXPONENT:
+                raise ParseError(f"指數過大（絕對值最多 {MAX_EXPONENT}）")
+            if "." in value or exponent:
+                return sp.Float(value)
+            if len(value) > MAX_INT_DIGITS:
+                raise ParseError("數字過大")
+            return sp.Integer(value)
+        if kind == "name":
+            if value in FUNCTIONS:
+                return self.call(value)
+            if value in CONSTANTS:
+                return CONSTANTS[value]
+            return sp.Symbol(value)
+        if value == "(":
+            self.enter()
+            node = self.expr()
+            self.take(")")
+            self.depth -= 1
+            return node
+        raise ParseError(f"此處不應出現 {value!r}")
+
+    def call(self, name):
+        self.enter()
+        if self.peek()[1] == "(":
+            self.take("(")
+            args = [self.expr()]
+            while self.peek()[1] == ",":
+                self.take()
+                args.append(self.expr())
+            self.take(")")
+        else:
+            # 允許省略括號：sin x、sqrt 2
+            args = [self.power()]
+        self.depth -= 1
+        if len(args) > (2 if name == "log" else 1):
+            raise ParseError(f"{name} 的參數個數不正確")
+        return FUNCTIONS[name](*args)
+
+
+def _power(base, exponent):
+    """構建冪，事先估算結果大小，拒絕 9^9^9 之類的巨大數字"""
+    try:
+        if exponent.is_number and exponent.is_real:
+            if abs(float(exponent)) > MAX_EXPONENT:
+                raise ParseError(f"指數過大（絕對值最多 {MAX_EXPONENT}）")
+            if base.is_number and base.is_real and abs(float(base)) > 1:
+                digits = abs(float(exponent)) * math.log10(abs(float(base)))
+                if digits > MAX_POWER_DIGITS:
+                    raise ParseError("冪運算結果過大")
+    except OverflowError:
+        raise ParseError("數字過大") from None
+    return sp.Pow(base, exponent)
+
+
+def parse_expression(text):
+    """把字符串解析為 SymPy 表達式；不合法或過大時拋出 ParseError"""
+    tokens = tokenize(text)
+    if not tokens:
+        raise ParseError("表達式為空")
+    parser = _Parser(tokens)
+    node = parser.expr()
+    if parser.pos != len(tokens):
+        raise ParseError(f"多餘的內容：{tokens[parser.pos][1]!r}")
+    return node
+
+
+def parse_equation(text):
+    """解析 "左邊 = 右邊"，返回 左邊 - 右邊；沒有等號時視為 "= 0" """
+    lhs, sep, rhs = text.partition("=")
+    if "=" in rhs:
+        raise ParseError("每個方程只能有一個等號")
+    return parse_expression(lhs) - parse_expression(rhs) if sep else parse_expression(lhs)
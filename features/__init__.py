@@ -0,0 +1,22 @@
+"""各科功能模塊的註冊表。
+
+app.py 在每次交互時都會重新執行，而科目模塊只在第一次打開該科目時導入（之後由 sys.modules 緩存）。
+只用英文 / 中文 / 公社科的會話不會加載 sympy、numpy、pandas 等數學依賴。
+"""
+import importlib
+
+SUBJECTS = {
+    "🧮 數學 (Maths)": "features.maths",
+    "🇬🇧 英文 (English)": "features.english",
+    "🏮 中文 (Chinese)": "features.chinese",
+    "🌏 公社科 (CSD)": "features.csd",
+}
+
+
+def load(subject):
+    """導入（或取出已導入的）科目模塊"""
+    return importlib.import_module(SUBJECTS[subject])
+
+
+def render(subject):
+    load(subject).render()
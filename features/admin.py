@@ -0,0 +1,49 @@
+"""📈 管理頁：各功能的 AI 調用量、延遲百分位、token 與估算費用。
+
+以 ?admin=<DSE_ADMIN_TOKEN> 打開；未配置令牌時管理頁不可用。
+"""
+import time
+
+import streamlit as st
+
+from features.common import get_metrics
+from telemetry import prometheus_text
+
+WINDOWS = {"最近 1 小時": 3600, "最近 24 小時": 86400, "最近 7 天": 7 * 86400, "最近 30 天": 30 * 86400}
+
+
+def _ms(value):
+    return None if value is None else round(value)
+
+
+def render():
+    st.markdown("#### 📈 AI 調用統計")
+    store = get_metrics()
+    label = st.selectbox("時間範圍", list(WINDOWS), index=1, key="admin_window")
+    rows = store.summary(time.time() - WINDOWS[label])
+    if not rows:
+        st.info("這段時間內沒有 AI 調用記錄")
+    else:
+        calls = sum(r["calls"] for r in rows)
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("調用次數", calls)
+        col2.metric("錯誤率", f"{sum(r['errors'] for r in rows) / calls:.1%}")
+        col3.metric("緩存命中率", f"{sum(r['cache_hits'] for r in rows) / calls:.1%}")
+        col4.metric("估算費用 (USD)", f"{sum(r['cost_usd'] for r in rows):.4f}")
+        cached_share = sum(r["cached_tokens"] for r in rows) / max(sum(r["input_tokens"] for r in rows), 1)
+        col5.metric("前綴緩存節省 (USD)", f"{sum(r['saved_usd'] for r in rows):.4f}",
+                    help=f"命中上下文緩存的輸入 token 佔 {cached_share:.1%}")
+        # 費用最高的功能排在最前
+        rows.sort(key=lambda r: (-r["cost_usd"], -r["calls"]))
+        st.dataframe([{
+            "功能": r["feature"], "模型": r["model"], "調用": r["calls"], "錯誤": r["errors"],
+            "緩存命中": r["cache_hits"], "p50 (ms)": _ms(r["p50_ms"]), "p95 (ms)": _ms(r["p95_ms"]),
+            "p99 (ms)": _ms(r["p99_ms"]), "首字 p50 (ms)": _ms(r["ttfb_p50_ms"]),
+            "首字 p95 (ms)": _ms(r["ttfb_p95_ms"]), "輸入 token": r["input_tokens"],
+            "輸出 token": r["output_tokens"], "緩存輸入 token": r["cached_tokens"],
+            "費用 (USD)": round(r["cost_usd"], 4), "節省 (USD)": round(r["saved_usd"], 4),
+        } for r in rows], use_container_width=True, hide_index=True)
+        st.caption("延遲百分位只統計實際發往模型且成功的調用；費用按 telemetry.MODEL_PRICES 估算")
+    st.download_button("⬇️ Prometheus 格式", prometheus_text(store), file_name="metrics.prom", mime="text/plain",
+                       key="admin_prom")
+    st.caption("持續抓取可運行 `python telemetry.py serve`，提供 /metrics 端點")
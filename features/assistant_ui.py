@@ -0,0 +1,71 @@
+"""多輪對話的 AI 助手（對話記憶見 chat_memory.py）。"""
+import streamlit as st
+
+from features.common import ask_ai, get_ai
+from prompts import get_prompt
+
+
+def get_conversation():
+    """當前會話的對話記憶（chat_memory.Conversation），保存在 st.session_state 中"""
+    if "_chat" not in st.session_state:
+        from chat_memory import Conversation
+        st.session_state["_chat"] = Conversation()
+    return st.session_state["_chat"]
+
+def _fold_history(conversation):
+    """原文歷史超出預算時，把最早的幾輪壓縮進摘要；失敗時保留原文，發送時仍按預算截斷"""
+    count = conversation.to_fold()
+    if not count:
+        return
+    prompt = get_prompt("chat_summary", dialogue=conversation.dialogue(count))
+    try:
+        with st.spinner("正在整理对话记忆..."):
+            res = get_ai().models.generate_content(contents=prompt.contents, feature=prompt.feature,
+                                                   prefix=prompt.prefix)
+    except Exception:
+        return
+    if res.text:
+        conversation.fold(count, res.text)
+
+def chat_ui():
+    """多輪對話的 AI 助手：歷史按 token 預算截斷、較早的輪次滾動摘要，回答流式顯示。
+
+    問題只在 st.chat_input 提交的那一輪發送，之後任何 rerun 都只重放已保存的對話，不會重新生成。
+    """
+    conversation = get_conversation()
+    box = st.container(height=420)
+    with box:
+        if conversation.summary:
+            st.caption(f"🧠 较早的 {conversation.folded} 条消息已整理为摘要")
+        for message in conversation.messages:
+            with st.chat_message(message["role"]):
+                st.markdown(message["text"])
+    pending = st.session_state.get("_chat_pending")
+    question = st.chat_input("问我任何 DSE 问题…", key="chat_input")
+    if not question and pending:
+        # 上一次回答途中頁面被重跑（如點了其他按鈕），由學生決定是否重新回答
+        with box, st.chat_message("user"):
+            st.markdown(pending)
+        col1, col2 = st.columns(2)
+        if col1.button("🔁 重新回答", key="chat_retry"):
+            question = pending
+        elif col2.button("放弃这个问题", key="chat_drop"):
+            del st.session_state["_chat_pending"]
+            st.rerun()
+    if conversation.messages and st.button("🧹 开始新对话", key="chat_clear"):
+        conversation.clear()
+        st.rerun()
+    if not question:
+        return
+    st.session_state["_chat_pending"] = question
+    prompt = get_prompt("chat", question=question).prepend(*conversation.history())
+    with box:
+        if question != pending:
+            with st.chat_message("user"):
+                st.markdown(question)
+        with st.chat_message("assistant"):
+            answer = ask_ai(prompt, "markdown", feature="chat")
+    del st.session_state["_chat_pending"]
+    if answer:
+        conversation.add(question, answer)
+        _fold_history(conversation)
@@ -0,0 +1,84 @@
+"""整班作業的批量批改界面（批改流程與斷點續批見 batch_grade.py）。"""
+import functools
+import time
+
+import streamlit as st
+
+from batch_grade import Checkpoint, batch_id, load_submissions, run_batch, to_csv
+from features.common import get_ai, get_image_cache, image_part
+from features.pdf_ui import ANSWER_REPORTS, pdf_export_ui
+from pdf_export import Report
+from prompts import get_prompt
+
+
+def batch_grading_ui(feature):
+    """整班批量批改：上傳 zip 或文件夾，每位學生一個文件（或一個子文件夾），逐個顯示結果並可導出 CSV。
+
+    批改說明取自提示註冊表中的 <feature>_batch，整批作業共用同一段固定前綴。
+    """
+    rows_key = f"{feature}_batch_rows"
+    with st.expander("📦 批量批改（整班作业）"):
+        source = st.radio("上传方式", ["ZIP 压缩包", "文件夹"], horizontal=True, key=f"{feature}_batch_source")
+        if source == "ZIP 压缩包":
+            files = st.file_uploader("上传作业压缩包", type=["zip"], accept_multiple_files=True, key=f"{feature}_batch_zip")
+        else:
+            files = st.file_uploader("选择作业文件夹", type=["txt", "md", "jpg", "jpeg", "png"],
+                                     accept_multiple_files="directory", key=f"{feature}_batch_dir")
+        st.caption("文件名即学生姓名；一位学生有多页图片时放在以其姓名命名的子文件夹中。支持 txt / md / jpg / png")
+        if files and st.button("开始批量批改", key=f"{feature}_batch_btn"):
+            try:
+                submissions = load_submissions([(f.name, f.getvalue()) for f in files])
+            except ValueError as e:
+                st.error(str(e))
+                return
+            if not submissions:
+                st.warning("没有找到可批改的作业文件")
+                return
+            image_cache = get_image_cache()
+            prompt = get_prompt(f"{feature}_batch")
+
+            def grade(client, sub):
+                # 在 run_batch 的工作線程中執行：client 由腳本線程取得後傳入，這裡不調用 Streamlit 接口
+                contents = prompt.attach(*([sub.text] if sub.text else []),
+                                         *[image_part(image_cache.get(img)[1]) for img in sub.images])
+                return client.models.generate_content(contents=contents.contents, feature=contents.feature,
+                                                      prefix=contents.prefix).text
+
+            progress = st.progress(0.0, text=f"共 {len(submissions)} 份作业")
+            table = st.empty()
+            rows, started = [], time.perf_counter()
+            checkpoint = Checkpoint(batch_id(feature, prompt.prefix, submissions))
+            for row in run_batch(submissions, functools.partial(grade, get_ai()), checkpoint):
+                rows.append(row)
+                progress.progress(len(rows) / len(submissions), text=f"已完成 {len(rows)}/{len(submissions)}")
+                table.dataframe([{k: r[k] for k in ("student", "grade", "error")} for r in rows], use_container_width=True)
+            elapsed = time.perf_counter() - started
+            graded = sum(1 for r in rows if not r["resumed"] and not r["error"])
+            resumed = sum(1 for r in rows if r["resumed"])
+            failed = sum(1 for r in rows if r["error"])
+            summary = f"批改完成：新批改 {graded} 份，用时 {elapsed:.1f} 秒"
+            if graded:
+                summary += f"，约 {graded / elapsed * 60:.1f} 份/分钟"
+            if resumed:
+                summary += f"；{resumed} 份沿用上次进度"
+            st.success(summary)
+            if failed:
+                st.warning(f"{failed} 份批改失败，再次点击「开始批量批改」会只重试这些作业")
+            st.session_state[rows_key] = rows
+        rows = st.session_state.get(rows_key)
+        if rows:
+            by_student = {r["student"]: r for r in rows}
+            pick = st.selectbox("查看评语", sorted(by_student), key=f"{feature}_batch_pick")
+            st.markdown(by_student[pick]["feedback"] or by_student[pick]["error"])
+            st.download_button("⬇️ 导出 CSV", to_csv(rows), file_name=f"{feature}_grades.csv", mime="text/csv",
+                               key=f"{feature}_batch_csv")
+
+            def build():
+                # 第一頁為全班等級總表，之後每位學生一頁評語
+                title = ANSWER_REPORTS.get(feature, ("批量批改",))[0]
+                report = Report(f"{title}（整班）", f"共 {len(rows)} 份 · " + time.strftime("%Y-%m-%d"))
+                report.table(["学生", "等级", "备注"], [(r["student"], r["grade"] or "", r["error"] or "") for r in rows])
+                for r in sorted(rows, key=lambda r: r["student"]):
+                    report.page_break().heading(r["student"]).text(r["feedback"] or r["error"])
+                return report
+            pdf_export_ui(build, f"{feature}_batch", f"{feature}_class_report.pdf", label="📄 导出整班报告 PDF")
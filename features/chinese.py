@@ -0,0 +1,119 @@
+"""🏮 中文科 (Chinese)"""
+import streamlit as st
+
+from features.batch_ui import batch_grading_ui
+from features.common import ask_ai, get_content, get_persist, track_feature, with_context
+from features.jobs_ui import job_result_ui, submit_ai_job
+from features.practice_ui import card_ui, quiz_ui, review_ui, wrongbook_ui
+from prompts import get_prompt
+
+
+def render():
+    chi_features = [
+        ("📜 文言文翻译", "chi_wyw"),
+        ("📚 阅读理解训练", "chi_read"),
+        ("✍️ 作文批改", "chi_essay"),
+        ("📝 现代文写作", "chi_write"),
+        ("🔍 词语注释", "chi_word"),
+        ("🧠 成语与修辞训练", "chi_idiom"),
+        ("📖 听力练习", "chi_listen"),
+        ("📋 错题本管理", "chi_wrong"),
+        ("🕒 历年真题演练", "chi_past"),
+        ("🎯 知识点自测", "chi_quiz"),
+        ("📑 诗词鉴赏", "chi_poem"),
+        ("📖 12篇必读", "chi_12")
+    ]
+    get_persist().init("chi_selected", "chi_wyw")
+    st.markdown("#### 请选择功能：")
+    cols = st.columns(3)
+    for idx, (label, key) in enumerate(chi_features):
+        if cols[idx % 3].button(label, key=f"btn_{key}"):
+            st.session_state["chi_selected"] = key
+    selected = st.session_state.get("chi_selected", "chi_wyw")
+    track_feature(selected)
+    st.markdown("---")
+    # 动态内容区
+    if selected == "chi_wyw":
+        st.markdown("#### 文言文智能翻译")
+        wyw = st.text_area("输入古文句子:", key="chi_wyw_text")
+        if st.button("AI 翻译", key="chi_wyw_btn"):
+            prompt = get_prompt("chi_wyw", text=wyw)
+            ask_ai(prompt, "success")
+    elif selected == "chi_read":
+        st.markdown("#### 阅读理解训练")
+        passage = st.text_area("输入现代文或古文:", key="chi_read_passage")
+        if st.button("AI 生成阅读理解题", key="chi_read_btn"):
+            prompt = get_prompt("chi_read", passage=passage)
+            ask_ai(prompt, "info")
+    elif selected == "chi_essay":
+        st.markdown("#### 作文批改与反馈")
+        user_essay = st.text_area("请粘贴你的作文：", height=200, key="chi_essay_text")
+        if st.button("AI 批改并反馈", key="chi_correct"):
+            prompt = get_prompt("chi_essay", essay=user_essay)
+            submit_ai_job(prompt)
+        job_result_ui("chi_essay", "markdown", spinner="AI 正在批改中...")
+        batch_grading_ui("chi_essay")
+    elif selected == "chi_write":
+        st.markdown("#### 现代文写作训练")
+        topic = st.text_input("输入写作主题:", key="chi_write_topic")
+        if st.button("AI 生成范文", key="chi_write_btn"):
+            prompt = get_prompt("chi_write", topic=topic)
+            ask_ai(prompt, "info")
+    elif selected == "chi_word":
+        st.markdown("#### 词语注释")
+        word = st.text_input("输入词语:", key="chi_word_note")
+        if st.button("AI 注释", key="chi_word_btn"):
+            prompt = with_context(get_prompt("chi_word", word=word), word, "chi")
+            ask_ai(prompt, "info")
+    elif selected == "chi_idiom":
+        st.markdown("#### 成语与修辞训练")
+        idiom = st.text_input("输入成语:", key="chi_idiom_text")
+        if st.button("AI 释义与造句", key="chi_idiom_btn"):
+            card_ui("chi_idiom", idiom, get_prompt("chi_idiom", idiom=idiom))
+        review_ui("chi_idiom")
+    elif selected == "chi_listen":
+        st.markdown("#### 听力练习（文本模拟）")
+        st.info("请使用外部音频资源，后续将支持音频上传与AI批改。")
+    elif selected == "chi_wrong":
+        wrongbook_ui("chi", "中文错题本管理")
+    elif selected == "chi_past":
+        st.markdown("#### DSE 中文历年真题演练 (示例)")
+        st.write("2022 Q1: 请写一篇关于‘诚信’的议论文。")
+        user_ans = st.text_area("你的答案:", key="chi_past_ans")
+        if st.button("提交答案", key="chi_past_submit"):
+            prompt = with_context(get_prompt("chi_past", answer=user_ans),
+                                  "请写一篇关于‘诚信’的议论文 评分准则", "chi")
+            submit_ai_job(prompt)
+        job_result_ui("chi_past", "success", spinner="AI 正在评分...")
+    elif selected == "chi_quiz":
+        quiz_ui("chi", "中文知识点自测 (选择题)")
+    elif selected == "chi_poem":
+        st.markdown("#### 诗词鉴赏")
+        poem = st.text_area("输入诗词:", key="chi_poem_text")
+        if st.button("AI 赏析", key="chi_poem_btn"):
+            prompt = get_prompt("chi_poem", poem=poem)
+            ask_ai(prompt, "info")
+
+    elif selected == "chi_12":
+        st.markdown("#### DSE 语文12篇必读课文（摘要、节选、白话译与考试提示）")
+        # 为避免版权问题，本模块提供：原文节选、白话译文、要点与考试提示（内容见 data/content.json）
+        content = get_content()
+        query = st.text_input("搜索篇名 / 作者 / 节选 / 要点:", key="chi12_search")
+        passages = content.search(query, collection="chi_12") if query.strip() else content.collection("chi_12")
+        if not passages:
+            st.caption("没有符合条件的篇章")
+
+        # 展示增强信息：标题按钮列
+        for idx, it in enumerate(passages):
+            if st.button(f"{idx+1}. {it['title']} — {it['author']}", key=f"chi12_{it['id']}"):
+                st.markdown(f"### {it['title']} — {it['author']}")
+                st.markdown("**原文节选：**")
+                st.write(it['excerpt'])
+                st.markdown("**白话译文：**")
+                st.write(it['translation'])
+                st.markdown("**要点分析：**")
+                for a in it['analysis']:
+                    st.write(f"- {a}")
+                st.markdown("**考试提示：**")
+                st.write(it['exam_tips'])
+                st.markdown("---")
@@ -0,0 +1,276 @@
+"""各科功能共用的輔助函數：會話持久化、AI 客戶端與 ask_ai、本地檢索、圖片預處理與靜態內容。
+
+各類共用界面按用途分在同目錄的模塊中：後台任務（jobs_ui）、自測 / 錯題本 / 記憶卡（practice_ui）、
+批量批改（batch_ui）、PDF 導出（pdf_ui）與 AI 助手（assistant_ui）。
+這裡只依賴輕量的模塊（google-genai 在第一次調用 AI 時才導入），任何科目都可以放心導入。
+"""
+import hmac
+import itertools
+import os
+import time
+import uuid
+
+import streamlit as st
+
+from content_store import DEFAULT_CONTENT_PATH, load_content
+from image_prep import MIME_TYPE as IMAGE_MIME_TYPE, PreparedImageCache
+from llm_cache import ResponseCache, CachedResponse, make_key
+from llm_dispatch import LLMDispatcher, DispatcherBusy
+from prompts import Prompt, prefix_config
+from routing import route
+from session_store import PersistentState, make_backend
+from telemetry import MetricsStore, usage_tokens
+
+
+# --- 會話狀態 ---
+@st.cache_resource
+def get_session_backend():
+    """會話狀態的持久化後端（默認 SQLite，可用 DSE_SESSION_BACKEND=redis 切換）"""
+    return make_backend()
+
+def get_user_id():
+    """匿名用戶標識，保存在網址參數 uid 中，刷新頁面後仍能找回自己的數據"""
+    uid = st.query_params.get("uid")
+    if not uid:
+        uid = uuid.uuid4().hex
+        st.query_params["uid"] = uid
+    return uid
+
+def get_persist():
+    """當前會話的持久化狀態；快照保存在 st.session_state 中，多次調用共享同一份"""
+    return PersistentState(get_session_backend(), st.session_state, get_user_id())
+
+
+# --- AI 客戶端 ---
+def use_stub():
+    """DSE_LLM_STUB=1 時使用離線模擬客戶端（stub_client.py），用於基準測試與壓力測試"""
+    return os.getenv("DSE_LLM_STUB", "") not in ("", "0")
+
+def get_secret(name):
+    """先讀 secrets.toml，沒有該文件或該項時讀同名環境變量"""
+    try:
+        return st.secrets.get(name, os.getenv(name))
+    except FileNotFoundError:
+        return os.getenv(name)
+
+def get_api_key():
+    if use_stub():
+        return "stub"
+    return get_secret("GEMINI_API_KEY")
+
+def is_admin():
+    """網址參數 admin 與 DSE_ADMIN_TOKEN 一致時可打開管理頁；未配置令牌時一律關閉"""
+    token = get_secret("DSE_ADMIN_TOKEN")
+    return bool(token) and hmac.compare_digest(st.query_params.get("admin", ""), token)
+
+@st.cache_resource
+def get_response_cache():
+    """進程內共享一個緩存實例；底層 SQLite 文件可被多個進程共享"""
+    return ResponseCache()
+
+@st.cache_resource
+def get_metrics():
+    """AI 調用遙測存儲（SQLite），進程內共享"""
+    return MetricsStore()
+
+def track_feature(feature):
+    """記下當前打開的功能（如 csd_kw），之後的 AI 調用按此歸類統計"""
+    st.session_state["_current_feature"] = feature
+
+@st.cache_resource
+def get_ai():
+    """創建並包裝 AI 客戶端（進程內共享）；google-genai 導入較慢，第一次調用 AI 時才導入"""
+    if use_stub():
+        from stub_client import StubClient as Client
+    else:
+        from google.genai import Client
+    api_key = get_api_key()
+    if not api_key:
+        # 無 API key 時不包裝，後續會提示配置 API Key
+        return None
+    client = Client(api_key=api_key)
+    if os.getenv("DSE_LLM_RECORD"):
+        # 錄製真實回答，供離線模擬客戶端重放
+        from stub_client import record_to
+        record_to(client, os.getenv("DSE_LLM_RECORD"))
+    # 所有請求經進程級調度器發出：限制並發、合併相同請求、排隊過多時提示稍後重試
+    dispatcher = LLMDispatcher(client.aio.models.generate_content, client.aio.models.generate_content_stream)
+    client.dispatcher = dispatcher
+    # 緩存與遙測存儲在這裡（腳本線程）取一次：包裝後的方法也會在後台任務的工作線程中調用，那裡沒有 Streamlit 上下文
+    metrics, response_cache = get_metrics(), get_response_cache()
+
+    # 包裝原始 generate_content：未顯式傳入 model 時按功能從路由表選模型（見 routing.py），
+    # 首選模型超時或出錯時依次改用後備模型；包裝只在 client 創建時做一次，避免每次 rerun 疊加多層包裝
+    # 每次嘗試按功能記錄耗時、token、緩存命中和錯誤（見 telemetry.py）
+    def _cached(models, contents, config, cache):
+        """路由鏈上任一模型已有緩存回答時直接使用；config 為 prefix_config() 的結果"""
+        for use_model in models:
+            text = cache.get(make_key(use_model, contents, config))
+            if text is not None:
+                return use_model, text
+        return None, None
+
+    def _generate_content_wrapper(*, model=None, contents=None, use_cache=True, feature=None, prefix=None, **kwargs):
+        models, budget = route(feature, model)
+        cache = response_cache if use_cache else None
+        # 固定前綴作為 system_instruction 發送（見 prompts.py），也計入回答緩存鍵
+        config = prefix_config(prefix, kwargs.pop("config", None))
+        if cache:
+            hit_model, text = _cached(models, contents, config, cache)
+            if text is not None:
+                metrics.timer(feature, hit_model).finish(cached=True)
+                return CachedResponse(text)
+        for i, use_model in enumerate(models):
+            timer = metrics.timer(feature, use_model)
+            key = make_key(use_model, contents, config)
+            try:
+                res = dispatcher.generate(key, use_model, contents, timeout=budget, config=config, **kwargs)
+            except DispatcherBusy:
+                timer.finish(error="DispatcherBusy")
+                raise
+            except Exception as e:
+                timer.finish(error=type(e).__name__)
+                if i == len(models) - 1:
+                    raise
+                continue
+            timer.finish(*usage_tokens(res))
+            break
+        if cache:
+            try:
+                cache.set(key, res.text, model=use_model)
+            except Exception:
+                # 緩存寫入失敗（如無文本的回答、磁盤只讀）不影響正常回答
+                pass
+        return res
+    client.models.generate_content = _generate_content_wrapper
+
+    # 流式版本：逐段返回回答，完整回答結束後同樣寫入緩存；
+    # 首個片段到達前可以換用後備模型，之後出錯只能報錯（否則用戶會看到兩段回答）
+    def _generate_content_stream_wrapper(*, model=None, contents=None, use_cache=True, feature=None, prefix=None,
+                                         **kwargs):
+        models, budget = route(feature, model)
+        cache = response_cache if use_cache else None
+        # 固定前綴作為 system_instruction 發送（見 prompts.py），也計入回答緩存鍵
+        config = prefix_config(prefix, kwargs.pop("config", None))
+        if cache:
+            hit_model, text = _cached(models, contents, config, cache)
+            if text is not None:
+                metrics.timer(feature, hit_model, stream=True).finish(cached=True)
+                yield CachedResponse(text)
+                return
+        for i, use_model in enumerate(models):
+            timer = metrics.timer(feature, use_model, stream=True)
+            parts, usage = [], (0, 0, 0)
+            try:
+                stream = dispatcher.generate_stream(use_model, contents, first_chunk_timeout=budget, config=config,
+                                                    **kwargs)
+                for chunk in stream:
+                    timer.first_byte()
+                    # 流式回答的 usage_metadata 是累計值，取最後一個非空的
+                    usage = usage_tokens(chunk) if getattr(chunk, "usage_metadata", None) else usage
+                    parts.append(chunk.text or "")
+                    yield chunk
+            except GeneratorExit:
+                # 讀取方提前停止（如頁面 rerun）
+                timer.finish(*usage, error="Cancelled")
+                raise
+            except Exception as e:
+                timer.finish(*usage, error=type(e).__name__)
+                if timer.ttfb is not None or isinstance(e, DispatcherBusy) or i == len(models) - 1:
+                    raise
+                continue
+            timer.finish(*usage)
+            break
+        if cache:
+            try:
+                cache.set(make_key(use_model, contents, config), "".join(parts), model=use_model)
+            except Exception:
+                pass
+    client.models.generate_content_stream = _generate_content_stream_wrapper
+    return client
+
+def level_up_check():
+    st.session_state.xp += 50
+    st.toast(f"🌟 經驗值 +50!", icon="🎉")
+
+def ask_ai(contents, style="markdown", model=None, spinner=None, feature=None):
+    """調用 AI 並以 st.<style> 顯示回答；開啟流式輸出時逐段顯示，返回完整回答文本。
+
+    contents 通常是 get_prompt() 生成的 Prompt（固定前綴與可變內容分開發送），也可以是普通內容。
+    feature 決定所用模型（見 routing.py）並用於遙測歸類，默認為 Prompt 的功能或當前打開的功能
+    （見 track_feature）；只有需要固定模型時才傳 model。
+    """
+    client = get_ai()
+    prefix, question = None, contents if isinstance(contents, str) else ""
+    if isinstance(contents, Prompt):
+        feature = feature or contents.feature
+        prefix, question, contents = contents.prefix, contents.question, contents.contents
+    feature = feature or st.session_state.get("_current_feature")
+    try:
+        if not st.session_state.get("stream_output", True):
+            with st.spinner(spinner or "AI 正在思考..."):
+                res = client.models.generate_content(model=model, contents=contents, feature=feature, prefix=prefix)
+            getattr(st, style)(res.text)
+            remember_answer(feature, question, res.text)
+            return res.text
+        placeholder = st.empty()
+        stream = client.models.generate_content_stream(model=model, contents=contents, feature=feature, prefix=prefix)
+        chunks = (c.text or "" for c in stream)
+        # 首個片段到達前顯示 spinner，之後直接逐段渲染
+        with st.spinner(spinner or "AI 正在思考..."):
+            first = next(chunks, "")
+    except DispatcherBusy as e:
+        st.warning(f"⏳ {e}")
+        return None
+    text = placeholder.write_stream(itertools.chain([first], chunks))
+    if style not in ("markdown", "write"):
+        # 輸出完畢後換成與非流式一致的樣式（info / success / warning）
+        getattr(placeholder, style)(text)
+    remember_answer(feature, question, text)
+    return text
+
+def remember_answer(feature, question, text):
+    """記下該功能最近一次的題目與回答；回答只在點擊按鈕的那一輪顯示，導出 PDF 時從這裡取"""
+    if text:
+        st.session_state.setdefault("_answers", {})[feature] = {"question": question, "answer": text,
+                                                               "time": time.time()}
+
+@st.cache_resource(ttl=600)
+def get_retriever():
+    """本地檢索索引（進程內共享，10 分鐘後重新檢查資料是否變化）"""
+    from retrieval import RetrievalIndex
+    return RetrievalIndex.open()
+
+def with_context(prompt, query, subject):
+    """從本地資料庫檢索與 query 最相關的幾段，放在 Prompt 的固定前綴之後、用戶內容之前；沒有命中時原樣返回"""
+    from retrieval import format_context
+    try:
+        hits = get_retriever().search(query, subject=subject)
+    except (OSError, ValueError):
+        # 索引損壞或無法寫入時不影響正常回答
+        hits = []
+    context = format_context(hits)
+    if not context:
+        return prompt
+    st.caption("📚 参考资料：" + "、".join(dict.fromkeys(chunk["source"] for _, chunk in hits)))
+    return prompt.prepend(context)
+
+@st.cache_resource
+def get_image_cache():
+    """進程內共享的圖片預處理緩存（按內容哈希）"""
+    return PreparedImageCache()
+
+def image_part(data):
+    """把預處理後的圖片字節包裝為多模態內容"""
+    from google.genai import types
+    return types.Part.from_bytes(data=data, mime_type=IMAGE_MIME_TYPE)
+
+
+# --- 靜態內容 ---
+@st.cache_data
+def _load_content(path, mtime):
+    return load_content(path)
+
+def get_content():
+    """必讀篇章與自測題（data/content.json），只讀取一次；文件修改後自動重新加載"""
+    return _load_content(DEFAULT_CONTENT_PATH, os.path.getmtime(DEFAULT_CONTENT_PATH))
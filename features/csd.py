@@ -0,0 +1,102 @@
+"""🌏 公社科 (CSD)"""
+import streamlit as st
+
+from features.common import ask_ai, get_persist, track_feature, with_context
+from features.jobs_ui import job_result_ui, submit_ai_job
+from features.practice_ui import card_ui, quiz_ui, review_ui, wrongbook_ui
+from prompts import get_prompt
+
+
+def render():
+    csd_features = [
+        ("📖 概念查询", "csd_kw"),
+        ("📝 时事分析", "csd_event"),
+        ("📊 数据解读", "csd_data"),
+        ("🗞️ 新闻速读", "csd_news"),
+        ("🧩 观点论证训练", "csd_view"),
+        ("📚 题库训练营", "csd_qbank"),
+        ("📋 错题本管理", "csd_wrong"),
+        ("🕒 历年真题演练", "csd_past"),
+        ("🎯 知识点自测", "csd_quiz"),
+        ("🧠 关键术语记忆卡", "csd_term"),
+        ("🌏 国际视野拓展", "csd_world")
+    ]
+    get_persist().init("csd_selected", "csd_kw")
+    st.markdown("#### 请选择功能：")
+    cols = st.columns(3)
+    for idx, (label, key) in enumerate(csd_features):
+        if cols[idx % 3].button(label, key=f"btn_{key}"):
+            st.session_state["csd_selected"] = key
+    selected = st.session_state.get("csd_selected", "csd_kw")
+    track_feature(selected)
+    st.markdown("---")
+    # 动态内容区
+    if selected == "csd_kw":
+        st.markdown("#### 公社科概念查询")
+        kw = st.text_input("输入要查询的概念:", key="csd_kw_text")
+        if st.button("AI 查询", key="csd_kw_btn"):
+            prompt = with_context(get_prompt("csd_kw", keyword=kw), kw, "csd")
+            ask_ai(prompt, "info")
+    elif selected == "csd_event":
+        st.markdown("#### 时事分析")
+        event = st.text_area("输入时事或社会热点:", key="csd_event_text")
+        if st.button("AI 分析", key="csd_event_btn"):
+            prompt = get_prompt("csd_event", event=event)
+            ask_ai(prompt, "info")
+    elif selected == "csd_data":
+        st.markdown("#### 数据解读")
+        data = st.text_area("输入数据描述或表格内容:", key="csd_data_text")
+        if st.button("AI 解读", key="csd_data_btn"):
+            prompt = get_prompt("csd_data", data=data)
+            ask_ai(prompt, "info")
+    elif selected == "csd_news":
+        st.markdown("#### 新闻速读")
+        news = st.text_area("输入新闻内容:", key="csd_news_text")
+        if st.button("AI 摘要", key="csd_news_btn"):
+            prompt = get_prompt("csd_news", news=news)
+            ask_ai(prompt, "info")
+    elif selected == "csd_view":
+        st.markdown("#### 观点论证训练")
+        view = st.text_area("输入你的观点:", key="csd_view_text")
+        if st.button("AI 论证", key="csd_view_btn"):
+            prompt = get_prompt("csd_view", view=view)
+            ask_ai(prompt, "info")
+    elif selected == "csd_qbank":
+        st.markdown("#### 公社科题库训练")
+        sample_questions = [
+            "简述全球化的影响。",
+            "什么是可持续发展？",
+            "举例说明社会分层。"
+        ]
+        q_idx = st.number_input("选择题号", min_value=0, max_value=len(sample_questions)-1, value=0, step=1, key="csd_qbank_idx")
+        st.write(f"题目: {sample_questions[q_idx]}")
+        user_ans = st.text_area("你的答案:", key="csd_qbank_ans")
+        if st.button("提交答案", key="csd_qbank_submit"):
+            prompt = get_prompt("csd_qbank", question=sample_questions[q_idx], answer=user_ans)
+            submit_ai_job(prompt)
+        job_result_ui("csd_qbank", "success", spinner="AI 正在评分...")
+    elif selected == "csd_wrong":
+        wrongbook_ui("csd", "公社科错题本管理")
+    elif selected == "csd_past":
+        st.markdown("#### DSE 公社科历年真题演练 (示例)")
+        st.write("2022 Q1: 简述香港社会的多元文化现象。")
+        user_ans = st.text_area("你的答案:", key="csd_past_ans")
+        if st.button("提交答案", key="csd_past_submit"):
+            prompt = with_context(get_prompt("csd_past", answer=user_ans),
+                                  "简述香港社会的多元文化现象 评分准则", "csd")
+            submit_ai_job(prompt)
+        job_result_ui("csd_past", "success", spinner="AI 正在评分...")
+    elif selected == "csd_quiz":
+        quiz_ui("csd", "公社科知识点自测 (选择题)")
+    elif selected == "csd_term":
+        st.markdown("#### 关键术语记忆卡")
+        term = st.text_input("输入术语:", key="csd_term_text")
+        if st.button("AI 生成记忆卡", key="csd_term_btn"):
+            card_ui("csd_term", term, get_prompt("csd_term", term=term))
+        review_ui("csd_term")
+    elif selected == "csd_world":
+        st.markdown("#### 国际视野拓展")
+        topic = st.text_input("输入国际话题:", key="csd_world_text")
+        if st.button("AI 拓展", key="csd_world_btn"):
+            prompt = get_prompt("csd_world", topic=topic)
+            ask_ai(prompt, "info")
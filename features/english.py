@@ -0,0 +1,95 @@
+"""🇬🇧 英文科 (English) - AI 学习助手"""
+import streamlit as st
+
+from features.batch_ui import batch_grading_ui
+from features.common import ask_ai, get_persist, track_feature, with_context
+from features.jobs_ui import job_result_ui, submit_ai_job
+from features.practice_ui import card_ui, quiz_ui, review_ui, wrongbook_ui
+from prompts import get_prompt
+
+
+def render():
+    eng_features = [
+        ("✍️ 作文批改", "eng_essay"),
+        ("📚 范文与建议", "eng_sample"),
+        ("📝 词汇语法练习", "eng_vocab"),
+        ("🎤 口语模拟面试", "eng_speak"),
+        ("🔍 阅读理解训练", "eng_read"),
+        ("🧠 词汇记忆卡片", "eng_word"),
+        ("📖 听力练习", "eng_listen"),
+        ("🗣️ 句型变换训练", "eng_sent"),
+        ("📋 错题本管理", "eng_wrong"),
+        ("🕒 历年真题演练", "eng_past"),
+        ("🎯 知识点自测", "eng_quiz")
+    ]
+    get_persist().init("eng_selected", "eng_essay")
+    st.markdown("#### 请选择功能：")
+    cols = st.columns(3)
+    for idx, (label, key) in enumerate(eng_features):
+        if cols[idx % 3].button(label, key=f"btn_{key}"):
+            st.session_state["eng_selected"] = key
+    selected = st.session_state.get("eng_selected", "eng_essay")
+    track_feature(selected)
+    st.markdown("---")
+    # 动态内容区
+    if selected == "eng_essay":
+        st.markdown("#### 英文作文批改与反馈")
+        user_essay = st.text_area("请粘贴你的英文作文：", height=200, key="eng_essay_text")
+        if st.button("AI 批改并反馈", key="eng_correct"):
+            prompt = get_prompt("eng_essay", essay=user_essay)
+            submit_ai_job(prompt)
+        job_result_ui("eng_essay", "markdown", spinner="AI 正在批改中...")
+        batch_grading_ui("eng_essay")
+    elif selected == "eng_sample":
+        st.markdown("#### 高分范文与写作建议")
+        if st.button("获取高分范文与建议", key="eng_sample_btn"):
+            prompt = get_prompt("eng_sample")
+            ask_ai(prompt, "markdown", spinner="AI 正在生成范文...")
+    elif selected == "eng_vocab":
+        st.markdown("#### 词汇与语法专项练习")
+        quiz = {"Choose the correct word:": ["affect/effect", "accept/except", "advice/advise"]}
+        for q, opts in quiz.items():
+            st.write(q)
+            for opt in opts:
+                st.write(f"- {opt}")
+        st.info("更多练习题即将上线！")
+    elif selected == "eng_speak":
+        st.markdown("#### 口语模拟面试")
+        topic = st.text_input("输入口语话题:", key="eng_speak_topic")
+        if st.button("AI 生成口语答案", key="eng_speak_btn"):
+            prompt = get_prompt("eng_speak", topic=topic)
+            ask_ai(prompt, "success")
+    elif selected == "eng_read":
+        st.markdown("#### 阅读理解训练")
+        passage = st.text_area("输入英文短文:", key="eng_read_passage")
+        if st.button("AI 生成阅读理解题", key="eng_read_btn"):
+            prompt = get_prompt("eng_read", passage=passage)
+            ask_ai(prompt, "info")
+    elif selected == "eng_word":
+        st.markdown("#### 词汇记忆卡片")
+        word = st.text_input("输入要记忆的单词:", key="eng_word_card")
+        if st.button("生成记忆卡片", key="eng_word_btn"):
+            card_ui("eng_word", word, get_prompt("eng_word", word=word))
+        review_ui("eng_word")
+    elif selected == "eng_listen":
+        st.markdown("#### 听力练习（文本模拟）")
+        st.info("请使用外部音频资源，后续将支持音频上传与AI批改。")
+    elif selected == "eng_sent":
+        st.markdown("#### 句型变换训练")
+        sentence = st.text_input("输入句子:", key="eng_sent_trans")
+        if st.button("AI 句型变换", key="eng_sent_btn"):
+            prompt = get_prompt("eng_sent", sentence=sentence)
+            ask_ai(prompt, "info")
+    elif selected == "eng_wrong":
+        wrongbook_ui("eng", "英文错题本管理")
+    elif selected == "eng_past":
+        st.markdown("#### DSE 英文历年真题演练 (示例)")
+        st.write("2022 Q1: Write an essay about the importance of teamwork.")
+        user_ans = st.text_area("你的答案:", key="eng_past_ans")
+        if st.button("提交答案", key="eng_past_submit"):
+            prompt = with_context(get_prompt("eng_past", answer=user_ans),
+                                  "Write an essay about the importance of teamwork marking scheme", "eng")
+            submit_ai_job(prompt)
+        job_result_ui("eng_past", "success", spinner="AI 正在评分...")
+    elif selected == "eng_quiz":
+        quiz_ui("eng", "英语知识点自测 (选择题)")
@@ -0,0 +1,119 @@
+"""後台任務：把耗時的 AI 調用提交給 job_queue 的工作線程執行，頁面只輪詢進度並顯示結果。"""
+import functools
+import time
+
+import streamlit as st
+
+from features.common import get_ai, get_api_key, get_user_id, remember_answer
+from prompts import Prompt
+
+
+@st.cache_resource
+def get_job_queue():
+    """後台任務隊列（SQLite）與工作線程池，進程內共享；耗時的批改在這裡執行，不受頁面 rerun 或切換功能影響。
+
+    創建時即啟動工作線程：重啟前留下的任務（排隊中或租約已過期）不必等到有人再提交才繼續執行。
+    任務處理函數由腳本線程註冊（見 _register_job_handlers），工作線程中不調用任何 Streamlit 接口；
+    google-genai 導入較慢，沒有遺留任務時推遲到第一次提交再註冊。
+    """
+    from job_queue import JobQueue
+    jobs = JobQueue()
+    if jobs.pending() and get_api_key():
+        _register_job_handlers(jobs)
+    jobs.start()
+    return jobs
+
+def _register_job_handlers(jobs):
+    """AI 客戶端在腳本線程中取得後交給工作線程，與 PDF 導出時先收集好報告內容再交給 ReportWorker 相同"""
+    jobs.register("ai", functools.partial(_run_ai_job, get_ai()))
+
+def _encode_part(part):
+    """任務參數需可 JSON 序列化：文本原樣保存，多模態片段（圖片）轉成 dict（字節為 base64）"""
+    return part if isinstance(part, str) else {"part": part.model_dump(mode="json", exclude_none=True)}
+
+def _decode_part(part):
+    if isinstance(part, str):
+        return part
+    from google.genai import types
+    return types.Part.model_validate(part["part"])
+
+def _run_ai_job(client, payload):
+    """在工作線程中用 client 執行一次 AI 調用，返回回答文本；調度器繁忙時拋出的 DispatcherBusy 會讓任務稍後重試"""
+    res = client.models.generate_content(model=payload["model"], contents=[_decode_part(c) for c in payload["contents"]],
+                                           feature=payload["feature"], prefix=payload["prefix"])
+    return res.text
+
+def submit_ai_job(contents, model=None, feature=None):
+    """把一次 AI 調用提交為後台任務（參數同 ask_ai），返回任務 ID；結果由 job_result_ui 顯示。
+
+    同一用戶重複提交相同內容時直接沿用未結束或近期完成的任務（見 job_queue.REUSE_TTL），不會再次生成。
+    """
+    prefix, question = None, contents if isinstance(contents, str) else ""
+    if isinstance(contents, Prompt):
+        feature = feature or contents.feature
+        prefix, question, contents = contents.prefix, contents.question, contents.contents
+    feature = feature or st.session_state.get("_current_feature")
+    parts = contents if isinstance(contents, list) else [contents]
+    payload = {"model": model, "feature": feature, "prefix": prefix, "contents": [_encode_part(p) for p in parts]}
+    jobs = get_job_queue()
+    _register_job_handlers(jobs)
+    job_id = jobs.submit(get_user_id(), "ai", payload, feature=feature, label=question)
+    st.session_state[f"{feature}_job"] = job_id
+    return job_id
+
+@st.fragment(run_every=1)
+def _job_progress(job_id, spinner):
+    """任務未完成時每秒只刷新這一小塊，完成後整頁重跑以顯示結果"""
+    from job_queue import PENDING, STATE_LABELS
+    jobs = get_job_queue()
+    job = jobs.get(job_id)
+    if job is None or job["state"] not in PENDING:
+        st.rerun()
+    waited = time.time() - job["created"]
+    status = STATE_LABELS[job["state"]]
+    if job["state"] == "queued":
+        status += f"，前面还有 {jobs.position(job_id)} 个任务"
+    st.info(f"⏳ {spinner or 'AI 正在思考...'}（{status}，已等待 {waited:.0f} 秒）可以先使用其他功能，完成后回到这里查看结果")
+    if job["state"] == "queued" and st.button("取消", key=f"{job_id}_cancel"):
+        jobs.cancel(job_id, get_user_id())
+        st.rerun()
+
+def job_result_ui(feature, style="markdown", spinner=None):
+    """顯示該功能最近一個後台任務：未完成時顯示進度並自動刷新，完成後以 st.<style> 顯示回答。
+
+    任務記在用戶名下，切換功能、科目或刷新頁面後回來，仍顯示上次的結果。
+    """
+    jobs, owner = get_job_queue(), get_user_id()
+    job_id = st.session_state.get(f"{feature}_job")
+    job = jobs.get(job_id, owner) if job_id else jobs.latest(owner, feature)
+    if job is None:
+        return
+    if job["state"] in ("queued", "running"):
+        _job_progress(job["id"], spinner)
+    elif job["state"] == "done":
+        getattr(st, style)(job["result"])
+        remember_answer(feature, job["label"], job["result"])
+    elif job["state"] == "error":
+        st.error(f"AI 任务失败：{job['error']}，请稍后再次提交")
+
+@st.dialog("AI 任务结果", width="large")
+def _job_dialog(job):
+    if job["label"]:
+        st.caption(job["label"][:300])
+    st.markdown(job["result"])
+
+def jobs_sidebar_ui():
+    """側邊欄：當前用戶最近的後台任務，已完成的可以隨時打開查看"""
+    from job_queue import STATE_LABELS
+    jobs = get_job_queue().recent(get_user_id(), limit=8)
+    if not jobs:
+        return
+    with st.expander("🗂️ 我的 AI 任务"):
+        for job in jobs:
+            when = time.strftime("%m-%d %H:%M", time.localtime(job["created"]))
+            st.caption(f"{when} · {job['feature']} · {STATE_LABELS[job['state']]}")
+            summary = (job["label"] or "（无文字内容）").replace("\n", " ")
+            if job["state"] == "done" and st.button(summary[:24], key=f"{job['id']}_open"):
+                _job_dialog(job)
+            elif job["state"] != "done":
+                st.text(summary[:24])
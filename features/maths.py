@@ -0,0 +1,346 @@
+"""🧮 數學科 (Maths) - Desmos 風格繪圖器、方程求解器、數據統計等。
+
+sympy、numpy 等數學依賴只在這裡導入，第一次打開數學科時才加載。
+"""
+import functools
+
+import numpy as np
+import plotly.graph_objects as go
+import sympy as sp
+import streamlit as st
+
+from expr_parser import parse_expression
+from features.batch_ui import batch_grading_ui
+from features.common import ask_ai, get_image_cache, get_persist, image_part, track_feature
+from features.jobs_ui import job_result_ui, submit_ai_job
+from features.pdf_ui import pdf_export_ui
+from features.practice_ui import quiz_ui
+from grapher import OVERLAY_POINTS, adaptive_sample, evaluate_family, parse_family
+from pdf_export import Report
+from prompts import get_prompt
+from solver import EquationSolver, SolverTimeout
+from stats_stream import StreamingStats, iter_column, numeric_columns, parse_text
+
+
+def add_symbol(sym):
+    """將符號追加到當前方程"""
+    st.session_state.math_eq += sym
+
+def parse_equation(eq_str):
+    """使用 SymPy 解析用戶輸入的字符串為數學函數；x 以外的符號作為參數（滑桿或參數族）"""
+    try:
+        x = sp.symbols('x')
+        # 解析表達式（受限解析器，不經 eval；支持 ^、隱式乘法等寫法）
+        expr = parse_expression(eq_str)
+        params = tuple(sorted(str(s) for s in expr.free_symbols if s != x))
+        # 轉換為 numpy 可計算的函數 f(x, *params)
+        f = sp.lambdify([x, *(sp.Symbol(p) for p in params)], expr, 'numpy')
+        return f, str(expr).replace('**', '^'), params
+    except Exception as e:
+        return None, str(e), ()
+
+def normalize_equation(eq_str):
+    """規範化表達式字符串（合併空白、^ 換成 **），作為緩存鍵；空格可能表示隱式乘法，不能全部去掉"""
+    return " ".join(eq_str.split()).replace('^', '**')
+
+DEFAULT_VIEW = (-10.0, 10.0)
+
+def round_view(view):
+    """視窗邊界取 6 位有效數字，避免浮點誤差造成緩存未命中"""
+    return tuple(float(f"{v:.6g}") for v in view)
+
+def zoom_view(view, factor):
+    """以視窗中點為中心縮放"""
+    center, half = (view[0] + view[1]) / 2, (view[1] - view[0]) / 2 * factor
+    return round_view((center - half, center + half))
+
+def sample_equation(norm_eq, x_min, x_max):
+    """在 [x_min, x_max] 內自適應取樣；返回 (func, 顯示用表達式, x, y, 繪圖錯誤)"""
+    func, display_eq, _ = get_equation_cache()(norm_eq)
+    if not func:
+        return None, display_eq, None, None, None
+    try:
+        x_vals, y_vals = adaptive_sample(func, x_min, x_max)
+    except Exception as e:
+        return func, display_eq, None, None, str(e)
+    # 緩存結果在所有會話之間共用，設為只讀防止被意外修改
+    x_vals.flags.writeable = False
+    y_vals.flags.writeable = False
+    return func, display_eq, x_vals, y_vals, None
+
+def sample_family(norm_eq, families, scalars, x_min, x_max):
+    """在共用的 x 網格上一次向量化求出整個參數族；返回 (x, y 矩陣, 曲線標籤, 繪圖錯誤)
+
+    families / scalars 只包含本表達式用到的參數，拖動某個滑桿時只有用到它的曲線需要重算。
+    """
+    func, _, params = get_equation_cache()(norm_eq)
+    x_vals = np.linspace(x_min, x_max, OVERLAY_POINTS)
+    try:
+        y_vals, labels = evaluate_family(func, params, x_vals, dict(families), dict(scalars))
+    except Exception as e:
+        return None, None, None, str(e)
+    x_vals.flags.writeable = False
+    y_vals.flags.writeable = False
+    return x_vals, y_vals, labels, None
+
+@st.cache_resource
+def get_equation_cache():
+    """進程內共用的 LRU 緩存：同一表達式只解析 / lambdify 一次"""
+    return functools.lru_cache(maxsize=128)(parse_equation)
+
+@st.cache_resource
+def get_sample_cache():
+    """按 (表達式, 視窗) 緩存取樣結果，無關控件引起的 rerun 直接命中"""
+    return functools.lru_cache(maxsize=256)(sample_equation)
+
+@st.cache_resource
+def get_family_cache():
+    """按 (表達式, 參數取值, 視窗) 緩存多曲線 / 參數族的求值結果"""
+    return functools.lru_cache(maxsize=256)(sample_family)
+
+@st.cache_resource
+def get_solver():
+    """進程級方程求解器：子進程池 + 超時中止 + 結果緩存"""
+    return EquationSolver()
+
+def cache_hit_rate(info):
+    lookups = info.hits + info.misses
+    return f"{info.hits / lookups:.0%}（{info.hits}/{lookups}）" if lookups else "—"
+
+
+def render():
+    math_features = [
+        "📊 函数绘图 (Grapher)",
+        "⚡ 步骤拆解",
+        "💣 陷阱扫描",
+        "📝 智能批改作业",
+        "📈 数据分析与统计",
+        "🔢 方程求解器",
+        "📚 题库训练营",
+        "🧩 数学小游戏",
+        "🕒 历年真题演练",
+        "📋 错题本管理",
+        "🎯 知识点自测"
+    ]
+    math_features = [
+        ("📊 函数绘图 (Grapher)", "math_grapher"),
+        ("⚡ 步骤拆解", "math_step"),
+        ("💣 陷阱扫描", "math_trap"),
+        ("📝 智能批改作业", "math_hw"),
+        ("📈 数据分析与统计", "math_stats"),
+        ("🔢 方程求解器", "math_eq"),
+        ("📚 题库训练营", "math_qbank"),
+        ("🧩 数学小游戏", "math_game"),
+        ("🕒 历年真题演练", "math_past"),
+        ("📋 错题本管理", "math_wrong"),
+        ("🎯 知识点自测", "math_quiz"),
+        ("📖 知识库（公式&计算器）", "math_know")
+    ]
+    get_persist().init("math_selected", "math_grapher")
+    st.markdown("#### 请选择功能：")
+    cols = st.columns(3)
+    for idx, (label, key) in enumerate(math_features):
+        if cols[idx % 3].button(label, key=f"btn_{key}"):
+            st.session_state["math_selected"] = key
+    selected = st.session_state.get("math_selected", "math_grapher")
+    track_feature(selected)
+    st.markdown("---")
+    # 动态内容区
+    if selected == "math_grapher":
+        st.markdown("#### 输入函数表达式 (如 x*sin(x), x**2+3*x-5):")
+        st.caption("每行一個函數，可疊加多條曲線；x 以外的字母是參數（自動生成滑桿），也可寫成參數族，如 a*x^2 ; a = -2, -1, 1, 2")
+        eq_text = st.text_area("y =", value=st.session_state.get("math_eq", "x*sin(x)"), key="math_eq_grapher")
+        try:
+            lines = [parse_family(line) for line in eq_text.splitlines() if line.strip()]
+        except ValueError as e:
+            st.error(str(e))
+            lines = []
+        # 視窗範圍：按鈕縮放，或在圖上框選一段 x 區間放大，均會在新範圍內重新取樣
+        view = st.session_state.setdefault("grapher_view", DEFAULT_VIEW)
+        zc1, zc2, zc3 = st.columns(3)
+        if zc1.button("🔍 放大", key="grapher_zoom_in"):
+            view = st.session_state.grapher_view = zoom_view(view, 0.5)
+        if zc2.button("🔎 縮小", key="grapher_zoom_out"):
+            view = st.session_state.grapher_view = zoom_view(view, 2)
+        if zc3.button("↺ 重置視窗", key="grapher_zoom_reset"):
+            view = st.session_state.grapher_view = DEFAULT_VIEW
+        equation_cache, sample_cache, family_cache = get_equation_cache(), get_sample_cache(), get_family_cache()
+        compiled = []
+        for expr, families in lines:
+            norm_eq = normalize_equation(expr)
+            compiled.append((norm_eq, dict(families), *equation_cache(norm_eq)))
+        # 參數族沒有給出取值的參數用滑桿控制
+        slider_params = sorted({p for _, fam, func, _, params in compiled if func for p in params if p not in fam})
+        scalars = {}
+        if slider_params:
+            pcols = st.columns(min(len(slider_params), 4))
+            for i, p in enumerate(slider_params):
+                scalars[p] = pcols[i % 4].slider(p, -10.0, 10.0, 1.0, 0.1, key=f"grapher_param_{p}")
+        fig = go.Figure()
+        n_points = 0
+        drawn = []  # 實際畫出的每條曲線對應的函數（解析失敗的行不計入）
+        for norm_eq, fam, func, display_eq, params in compiled:
+            if not func:
+                st.warning(f"无法解析 {norm_eq}：{display_eq}")
+                continue
+            if len(compiled) == 1 and not params:
+                # 單條普通曲線：自適應取樣
+                _, _, x_vals, y_vals, plot_error = sample_cache(norm_eq, *view)
+                traces = [(f"y={display_eq}", y_vals)] if not plot_error else []
+            else:
+                used_fam = tuple((p, fam[p]) for p in params if p in fam)
+                used_scalars = tuple((p, scalars[p]) for p in params if p not in fam)
+                x_vals, y_mat, labels, plot_error = family_cache(norm_eq, used_fam, used_scalars, *view)
+                traces = [] if plot_error else [
+                    (f"y={display_eq}" + (f" ({label})" if label else ""), y) for label, y in zip(labels, y_mat)
+                ]
+            if plot_error:
+                st.error(f"无法绘图: {plot_error}")
+            for name, y_vals in traces:
+                fig.add_trace(go.Scatter(x=x_vals, y=y_vals, mode='lines', name=name))
+                n_points += len(x_vals)
+                drawn.append(display_eq)
+        if fig.data:
+            title = f"y = {drawn[0]}" if len(fig.data) == 1 else f"函數疊加（{len(fig.data)} 條曲線）"
+            fig.update_layout(title=title, xaxis_title="x", yaxis_title="y", height=400,
+                              xaxis_range=list(view), dragmode="select")
+            event = st.plotly_chart(fig, use_container_width=True, on_select="rerun",
+                                    selection_mode="box", key="grapher_chart")
+            boxes = event["selection"]["box"] if event else []
+            if boxes:
+                box_x = tuple(sorted(boxes[0]["x"]))
+                # 框選狀態在 rerun 後仍會保留，只處理新的框選
+                if box_x != st.session_state.get("grapher_last_box") and box_x[1] > box_x[0]:
+                    st.session_state.grapher_last_box = box_x
+                    st.session_state.grapher_view = round_view(box_x)
+                    st.rerun()
+            st.caption(f"🖱️ 在圖上框選一段區間即可放大；當前範圍 [{view[0]:g}, {view[1]:g}]，共 {n_points} 點")
+            equations = "\n".join(f"- y = {display_eq}" for _, _, func, display_eq, _ in compiled if func)
+            params = "，".join(f"{p} = {v:g}" for p, v in scalars.items())
+            pdf_export_ui(lambda: Report("函數圖像", f"x ∈ [{view[0]:g}, {view[1]:g}]" + (f"；{params}" if params else ""))
+                          .text(equations).figure(fig), "grapher", "grapher.pdf")
+        elif not compiled:
+            st.info("请输入有效的数学表达式，如 x**2+3*x-5")
+        eq_info, sample_info, family_info = equation_cache.cache_info(), sample_cache.cache_info(), family_cache.cache_info()
+        st.caption(f"⚙️ 緩存命中率：表達式編譯 {cache_hit_rate(eq_info)}，取樣結果 {cache_hit_rate(sample_info)}，"
+                   f"曲線族 {cache_hit_rate(family_info)}")
+    elif selected == "math_step":
+        st.markdown("#### 智能分步解题")
+        q_math = st.text_area("输入数学题目:", key="math_step_text")
+        if st.button("AI 生成分步解答", key="math_step_solve"):
+            prompt = get_prompt("math_step", question=q_math)
+            submit_ai_job(prompt)
+        job_result_ui("math_step", "markdown", spinner="AI 正在分析...")
+    elif selected == "math_trap":
+        st.markdown("#### 常见陷阱扫描")
+        topic = st.selectbox("选择课题", ["Quadratic Equations", "Trigonometry", "Coordinate Geometry", "Calculus", "Statistics"])
+        if st.button("扫描常犯错误", key="math_trap_scan"):
+            prompt = get_prompt("math_trap", topic=topic)
+            ask_ai(prompt, "warning")
+    elif selected == "math_hw":
+        st.markdown("#### 上传作业图片或输入答案，AI 批改")
+        up_file = st.file_uploader("上传作业图片 (jpg/png)", type=["jpg", "png"], key="math_hw_img")
+        hw_text = st.text_area("或直接输入你的解答:", key="math_hw_text")
+        if st.button("AI 批改作业", key="math_hw_check"):
+            prompt = get_prompt("math_hw", answer=hw_text)
+            if up_file:
+                # 图片经缩小、灰度、压缩、去 EXIF 后作为多模态内容一并发送
+                try:
+                    _, image = get_image_cache().get(up_file.getvalue())
+                except ValueError as e:
+                    st.error(str(e))
+                    st.stop()
+                prompt = prompt.attach("（作业见附图）", image_part(image))
+                st.caption(f"图片已压缩：{len(up_file.getvalue()) / 1024:.0f} KB → {len(image) / 1024:.0f} KB")
+            submit_ai_job(prompt)
+        job_result_ui("math_hw", "success", spinner="AI 正在批改...")
+        batch_grading_ui("math_hw")
+    elif selected == "math_stats":
+        st.markdown("#### 数据分析与统计工具")
+        st.info("输入一组数据或上传成绩表（CSV / Excel），自动分析均值、方差、最大最小值、分位数等")
+        source = st.radio("数据来源", ["手动输入", "上传 CSV / Excel"], horizontal=True, key="math_stats_source")
+        stats = None
+        if source == "手动输入":
+            data_input = st.text_area("输入数据（用逗号分隔）:", key="math_stats_data")
+            if st.button("分析数据", key="math_stats_btn"):
+                try:
+                    stats = StreamingStats().update(parse_text(data_input))
+                except ValueError as e:
+                    st.error(f"数据格式有误: {e}")
+        else:
+            data_file = st.file_uploader("上传成绩表", type=["csv", "xlsx"], key="math_stats_file")
+            if data_file:
+                try:
+                    columns = numeric_columns(data_file, data_file.name)
+                except Exception as e:
+                    st.error(f"无法读取文件: {e}")
+                    columns = []
+                if not columns:
+                    st.warning("文件中没有数值列")
+                column = st.selectbox("分析哪一列", columns, key="math_stats_column") if columns else None
+                if column is not None and st.button("分析数据", key="math_stats_file_btn"):
+                    stats = StreamingStats()
+                    with st.spinner("正在逐块读取数据..."):
+                        data_file.seek(0)
+                        try:
+                            for chunk in iter_column(data_file, data_file.name, column):
+                                stats.update(chunk)
+                        except Exception as e:
+                            st.error(f"数据格式有误: {e}")
+                            stats = None
+        if stats is not None:
+            if stats.n == 0:
+                st.error("数据格式有误: 没有可分析的数字")
+            else:
+                q1, median, q3 = stats.quantiles()
+                report = Report("数据分析报告", f"样本数 {stats.n}" + ("（分位数与直方图基于随机抽样估算）" if not stats.exact else ""))
+                report.table(["统计量", "数值"], [("均值", f"{stats.mean:.2f}"), ("方差", f"{stats.var:.2f}"),
+                                                  ("标准差", f"{stats.std:.2f}"), ("最大值", f"{stats.max:g}"),
+                                                  ("最小值", f"{stats.min:g}"), ("中位数", f"{median:.2f}"),
+                                                  ("下四分位数 Q1", f"{q1:.2f}"), ("上四分位数 Q3", f"{q3:.2f}")])
+                st.write(f"样本数: {stats.n}" + (f"（已跳过 {stats.skipped} 个非数字单元格）" if stats.skipped else ""))
+                st.write(f"均值: {stats.mean:.2f}")
+                st.write(f"方差: {stats.var:.2f}")
+                st.write(f"标准差: {stats.std:.2f}")
+                st.write(f"最大值: {stats.max:g}")
+                st.write(f"最小值: {stats.min:g}")
+                st.write(f"中位数: {median:.2f}　下四分位数 Q1: {q1:.2f}　上四分位数 Q3: {q3:.2f}")
+                if not stats.exact:
+                    st.caption("数据量较大，分位数与直方图基于随机抽样估算")
+                # 直方图和箱形图都在服务器端汇总，只把统计量传到浏览器
+                counts, edges = stats.histogram()
+                fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), name="频数"))
+                fig.update_layout(title="直方图", xaxis_title="数值", yaxis_title="频数", bargap=0.02)
+                st.plotly_chart(fig, use_container_width=True)
+                report.figure(fig)
+                box = stats.box()
+                fig = go.Figure(go.Box(name="数据", q1=[box["q1"]], median=[box["median"]], q3=[box["q3"]],
+                                       lowerfence=[box["lowerfence"]], upperfence=[box["upperfence"]],
+                                       mean=[box["mean"]], sd=[box["sd"]], boxpoints=False))
+                fig.update_layout(title="箱形图")
+                st.plotly_chart(fig, use_container_width=True)
+                # 结果只在点击「分析数据」的那一轮显示，报告留到之后导出
+                st.session_state["math_stats_report"] = report.figure(fig)
+        if st.session_state.get("math_stats_report"):
+            pdf_export_ui(lambda: st.session_state["math_stats_report"], "math_stats", "stats_report.pdf",
+                          label="📄 导出上次的分析结果为 PDF")
+    elif selected == "math_eq":
+        st.markdown("#### 方程求解器 (支持一元/二元)")
+        eq = st.text_input("输入方程 (如 x**2-4=0 或 x+y=5, x-y=1):", key="math_eq_solver")
+        if st.button("求解方程", key="math_eq_solve_btn"):
+            solver = get_solver()
+            try:
+                with st.spinner("正在求解..."):
+                    method, sol = solver.solve(eq)
+                if method == "numeric":
+                    st.write(f"解（数值近似）: {sol}")
+                    st.caption("符号求解超时或无解析解，已改用数值方法")
+                else:
+                    st.write(f"解: {sol}")
+            except SolverTimeout as e:
+                st.error(f"求解超时: {e}")
+            except Exception as e:
+                st.error(f"无法求解: {e}")
+            st.caption(f"⚙️ 求解结果缓存：命中 {solver.hits} 次，未命中 {solver.misses} 次")
+    elif selected == "math_qbank":
+        quiz_ui("math", "DSE 数学题库训练营")
@@ -0,0 +1,70 @@
+"""PDF 導出界面：報告內容在腳本線程收集，排版交給 pdf_export.ReportWorker 在後台進行。"""
+import time
+
+import streamlit as st
+
+from pdf_export import Report
+
+
+# 可導出最近一次回答的功能：(報告標題, 題目小標題, 回答小標題)
+ANSWER_REPORTS = {
+    "math_step": ("数学分步解答", "题目", "分步解答"),
+    "math_hw": ("数学作业批改", "学生解答", "批改与建议"),
+    "eng_essay": ("英文作文批改报告", "学生作文", "批改与建议"),
+    "eng_past": ("英文历年真题批改", "学生答案", "评分与解析"),
+    "chi_essay": ("中文作文批改报告", "学生作文", "批改与建议"),
+    "chi_past": ("中文历年真题批改", "学生答案", "评分与解析"),
+    "csd_qbank": ("公社科题目批改", "题目与答案", "评分与解析"),
+    "csd_past": ("公社科历年真题批改", "学生答案", "评分与解析"),
+}
+
+@st.cache_resource
+def get_report_worker():
+    """後台生成 PDF 的線程池（進程內共享）；fpdf2 在第一次生成時才導入"""
+    from pdf_export import ReportWorker
+    return ReportWorker()
+
+@st.fragment(run_every=1)
+def _pdf_progress(job_id):
+    """生成期間每秒只刷新這一小塊，完成後整頁重跑以顯示下載按鈕"""
+    status = get_report_worker().status(job_id)
+    if status["state"] == "pending":
+        st.progress(status["progress"], text="正在后台生成 PDF，可以继续使用其他功能…")
+    else:
+        st.rerun()
+
+def pdf_export_ui(build, key, file_name, label="📄 生成 PDF"):
+    """生成 PDF 按鈕：點擊時 build() 收集報告內容（pdf_export.Report），排版在後台線程進行，完成後提供下載"""
+    job_key = f"{key}_pdf_job"
+    worker = get_report_worker()
+    if st.button(label, key=f"{key}_pdf_btn"):
+        st.session_state[job_key] = worker.submit(build())
+    job_id = st.session_state.get(job_key)
+    if not job_id:
+        return
+    status = worker.status(job_id)
+    if status["state"] == "pending":
+        _pdf_progress(job_id)
+    elif status["state"] == "done":
+        st.download_button("⬇️ 下载 PDF", worker.read(job_id), file_name=file_name, mime="application/pdf",
+                           key=f"{key}_pdf_download")
+    elif status["state"] == "error":
+        st.error(f"PDF 生成失败：{status['error']}")
+    else:
+        # 文件已過期清理
+        del st.session_state[job_key]
+
+def answer_pdf_ui():
+    """當前功能最近一次的批改 / 解答導出為 PDF（題目或作答 + AI 回答）"""
+    feature = st.session_state.get("_current_feature")
+    answer = st.session_state.get("_answers", {}).get(feature)
+    if feature not in ANSWER_REPORTS or not answer:
+        return
+    title, question_label, answer_label = ANSWER_REPORTS[feature]
+
+    def build():
+        report = Report(title, time.strftime("%Y-%m-%d %H:%M", time.localtime(answer["time"])))
+        if answer["question"]:
+            report.heading(question_label).text(answer["question"])
+        return report.heading(answer_label).text(answer["answer"])
+    pdf_export_ui(build, f"{feature}_answer", f"{feature}.pdf", label="📄 导出上次的结果为 PDF")
@@ -0,0 +1,202 @@
+"""練習類的共用界面：自適應自測、錯題本與記憶卡複習，各科按 subject / deck 區分數據。"""
+import time
+
+import numpy as np
+import streamlit as st
+
+from features.common import ask_ai, get_user_id
+from features.pdf_ui import pdf_export_ui
+from flashcards import GRADES as CARD_GRADES, NEW_PER_DAY, CardDeck, describe_interval, normalize_front, schedule
+from pdf_export import Report
+from wrongbook import PAGE_SIZE as WRONGBOOK_PAGE_SIZE, WrongBook
+
+
+# --- 自適應自測 ---
+@st.cache_resource(ttl=600)
+def get_item_bank():
+    """自測題庫（Arrow 內存映射，進程內共享；10 分鐘後重新檢查題目文件是否變化），疊加已校準的題目難度"""
+    from item_bank import ItemBank
+    bank = ItemBank.open()
+    bank.apply_calibration(get_quiz_store().calibration())
+    return bank
+
+@st.cache_resource
+def get_quiz_store():
+    """能力估計與作答記錄（SQLite），進程內共享"""
+    from item_bank import QuizStore
+    return QuizStore()
+
+def _answered_mask(bank, owner, subject):
+    """本會話中已答過的題目（題庫長度的布爾數組）；第一次用到時從作答記錄讀取，題庫重建後重新讀取"""
+    key = f"{subject}_quiz_answered"
+    cached = st.session_state.get(key)
+    if not cached or cached[0] != bank.fingerprint:
+        mask = np.zeros(len(bank), dtype=bool)
+        mask[[bank.positions[i] for i in get_quiz_store().answered(owner, subject) if i in bank.positions]] = True
+        cached = st.session_state[key] = (bank.fingerprint, mask)
+    return cached[1]
+
+def quiz_ui(subject, title):
+    """自適應自測：按能力估計選題（約七成把握的難度），作答後更新能力估計和題目難度"""
+    from item_bank import logit_to_level, p_correct, select_item
+    st.markdown(f"#### {title}")
+    bank, store, owner = get_item_bank(), get_quiz_store(), get_user_id()
+    if not len(bank.candidates(subject)):
+        st.info("暂无题目")
+        return
+    topic = st.selectbox("课题", ["全部"] + bank.topics(subject), key=f"{subject}_quiz_topic")
+    topic = None if topic == "全部" else topic
+    theta, attempts = store.ability(owner, subject)
+    answered = _answered_mask(bank, owner, subject)
+    item_key, result_key = f"{subject}_quiz_item", f"{subject}_quiz_result"
+    current = st.session_state.get(item_key)
+    # 換了課題或題庫重建後重新選題
+    if not current or current[0] != (bank.fingerprint, topic):
+        pos = select_item(theta, bank.difficulty, bank.candidates(subject, topic), answered)
+        current = st.session_state[item_key] = ((bank.fingerprint, topic), pos)
+        st.session_state.pop(result_key, None)
+    pos = current[1]
+    item = bank.item(pos)
+    st.caption(f"课题：{item['topic'] or '—'}　难度 {logit_to_level(item['difficulty'])}/5　"
+               f"预计答对率 {float(p_correct(theta, item['difficulty'])):.0%}　已作答 {attempts} 题")
+    st.write(item["question"])
+    user_choice = st.radio("你的选择:", item["options"], index=None, key=f"{subject}_quiz_choice_{pos}")
+    result = st.session_state.get(result_key)
+    if result is None:
+        if st.button("提交自测", key=f"{subject}_quiz_submit", disabled=user_choice is None):
+            correct = item["options"].index(user_choice) == item["answer"]
+            store.record(owner, bank, pos, correct)
+            answered[pos] = True
+            st.session_state[result_key] = correct
+            st.rerun()
+        return
+    if result:
+        st.success("答对了！")
+    else:
+        st.error(f"答错了，继续努力！正确答案：{item['options'][item['answer']]}")
+    if st.button("下一题", key=f"{subject}_quiz_next"):
+        st.session_state.pop(item_key)
+        st.session_state.pop(result_key)
+        st.rerun()
+
+
+# --- 錯題本 ---
+@st.cache_resource
+def get_wrongbook():
+    """錯題本存儲（SQLite + FTS5），進程內共享"""
+    return WrongBook()
+
+def wrongbook_ui(subject, title):
+    """錯題本：添加（可加課題標籤）、按關鍵詞 / 課題篩選、分頁瀏覽和刪除"""
+    st.markdown(f"#### {title}")
+    book, owner = get_wrongbook(), get_user_id()
+    add_wrong = st.text_area("添加错题（描述或粘贴题目）:", key=f"{subject}_wrong_add")
+    topic = st.text_input("课题标签（可选，如 文言文、Reading）:", key=f"{subject}_wrong_topic")
+    if st.button("添加到错题本", key=f"{subject}_wrong_add_btn"):
+        if add_wrong:
+            book.add(owner, subject, add_wrong, topic)
+            st.success("已添加到错题本！")
+    st.write("##### 我的错题本：")
+    col_q, col_t = st.columns([2, 1])
+    query = col_q.text_input("搜索", placeholder="输入关键词", key=f"{subject}_wrong_query")
+    topic_filter = col_t.selectbox("课题", ["全部"] + book.topics(owner, subject), key=f"{subject}_wrong_filter")
+    # 篩選條件變化時回到第 1 頁
+    filters = (query, topic_filter)
+    if st.session_state.get(f"{subject}_wrong_filters") != filters:
+        st.session_state[f"{subject}_wrong_filters"] = filters
+        st.session_state[f"{subject}_wrong_page"] = 1
+    page = st.session_state.get(f"{subject}_wrong_page", 1)
+    topic_value = None if topic_filter == "全部" else topic_filter
+    rows, total = book.search(owner, subject, query, topic_value, page)
+    pages = max(1, -(-total // WRONGBOOK_PAGE_SIZE))
+    if page > pages:
+        st.session_state[f"{subject}_wrong_page"] = page = pages
+        rows, total = book.search(owner, subject, query, topic_value, page)
+    if not total:
+        st.caption("暂无错题" if not query and topic_filter == "全部" else "没有符合条件的错题")
+        return
+    start = (page - 1) * WRONGBOOK_PAGE_SIZE
+    for i, (qid, q_topic, content, _) in enumerate(rows):
+        col_c, col_d = st.columns([12, 1])
+        col_c.write(f"{start + i + 1}. {f'【{q_topic}】' if q_topic else ''}{content}")
+        if col_d.button("🗑", key=f"{subject}_wrong_del_{qid}", help="删除"):
+            book.delete(owner, qid)
+            st.rerun()
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    if col_prev.button("上一页", key=f"{subject}_wrong_prev", disabled=page <= 1):
+        st.session_state[f"{subject}_wrong_page"] = page - 1
+        st.rerun()
+    col_info.caption(f"第 {page} / {pages} 页，共 {total} 题")
+    if col_next.button("下一页", key=f"{subject}_wrong_next", disabled=page >= pages):
+        st.session_state[f"{subject}_wrong_page"] = page + 1
+        st.rerun()
+
+    def build():
+        # 導出當前篩選條件下的全部錯題，不只是當前頁
+        all_rows, _ = book.search(owner, subject, query, topic_value, 1, per_page=total)
+        filters = [f"关键词：{query}"] if query else []
+        filters += [f"课题：{topic_value}"] if topic_value else []
+        subtitle = f"共 {total} 题" + (f"（{'，'.join(filters)}）" if filters else "") + " · " + time.strftime("%Y-%m-%d")
+        report = Report(title, subtitle)
+        for i, (_, q_topic, content, _) in enumerate(all_rows, 1):
+            report.heading(f"{i}. {q_topic}" if q_topic else f"{i}.").text(content)
+        return report
+    pdf_export_ui(build, f"{subject}_wrong", f"{subject}_wrongbook.pdf", label="📄 导出错题本 PDF")
+
+
+# --- 記憶卡 ---
+@st.cache_resource
+def get_cards():
+    """記憶卡片庫與複習進度（SQLite），進程內共享"""
+    return CardDeck()
+
+def card_ui(deck, front, prompt, style="info"):
+    """生成記憶卡並加入複習計劃；卡片庫中已有同一詞條時直接顯示，不再調用 AI"""
+    if not normalize_front(front):
+        st.warning("请先输入内容")
+        return
+    cards = get_cards()
+    card = cards.get_card(deck, front)
+    if card:
+        getattr(st, style)(card["content"])
+        st.caption("📇 卡片库中已有此卡，未调用 AI")
+    else:
+        text = ask_ai(prompt, style)
+        if not text:
+            return
+        card = cards.add_card(deck, front, text)
+    if cards.enroll(get_user_id(), card["id"]):
+        st.caption("✅ 已加入复习计划")
+
+def review_ui(deck):
+    """今日複習：按到期時間取卡，先回憶再看答案，自評後按 SM-2 安排下次複習；全程不調用 AI"""
+    cards, owner = get_cards(), get_user_id()
+    st.markdown("##### 📅 今日复习")
+    due, total = cards.counts(owner, deck)
+    unseen = cards.unseen(owner, deck)
+    col_info, col_new = st.columns([2, 1])
+    col_info.caption(f"待复习 {due} 张，复习计划共 {total} 张" + (f"；卡片库中还有 {unseen} 张新卡" if unseen else ""))
+    if unseen and col_new.button(f"加入 {min(unseen, NEW_PER_DAY)} 张新卡", key=f"{deck}_review_new"):
+        cards.enroll_new(owner, deck)
+        st.rerun()
+    if not due:
+        if total:
+            st.success("今日复习已完成 🎉")
+        return
+    card = cards.due(owner, deck, limit=1)[0]
+    st.markdown(f"### {card['front']}")
+    reveal_key = f"{deck}_review_reveal"
+    if st.session_state.get(reveal_key) != card["id"]:
+        if st.button("显示答案", key=f"{deck}_review_show"):
+            st.session_state[reveal_key] = card["id"]
+            st.rerun()
+        return
+    st.info(card["content"])
+    # 按鈕上預告每個評分對應的下次複習時間
+    now = time.time()
+    for col, (label, quality) in zip(st.columns(len(CARD_GRADES)), CARD_GRADES):
+        next_review = describe_interval(schedule(card, quality, now), now)
+        if col.button(f"{label}（{next_review}）", key=f"{deck}_review_{quality}"):
+            cards.review(owner, card["id"], quality)
+            st.session_state.pop(reveal_key, None)
+            st.rerun()
@@ -0,0 +1,321 @@
+"""記憶卡片庫與間隔重複（SM-2）複習計劃：英文詞彙卡、成語卡、公社科術語卡。
+
+卡片內容由 AI 生成一次後存入 SQLite，所有用戶共用；每位用戶各自的複習進度（到期時間、間隔、難度係數）
+另表保存，按 (用戶, 卡組, 到期時間) 建索引，取「今日待複習」只是一次索引範圍查詢，複習時不調用 AI。
+
+    python flashcards.py pregen eng_word words.txt            # 用 Batch API 批量預生成卡片（半價，最長 24 小時）
+    python flashcards.py pregen eng_word words.txt --online   # 直接並發調用，適合少量詞條或離線模擬客戶端
+    python flashcards.py pregen eng_word --job batches/xxx    # 繼續等待之前提交的批量任務
+    python flashcards.py stats                                # 各卡組的卡片數
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+
+from db import connect
+from prompts import get_prompt
+from routing import route
+
+DEFAULT_DB_PATH = os.getenv("DSE_FLASHCARDS_PATH", os.path.join(".cache", "flashcards.sqlite3"))
+
+# 卡組 -> (名稱, 提示模板中的字段名)
+DECKS = {
+    "eng_word": ("英文詞彙", "word"),
+    "chi_idiom": ("成語", "idiom"),
+    "csd_term": ("公社科術語", "term"),
+}
+
+# 自評等級（SM-2 的 0-5 分）：忘記、困難、良好、容易
+GRADES = [("重来", 1), ("困难", 3), ("良好", 4), ("容易", 5)]
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+RELEARN_DELAY = 600  # 忘記的卡片 10 分鐘後再出現
+DAY = 86400
+NEW_PER_DAY = 10  # 每次從卡片庫加入的新卡數
+
+_SCHEMA = [
+    # 卡片內容：同一卡組中同一詞條只生成一次
+    "CREATE TABLE IF NOT EXISTS cards ("
+    " id INTEGER PRIMARY KEY, deck TEXT NOT NULL, front TEXT NOT NULL, content TEXT NOT NULL,"
+    " model TEXT NOT NULL DEFAULT '', created REAL NOT NULL, UNIQUE (deck, front))",
+    # 每位用戶的複習進度；interval 以天為單位
+    "CREATE TABLE IF NOT EXISTS reviews ("
+    " owner TEXT NOT NULL, card_id INTEGER NOT NULL REFERENCES cards(id), deck TEXT NOT NULL,"
+    " due REAL NOT NULL, interval REAL NOT NULL DEFAULT 0, ease REAL NOT NULL DEFAULT 2.5,"
+    " reps INTEGER NOT NULL DEFAULT 0, lapses INTEGER NOT NULL DEFAULT 0, last_review REAL,"
+    " PRIMARY KEY (owner, card_id))",
+    "CREATE INDEX IF NOT EXISTS idx_reviews_due ON reviews(owner, deck, due)",
+]
+
+
+def normalize_front(text):
+    """詞條規範化：合併空白；英文不區分大小寫"""
+    return " ".join((text or "").split()).lower()
+
+
+def schedule(state, quality, now=None):
+    """SM-2：按自評分數（0-5）計算下一次複習，返回新的 {due, interval, ease, reps, lapses}。
+
+    3 分以上算記得：前兩次間隔 1 天、6 天，之後每次乘以難度係數；低於 3 分重新開始，10 分鐘後再複習。
+    難度係數按分數調整，最低 1.3。
+    """
+    now = time.time() if now is None else now
+    ease = max(MIN_EASE, state["ease"] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if quality < 3:
+        return {"due": now + RELEARN_DELAY, "interval": 0, "ease": ease, "reps": 0, "lapses": state["lapses"] + 1}
+    reps = state["reps"] + 1
+    if reps == 1:
+        interval = 1
+    elif reps == 2:
+        interval = 6
+    else:
+        interval = round(state["interval"] * ease)
+    return {"due": now + interval * DAY, "interval": interval, "ease": ease, "reps": reps, "lapses": state["lapses"]}
+
+
+def describe_interval(state, now=None):
+    """下一次複習距今的簡短描述，如「10 分鐘」「6 天」"""
+    seconds = state["due"] - (time.time() if now is None else now)
+    if seconds < 3600:
+        return f"{max(1, round(seconds / 60))} 分钟"
+    if seconds < DAY:
+        return f"{round(seconds / 3600)} 小时"
+    return f"{round(seconds / DAY)} 天"
+
+
+class CardDeck:
+    """卡片庫與複習進度：每次操作使用獨立連接，可在多個會話 / 線程之間共享"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+
+    def _connect(self):
+        return connect(self.path, row_factory=sqlite3.Row)
+
+    # --- 卡片內容 ---
+    def get_card(self, deck, front):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM cards WHERE deck = ? AND front = ?",
+                               (deck, normalize_front(front))).fetchone()
+        return dict(row) if row else None
+
+    def add_card(self, deck, front, content, model=""):
+        """保存卡片並返回；同一詞條已存在時保留原有內容"""
+        self.add_cards(deck, [(front, content)], model)
+        return self.get_card(deck, front)
+
+    def add_cards(self, deck, items, model=""):
+        """批量保存 [(詞條, 內容)]，返回新增的卡片數"""
+        now = time.time()
+        rows = [(deck, normalize_front(front), content, model, now) for front, content in items
+                if normalize_front(front) and content]
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO cards (deck, front, content, model, created) VALUES (?, ?, ?, ?, ?)",
+                             rows)
+            return conn.total_changes - before
+
+    def missing(self, deck, fronts):
+        """尚未生成卡片的詞條（已規範化、去重，保持原順序）"""
+        fronts = list(dict.fromkeys(f for f in map(normalize_front, fronts) if f))
+        with self._connect() as conn:
+            existing = {r[0] for r in conn.execute("SELECT front FROM cards WHERE deck = ?", (deck,))}
+        return [f for f in fronts if f not in existing]
+
+    def deck_sizes(self):
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT deck, COUNT(*) FROM cards GROUP BY deck").fetchall())
+
+    # --- 複習進度 ---
+    def enroll(self, owner, card_id, now=None):
+        """把卡片加入用戶的複習計劃（立即到期）；已在計劃中時返回 False"""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO reviews (owner, card_id, deck, due, ease)"
+                " SELECT ?, id, deck, ?, ? FROM cards WHERE id = ?", (owner, now, DEFAULT_EASE, card_id))
+            return cur.rowcount > 0
+
+    def unseen(self, owner, deck):
+        """卡片庫中該用戶還沒有加入計劃的卡片數"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM cards c WHERE c.deck = ? AND NOT EXISTS"
+                " (SELECT 1 FROM reviews r WHERE r.owner = ? AND r.card_id = c.id)", (deck, owner)).fetchone()[0]
+
+    def enroll_new(self, owner, deck, limit=NEW_PER_DAY, now=None):
+        """從卡片庫（如批量預生成的卡片）按生成順序加入最多 limit 張新卡，返回加入的張數"""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO reviews (owner, card_id, deck, due, ease)"
+                " SELECT ?, c.id, c.deck, ?, ? FROM cards c WHERE c.deck = ? AND NOT EXISTS"
+                " (SELECT 1 FROM reviews r WHERE r.owner = ? AND r.card_id = c.id) ORDER BY c.id LIMIT ?",
+                (owner, now, DEFAULT_EASE, deck, owner, limit))
+            return cur.rowcount
+
+    def due(self, owner, deck, now=None, limit=20):
+        """到期的卡片（卡片內容 + 複習進度），最早到期的在前"""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT c.id, c.front, c.content, r.due, r.interval, r.ease, r.reps, r.lapses"
+                " FROM reviews r JOIN cards c ON c.id = r.card_id"
+                " WHERE r.owner = ? AND r.deck = ? AND r.due <= ? ORDER BY r.due LIMIT ?",
+                (owner, deck, now, limit)).fetchall()
+        return [dict(r) for r in rows]
+
+    def counts(self, owner, deck, now=None):
+        """返回 (到期張數, 計劃中的總張數)"""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            due, total = conn.execute(
+                "SELECT COALESCE(SUM(due <= ?), 0), COUNT(*) FROM reviews WHERE owner = ? AND deck = ?",
+                (now, owner, deck)).fetchone()
+        return due, total
+
+    def review(self, owner, card_id, quality, now=None):
+        """記錄一次自評並按 SM-2 安排下次複習，返回新的進度"""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            row = conn.execute("SELECT interval, ease, reps, lapses FROM reviews WHERE owner = ? AND card_id = ?",
+                               (owner, card_id)).fetchone()
+            if row is None:
+                raise KeyError(f"卡片 {card_id} 不在複習計劃中")
+            state = schedule(dict(row), quality, now)
+            conn.execute(
+                "UPDATE reviews SET due = ?, interval = ?, ease = ?, reps = ?, lapses = ?, last_review = ?"
+                " WHERE owner = ? AND card_id = ?",
+                (state["due"], state["interval"], state["ease"], state["reps"], state["lapses"], now, owner, card_id))
+        return state
+
+
+# --- 批量預生成 ---
+def _client():
+    if os.getenv("DSE_LLM_STUB", "") not in ("", "0"):
+        from stub_client import StubClient
+        return StubClient()
+    from google.genai import Client
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        sys.exit("請設置環境變量 GEMINI_API_KEY")
+    return Client(api_key=api_key)
+
+
+def _prompt(deck, front):
+    return get_prompt(deck, **{DECKS[deck][1]: front})
+
+
+async def _generate_online(client, model, deck, fronts, concurrency):
+    """並發調用模型，返回 {詞條: 內容}；失敗的詞條略過，下次運行時會重試"""
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+
+    async def one(front):
+        prompt = _prompt(deck, front)
+        async with semaphore:
+            try:
+                res = await client.aio.models.generate_content(
+                    model=model, contents=prompt.contents, config={"system_instruction": prompt.prefix})
+            except Exception as e:
+                print(f"  {front}：{type(e).__name__} {e}", file=sys.stderr)
+                return
+        if res.text:
+            results[front] = res.text
+    await asyncio.gather(*(one(f) for f in fronts))
+    return results
+
+
+def _submit_batch(client, model, deck, fronts):
+    requests = []
+    for front in fronts:
+        prompt = _prompt(deck, front)
+        requests.append({"contents": [{"role": "user", "parts": [{"text": c} for c in prompt.contents]}],
+                         "config": {"system_instruction": prompt.prefix}, "metadata": {"front": front}})
+    job = client.batches.create(model=model, src=requests, config={"display_name": f"dse-{deck}-cards"})
+    return job.name
+
+
+def _wait_batch(client, name, poll):
+    """等待批量任務結束，返回 {詞條: 內容}"""
+    while True:
+        job = client.batches.get(name=name)
+        state = getattr(job.state, "name", str(job.state))
+        if state in ("JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"):
+            break
+        print(f"  {name}：{state}，{poll} 秒後再查詢（可按 Ctrl-C 中斷，之後用 --job {name} 繼續）")
+        time.sleep(poll)
+    if state != "JOB_STATE_SUCCEEDED":
+        sys.exit(f"批量任務 {name} 結束狀態為 {state}：{job.error}")
+    results = {}
+    for item in job.dest.inlined_responses or []:
+        if item.response is not None and item.response.text and item.metadata:
+            results[item.metadata["front"]] = item.response.text
+    return results
+
+
+def pregen(deck_name, fronts, online=False, job=None, chunk=500, concurrency=8, poll=60, store=None):
+    """為尚未生成卡片的詞條批量生成卡片並寫入卡片庫，返回新增張數"""
+    store = store or CardDeck()
+    model = route(deck_name)[0][0]
+    client = _client()
+    if job:
+        results = _wait_batch(client, job, poll)
+        added = store.add_cards(deck_name, results.items(), model)
+        print(f"任務 {job}：新增 {added} 張")
+        return added
+    todo = store.missing(deck_name, fronts)
+    print(f"{DECKS[deck_name][0]}：{len(fronts)} 個詞條，{len(todo)} 個尚未生成，模型 {model}")
+    added = 0
+    for start in range(0, len(todo), chunk):
+        batch = todo[start:start + chunk]
+        if online or not hasattr(client, "batches"):
+            results = asyncio.run(_generate_online(client, model, deck_name, batch, concurrency))
+        else:
+            name = _submit_batch(client, model, deck_name, batch)
+            print(f"  已提交批量任務 {name}（{len(batch)} 個詞條）")
+            results = _wait_batch(client, name, poll)
+        added += store.add_cards(deck_name, results.items(), model)
+        print(f"  {start + len(batch)}/{len(todo)}：累計新增 {added} 張")
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("pregen", help="批量預生成卡片")
+    p.add_argument("deck", choices=list(DECKS))
+    p.add_argument("file", nargs="?", help="詞條列表（UTF-8，每行一個）")
+    p.add_argument("--online", action="store_true", help="直接並發調用，不使用 Batch API")
+    p.add_argument("--job", help="繼續等待之前提交的批量任務")
+    p.add_argument("--chunk", type=int, default=500, help="每個批量任務的詞條數")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--poll", type=int, default=60, help="查詢批量任務狀態的間隔（秒）")
+    sub.add_parser("stats", help="各卡組的卡片數")
+    args = parser.parse_args()
+    if args.command == "stats":
+        sizes = CardDeck().deck_sizes()
+        for deck, (label, _) in DECKS.items():
+            print(f"{deck:10s} {label:8s} {sizes.get(deck, 0):6d} 張")
+        return
+    if not args.file and not args.job:
+        parser.error("需要詞條列表文件或 --job")
+    fronts = []
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            fronts = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    pregen(args.deck, fronts, online=args.online, job=args.job, chunk=args.chunk, concurrency=args.concurrency,
+           poll=args.poll)
+
+
+if __name__ == "__main__":
+    main()
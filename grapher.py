@@ -0,0 +1,123 @@
+"""函數繪圖的數值部分：自適應取樣、多曲線 / 參數族的向量化求值。"""
+import itertools
+import math
+
+import numpy as np
+
+Y_LIMIT = 1000  # |y| 超過此值視為漸近線附近，不繪製
+POINT_BUDGET = 2000  # 每條曲線最多取樣點數，避免把大量點傳到瀏覽器
+OVERLAY_POINTS = 1000  # 多曲線疊加時共用的 x 網格點數
+MAX_FAMILY = 20  # 單個參數族最多展開的曲線數
+
+
+def evaluate(func, x_vals, *params):
+    """對 x 向量（及可廣播的參數數組）求值，返回實數 float 數組（無定義處為 NaN）"""
+    with np.errstate(all="ignore"):
+        y_vals = np.asarray(func(x_vals, *params))
+    if np.iscomplexobj(y_vals):
+        # 只保留實數部分有意義的點（如負數開平方等處為 NaN）
+        y_vals = np.where(np.abs(y_vals.imag) < 1e-12, y_vals.real, np.nan)
+    shape = np.broadcast_shapes(np.shape(x_vals), *(np.shape(p) for p in params))
+    y_vals = np.broadcast_to(y_vals, shape).astype(float)
+    return np.where(np.abs(y_vals) > Y_LIMIT, np.nan, y_vals)
+
+
+def parse_family(line):
+    """拆分一行輸入，如 'a*x^2 ; a = -2, -1, 1, 2' 或 'a*x^2 ; a = -2:2:0.5'。
+
+    返回 (表達式, ((參數名, (取值, ...)), ...))；沒有 ';' 時參數族為空。
+    """
+    expr, _, spec = line.partition(";")
+    families = []
+    for item in filter(None, (p.strip() for p in spec.split(";"))):
+        name, _, values = item.partition("=")
+        name, values = name.strip(), values.strip()
+        if not name.isidentifier() or not values:
+            raise ValueError(f"參數族格式有誤：{item}")
+        if ":" in values:
+            bounds = [float(v) for v in values.split(":")]
+            if len(bounds) > 3 or not all(map(math.isfinite, bounds)):
+                raise ValueError(f"參數族格式有誤：{item}")
+            start, stop, step = bounds if len(bounds) == 3 else bounds + [1.0]
+            if step <= 0 or stop < start:
+                raise ValueError(f"參數族範圍有誤（須 起點 ≤ 終點 且步長 > 0）：{item}")
+            # 先算出個數再展開，避免 a = 0:1e12 這類輸入在檢查上限前就分配巨大數組
+            span = (stop - start) / step + 1e-9
+            if span >= MAX_FAMILY:
+                raise ValueError(f"每個參數族最多展開 {MAX_FAMILY} 條曲線")
+            vals = start + step * np.arange(math.floor(span) + 1)
+        else:
+            vals = np.array([float(v) for v in values.split(",") if v.strip()])
+        families.append((name, tuple(float(f"{v:.6g}") for v in vals)))
+    if np.prod([len(vals) for _, vals in families]) > MAX_FAMILY:
+        raise ValueError(f"每個參數族最多展開 {MAX_FAMILY} 條曲線")
+    return expr.strip(), tuple(families)
+
+
+def evaluate_family(func, params, x_vals, families, scalars):
+    """一次向量化求出整個參數族。
+
+    params 為函數除 x 外的參數名；families 為 {參數: 取值序列}，各參數的取值做笛卡兒積後
+    沿第 0 軸排列（形狀 (K, 1)），與共用的 x 網格（形狀 (1, N)）廣播，一次得到 (K, N) 的結果。
+    scalars 為由滑桿控制的單值參數。返回 (y 矩陣, 每條曲線的標籤)。
+    """
+    names = [p for p in params if p in families]
+    combos = list(itertools.product(*(families[p] for p in names))) or [()]
+    columns = {p: np.array([c[i] for c in combos])[:, None] for i, p in enumerate(names)}
+    args = [columns[p] if p in columns else scalars.get(p, 1.0) for p in params]
+    y_vals = evaluate(func, x_vals[None, :], *args)
+    y_vals = np.broadcast_to(y_vals, (len(combos), x_vals.size))
+    labels = [", ".join(f"{p}={v:g}" for p, v in zip(names, c)) for c in combos]
+    return y_vals, labels
+
+
+def adaptive_sample(func, x_min, x_max, budget=POINT_BUDGET, initial=200, tol=5e-4, max_passes=12):
+    """在 [x_min, x_max] 上自適應取樣。
+
+    先均勻取 initial 個點，之後每一輪只在「中點偏離線性插值較大（曲率大）」或
+    「端點一側有定義、一側無定義（間斷）」的區間插入中點，總點數不超過 budget。
+    """
+    x_vals = np.linspace(x_min, x_max, initial)
+    y_vals = evaluate(func, x_vals)
+    finite = np.isfinite(y_vals)
+    scale = np.ptp(y_vals[finite]) if finite.sum() > 1 else 0.0
+    scale = scale if scale > 0 else 1.0
+    min_width = (x_max - x_min) * 1e-6
+    for _ in range(max_passes):
+        room = budget - len(x_vals)
+        if room <= 0:
+            break
+        x_mid = (x_vals[:-1] + x_vals[1:]) / 2
+        y_mid = evaluate(func, x_mid)
+        with np.errstate(invalid="ignore"):
+            err = np.abs(y_mid - (y_vals[:-1] + y_vals[1:]) / 2) / scale
+        left, right, mid = np.isfinite(y_vals[:-1]), np.isfinite(y_vals[1:]), np.isfinite(y_mid)
+        # 間斷處給最大優先級，保證漸近線與定義域邊界被細分
+        err = np.where((left != right) | (left & right & ~mid), np.inf, np.nan_to_num(err, nan=0.0))
+        err[np.diff(x_vals) < min_width] = 0.0
+        refine = np.flatnonzero(err > tol)
+        if refine.size == 0:
+            break
+        if refine.size > room:
+            refine = refine[np.argsort(err[refine])[::-1][:room]]
+        x_vals = np.insert(x_vals, refine + 1, x_mid[refine])
+        y_vals = np.insert(y_vals, refine + 1, y_mid[refine])
+    return _break_jumps(func, x_vals, y_vals, scale)
+
+
+def _break_jumps(func, x_vals, y_vals, scale):
+    """在真正的跳躍間斷處插入 NaN，避免 Plotly 把間斷兩側連成豎線。
+
+    陡峭但連續的區間中點值會落在兩端點之間；若中點仍貼近某一端，則視為間斷。
+    """
+    with np.errstate(invalid="ignore"):
+        jumps = np.flatnonzero(np.abs(np.diff(y_vals)) > 0.25 * scale)
+    if jumps.size == 0:
+        return x_vals, y_vals
+    x_gap = (x_vals[jumps] + x_vals[jumps + 1]) / 2
+    y_gap = evaluate(func, x_gap)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = (y_gap - y_vals[jumps]) / (y_vals[jumps + 1] - y_vals[jumps])
+    broken = ~((frac > 0.1) & (frac < 0.9))
+    jumps, x_gap = jumps[broken], x_gap[broken]
+    return np.insert(x_vals, jumps + 1, x_gap), np.insert(y_vals, jumps + 1, np.nan)
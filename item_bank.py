@@ -0,0 +1,304 @@
+"""自測題庫：題目預先編譯成 Arrow（Feather）列式文件並以內存映射打開；按 Rasch 模型（1PL IRT）用 Elo 規則
+在線更新學生能力與題目難度，選題時對候選題向量化計算，題庫和作答記錄增長後選題仍在毫秒以內。
+
+題目來源：data/content.json 的 quizzes，以及 data/items/*.jsonl（每行一題，字段與 quizzes 相同，可另加
+topic 課題、difficulty 難度 1-5，默認 3）。題庫寫到 .cache/item_bank/items.arrow（不壓縮，多個進程共享
+同一份頁緩存），題目文本只在顯示該題時才從 Arrow 列中取出；來源文件變化後下一次打開時自動重建。
+作答記錄、能力估計和題目難度的校準值保存在 SQLite（.cache/quiz.sqlite3）。
+
+用法：python item_bank.py build   # 預先編譯題庫
+     python item_bank.py stats   # 各科、各課題的題數與難度分佈
+"""
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from content_store import DEFAULT_CONTENT_PATH, QUIZ_FIELDS, ContentError
+from db import connect
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ITEMS_DIR = os.getenv("DSE_ITEMS_DIR", os.path.join(ROOT, "data", "items"))
+BANK_DIR = os.getenv("DSE_ITEM_BANK_DIR", os.path.join(".cache", "item_bank"))
+DEFAULT_DB_PATH = os.getenv("DSE_QUIZ_PATH", os.path.join(".cache", "quiz.sqlite3"))
+BANK_VERSION = 1
+
+TARGET_P = 0.7  # 選題目標答對率：難度略低於能力，學生大約七成答對
+TOP_K = 5  # 在最合適的幾道題中隨機選一道，避免同樣能力的學生總是拿到同一題
+K_USER, K_USER_MIN = 0.8, 0.2  # 能力的 Elo 步長：開始時大，作答多了逐步變小
+K_ITEM, K_ITEM_MIN = 0.4, 0.05  # 題目難度的步長
+
+
+def level_to_logit(level):
+    """難度 1-5 換算成 Rasch 模型的難度參數（logit，3 為 0）"""
+    return float(level) - 3.0
+
+
+def logit_to_level(b):
+    return int(min(5, max(1, round(b + 3.0))))
+
+
+def p_correct(theta, b):
+    """Rasch 模型：能力 theta 的學生答對難度 b 的題目的概率（b 可為數組）"""
+    return 1.0 / (1.0 + np.exp(np.subtract(b, theta)))
+
+
+def _k(attempts, start, floor):
+    return max(floor, start / (1 + attempts / 10))
+
+
+def elo_update(theta, b, correct, user_attempts=0, item_attempts=0):
+    """一次作答後的 (新能力, 新難度, 作答前的答對概率)"""
+    p = float(p_correct(theta, b))
+    surprise = (1.0 if correct else 0.0) - p
+    return (theta + _k(user_attempts, K_USER, K_USER_MIN) * surprise,
+            b - _k(item_attempts, K_ITEM, K_ITEM_MIN) * surprise, p)
+
+
+def select_item(theta, difficulty, candidates, seen=None, rng=None, target=TARGET_P, top_k=TOP_K):
+    """從 candidates（題目序號數組）中選下一題，返回題目序號；沒有候選題時返回 None。
+
+    目標難度為答對概率等於 target 的難度；取最接近目標的 top_k 道未答過的題，再隨機選一道。
+    seen 為題庫長度的布爾數組（已答過的題），候選題全部答過時允許重複。
+    """
+    if len(candidates) == 0:
+        return None
+    rng = rng or np.random.default_rng()
+    goal = theta - math.log(target / (1 - target))
+    distance = np.abs(difficulty[candidates] - goal)
+    if seen is not None:
+        fresh = ~seen[candidates]
+        if fresh.any():
+            distance = np.where(fresh, distance, np.inf)
+    k = min(top_k, len(candidates))
+    best = np.argpartition(distance, k - 1)[:k]
+    best = best[np.isfinite(distance[best])]
+    return int(candidates[rng.choice(best)])
+
+
+# --- 編譯 ---
+def _item_files(items_dir):
+    if not os.path.isdir(items_dir):
+        return []
+    return [os.path.join(items_dir, n) for n in sorted(os.listdir(items_dir)) if n.endswith(".jsonl")]
+
+
+def _fingerprint(items_dir, content_path):
+    """來源文件的路徑、大小和修改時間；任何變化都會觸發重建"""
+    h = hashlib.sha256(f"v{BANK_VERSION}".encode())
+    for path in _item_files(items_dir) + ([content_path] if os.path.exists(content_path) else []):
+        st = os.stat(path)
+        h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _check(item, where):
+    missing = [f for f in QUIZ_FIELDS if f not in item]
+    if missing:
+        raise ContentError(f"{where} 題目 {item.get('id', '?')} 缺少字段：{', '.join(missing)}")
+    if not 0 <= item["answer"] < len(item["options"]):
+        raise ContentError(f"{where} 題目 {item['id']} 的答案序號超出選項範圍")
+    if not 1 <= item.get("difficulty", 3) <= 5:
+        raise ContentError(f"{where} 題目 {item['id']} 的難度應為 1-5")
+
+
+def load_items(items_dir=ITEMS_DIR, content_path=DEFAULT_CONTENT_PATH):
+    """讀取並校驗全部題目"""
+    items = []
+    if os.path.exists(content_path):
+        with open(content_path, encoding="utf-8") as f:
+            for item in json.load(f).get("quizzes", []):
+                _check(item, os.path.basename(content_path))
+                items.append(item)
+    for path in _item_files(items_dir):
+        with open(path, encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                if line.strip():
+                    item = json.loads(line)
+                    _check(item, f"{os.path.basename(path)}:{lineno}")
+                    items.append(item)
+    seen = set()
+    for item in items:
+        if item["id"] in seen:
+            raise ContentError(f"重複的題目 id：{item['id']}")
+        seen.add(item["id"])
+    return items
+
+
+def build_bank(bank_dir=BANK_DIR, items_dir=ITEMS_DIR, content_path=DEFAULT_CONTENT_PATH):
+    """把題目編譯成 items.arrow（按科目、課題排序，同一科的題目連續存放），返回題數"""
+    import pandas as pd
+
+    items = load_items(items_dir, content_path)
+    df = pd.DataFrame({
+        "id": [i["id"] for i in items],
+        "subject": pd.Categorical([i["subject"] for i in items]),
+        "topic": pd.Categorical([i.get("topic", "") for i in items]),
+        "difficulty": np.array([level_to_logit(i.get("difficulty", 3)) for i in items], dtype=np.float32),
+        "question": [i["question"] for i in items],
+        "options": [list(i["options"]) for i in items],
+        "answer": np.array([i["answer"] for i in items], dtype=np.int8),
+    })
+    df = df.sort_values(["subject", "topic", "id"], kind="stable").reset_index(drop=True)
+    os.makedirs(bank_dir, exist_ok=True)
+    path = os.path.join(bank_dir, "items.arrow")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    # 不壓縮才能零拷貝地內存映射；先寫臨時文件再原子替換，已打開舊文件的進程不受影響
+    df.to_feather(tmp, compression="uncompressed")
+    os.replace(tmp, path)
+    meta = os.path.join(bank_dir, "meta.json")
+    with open(f"{meta}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": _fingerprint(items_dir, content_path), "items": len(df)}, f)
+    os.replace(f"{meta}.{os.getpid()}.tmp", meta)
+    return len(df)
+
+
+class ItemBank:
+    """只讀題庫：數值列（科目、課題、難度）轉成 numpy 數組用於選題，文本列留在內存映射的 Arrow 表中"""
+
+    def __init__(self, bank_dir=BANK_DIR):
+        import pyarrow.feather as feather
+
+        self.table = feather.read_table(os.path.join(bank_dir, "items.arrow"), memory_map=True)
+        with open(os.path.join(bank_dir, "meta.json"), encoding="utf-8") as f:
+            self.fingerprint = json.load(f)["fingerprint"]
+        subjects = self.table.column("subject").combine_chunks()
+        topics = self.table.column("topic").combine_chunks()
+        self.subject_names = subjects.dictionary.to_pylist()
+        self.topic_names = topics.dictionary.to_pylist()
+        self.subject_codes = subjects.indices.to_numpy(zero_copy_only=False)
+        self.topic_codes = topics.indices.to_numpy(zero_copy_only=False)
+        # 難度會在線校準，複製一份可寫的數組（每題 4 字節）
+        self.difficulty = self.table.column("difficulty").to_numpy().astype(np.float32)
+        self.ids = self.table.column("id").to_pylist()
+        self.positions = {item_id: pos for pos, item_id in enumerate(self.ids)}
+        # 每科、每個 (科目, 課題) 的題目序號，選題時只計算這些候選題
+        self._candidates = {}
+        for s, name in enumerate(self.subject_names):
+            idx = np.flatnonzero(self.subject_codes == s)
+            self._candidates[name, None] = idx
+            for t in np.unique(self.topic_codes[idx]):
+                self._candidates[name, self.topic_names[t]] = idx[self.topic_codes[idx] == t]
+
+    @classmethod
+    def open(cls, bank_dir=BANK_DIR, items_dir=ITEMS_DIR, content_path=DEFAULT_CONTENT_PATH):
+        """打開題庫；不存在或來源已變化時先重建"""
+        try:
+            with open(os.path.join(bank_dir, "meta.json"), encoding="utf-8") as f:
+                fresh = json.load(f)["fingerprint"] == _fingerprint(items_dir, content_path)
+        except (OSError, ValueError, KeyError):
+            fresh = False
+        if not fresh:
+            build_bank(bank_dir, items_dir, content_path)
+        return cls(bank_dir)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def topics(self, subject):
+        return sorted(t for s, t in self._candidates if s == subject and t)
+
+    def candidates(self, subject, topic=None):
+        return self._candidates.get((subject, topic), np.array([], dtype=np.int64))
+
+    def item(self, pos):
+        """取出一道題的全部字段"""
+        row = {name: self.table.column(name)[pos].as_py() for name in ("id", "subject", "topic", "question",
+                                                                        "options", "answer")}
+        row["difficulty"] = float(self.difficulty[pos])
+        return row
+
+    def apply_calibration(self, calibration):
+        """用作答記錄校準過的難度 {題目 id: 難度} 覆蓋編譯時的初始難度"""
+        for item_id, b in calibration.items():
+            pos = self.positions.get(item_id)
+            if pos is not None:
+                self.difficulty[pos] = b
+
+
+# --- 作答記錄 ---
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS abilities ("
+    " owner TEXT NOT NULL, subject TEXT NOT NULL, theta REAL NOT NULL, attempts INTEGER NOT NULL,"
+    " PRIMARY KEY (owner, subject))",
+    "CREATE TABLE IF NOT EXISTS responses ("
+    " id INTEGER PRIMARY KEY, owner TEXT NOT NULL, subject TEXT NOT NULL, item_id TEXT NOT NULL,"
+    " correct INTEGER NOT NULL, p REAL NOT NULL, ts REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_responses_owner ON responses(owner, subject)",
+    "CREATE TABLE IF NOT EXISTS item_stats ("
+    " item_id TEXT PRIMARY KEY, difficulty REAL NOT NULL, attempts INTEGER NOT NULL)",
+]
+
+
+class QuizStore:
+    """能力估計、作答記錄和題目難度校準；每次操作使用獨立連接，可在多個會話 / 線程之間共享"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+
+    def _connect(self):
+        return connect(self.path)
+
+    def ability(self, owner, subject):
+        """返回 (能力估計, 已作答題數)；沒有記錄時為 (0, 0)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT theta, attempts FROM abilities WHERE owner = ? AND subject = ?",
+                               (owner, subject)).fetchone()
+        return row if row else (0.0, 0)
+
+    def answered(self, owner, subject):
+        """該用戶在該科答過的題目 id"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT item_id FROM responses WHERE owner = ? AND subject = ?",
+                                (owner, subject)).fetchall()
+        return [r[0] for r in rows]
+
+    def calibration(self):
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT item_id, difficulty FROM item_stats").fetchall())
+
+    def record(self, owner, bank, pos, correct):
+        """記錄一次作答，同時更新能力與題目難度（寫入 SQLite 並更新 bank 中的難度），返回新的能力估計"""
+        item_id, subject = bank.ids[pos], bank.subject_names[bank.subject_codes[pos]]
+        with self._connect() as conn:
+            # 讀取與寫回在同一個寫事務中，同時作答的兩次更新不會互相覆蓋（與 job_queue 領取任務相同）
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT theta, attempts FROM abilities WHERE owner = ? AND subject = ?",
+                               (owner, subject)).fetchone()
+            theta, user_attempts = row if row else (0.0, 0)
+            # 題目難度以數據庫為準：bank 中的值可能已被其他進程的作答更新過
+            row = conn.execute("SELECT difficulty, attempts FROM item_stats WHERE item_id = ?", (item_id,)).fetchone()
+            b, item_attempts = row if row else (float(bank.difficulty[pos]), 0)
+            theta, b, p = elo_update(theta, b, correct, user_attempts, item_attempts)
+            conn.execute("INSERT OR REPLACE INTO abilities (owner, subject, theta, attempts) VALUES (?, ?, ?, ?)",
+                         (owner, subject, theta, user_attempts + 1))
+            conn.execute("INSERT OR REPLACE INTO item_stats (item_id, difficulty, attempts) VALUES (?, ?, ?)",
+                         (item_id, b, item_attempts + 1))
+            conn.execute("INSERT INTO responses (owner, subject, item_id, correct, p, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                         (owner, subject, item_id, int(correct), p, time.time()))
+        bank.difficulty[pos] = b
+        return theta
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        print(f"已編譯題庫：{build_bank()} 道題")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "stats":
+        bank = ItemBank.open()
+        for subject in bank.subject_names:
+            for topic in [None] + bank.topics(subject):
+                idx = bank.candidates(subject, topic)
+                levels = np.bincount([logit_to_level(b) for b in bank.difficulty[idx]], minlength=6)[1:]
+                print(f"{subject:5s} {topic or '（全部）':16s} {len(idx):6d} 題  難度 1-5：{' / '.join(map(str, levels))}")
+    else:
+        sys.exit(__doc__)
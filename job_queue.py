@@ -0,0 +1,282 @@
+"""後台任務隊列：耗時的 AI 操作（作文批改、真題評分等）提交為任務，由工作線程池執行，不受頁面 rerun、
+切換功能或科目影響，已經發出的請求不會白白付費。
+
+任務保存在 SQLite（.cache/jobs.sqlite3）：參數、狀態和結果都落盤並記在用戶名下，之後可以按任務 ID
+或按功能取回結果，不必重新生成；同一用戶重複提交相同參數的任務時直接返回已有任務（未結束的，
+或 DSE_JOB_REUSE_TTL 秒內完成的），超過這個時間或上次失敗、已取消時重新執行。
+工作線程按租約領取任務：進程崩潰或重啟後，租約過期的任務會被重新領取（可以是另一個進程的工作線程）。
+任務參數和結果須可 JSON 序列化。
+
+    DSE_JOBS_PATH=路徑     任務庫，默認 .cache/jobs.sqlite3
+    DSE_JOB_WORKERS=4      每個進程的工作線程數
+    DSE_JOB_TTL=604800     已結束的任務保留秒數（默認 7 天）
+    DSE_JOB_REUSE_TTL=86400  重複提交時沿用已完成結果的秒數（默認 1 天），0 表示總是重新執行
+
+用法：python job_queue.py stats   # 各狀態、各功能的任務數與平均耗時
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+from db import connect
+
+DEFAULT_DB_PATH = os.getenv("DSE_JOBS_PATH", os.path.join(".cache", "jobs.sqlite3"))
+WORKERS = int(os.getenv("DSE_JOB_WORKERS", 4))
+JOB_TTL = int(os.getenv("DSE_JOB_TTL", 7 * 86400))
+REUSE_TTL = int(os.getenv("DSE_JOB_REUSE_TTL", 86400))
+LEASE = 600  # 領取後多少秒內未完成視為工作線程已退出，任務重新排隊
+MAX_ATTEMPTS = 2
+POLL_INTERVAL = 2.0  # 沒有新任務通知時，隔多久檢查一次其他進程提交的任務和過期租約
+
+PENDING = ("queued", "running")
+STATE_LABELS = {"queued": "排队中", "running": "处理中", "done": "已完成", "error": "失败", "cancelled": "已取消"}
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS jobs ("
+    " id TEXT PRIMARY KEY, owner TEXT NOT NULL, kind TEXT NOT NULL, feature TEXT NOT NULL DEFAULT '',"
+    " label TEXT NOT NULL DEFAULT '', dedupe_key TEXT NOT NULL, payload TEXT NOT NULL,"
+    " state TEXT NOT NULL, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+    " created REAL NOT NULL, run_after REAL NOT NULL, started REAL, finished REAL, lease_until REAL)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_owner ON jobs(owner, feature, created)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(owner, dedupe_key)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, run_after)",
+]
+_COLUMNS = ("id", "owner", "kind", "feature", "label", "state", "result", "error", "attempts", "created",
+            "started", "finished")
+
+
+def dedupe_key(kind, payload):
+    return hashlib.sha256(json.dumps([kind, payload], sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _row(row):
+    job = dict(zip(_COLUMNS, row))
+    job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+    return job
+
+
+class JobQueue:
+    """持久化任務隊列與進程內的工作線程池。
+
+    handlers 為 {任務類型: 函數(payload) -> 結果}；函數拋出帶 retry_after 屬性的異常（如 DispatcherBusy）時，
+    任務在該秒數後重新排隊，其他異常記為失敗。每次操作使用獨立連接，可在多個會話 / 線程之間共享。
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, handlers=None, workers=WORKERS, lease=LEASE,
+                 max_attempts=MAX_ATTEMPTS, poll_interval=POLL_INTERVAL, reuse_ttl=REUSE_TTL):
+        self.path = path
+        self.reuse_ttl = reuse_ttl
+        self.handlers = dict(handlers or {})
+        self.workers = workers
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+
+    def _connect(self):
+        return connect(self.path)
+
+    def register(self, kind, handler):
+        """註冊（或替換）某類任務的處理函數"""
+        with self._lock:
+            self.handlers[kind] = handler
+
+    # ---- 提交與查詢（在 Streamlit 腳本線程中調用）----
+    def submit(self, owner, kind, payload, feature="", label=""):
+        """提交任務並返回任務 ID；該用戶已有相同參數、未結束或 reuse_ttl 秒內完成的任務時直接返回其 ID，不再重複執行"""
+        if kind not in self.handlers:
+            raise ValueError(f"未知的任務類型：{kind}")
+        key = dedupe_key(kind, payload)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE owner = ? AND dedupe_key = ?"
+                " AND (state IN ('queued', 'running') OR (state = 'done' AND finished >= ?))"
+                " ORDER BY created DESC LIMIT 1", (owner, key, now - self.reuse_ttl),
+            ).fetchone()
+            if row:
+                return row[0]
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, owner, kind, feature, label, dedupe_key, payload, state, created, run_after)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, owner, kind, feature, label, key, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+        self.start()
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id, owner=None):
+        """返回任務信息（dict）；不存在或不屬於 owner 時返回 None"""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or (owner is not None and row[1] != owner):
+            return None
+        return _row(row)
+
+    def latest(self, owner, feature):
+        """該用戶在該功能下最近提交的任務，沒有時返回 None"""
+        jobs = self.recent(owner, feature, limit=1)
+        return jobs[0] if jobs else None
+
+    def recent(self, owner, feature=None, limit=20):
+        """該用戶最近的任務，新的在前"""
+        where, args = "owner = ?", [owner]
+        if feature:
+            where += " AND feature = ?"
+            args.append(feature)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE {where} ORDER BY created DESC LIMIT ?", args + [limit],
+            ).fetchall()
+        return [_row(r) for r in rows]
+
+    def cancel(self, job_id, owner):
+        """取消尚未開始的任務；已在執行的任務無法中止，返回是否取消成功"""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET state = 'cancelled', finished = ? WHERE id = ? AND owner = ? AND state = 'queued'",
+                (time.time(), job_id, owner),
+            )
+            return cur.rowcount > 0
+
+    def position(self, job_id):
+        """排隊中的任務前面還有幾個任務（含正在執行的）"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT created FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return 0
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state IN ('queued', 'running') AND created < ?", (row[0],),
+            ).fetchone()[0]
+
+    def pending(self):
+        """排隊中或執行中（含租約已過期、待重新領取）的任務數"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE state IN ('queued', 'running')").fetchone()[0]
+
+    def stats(self):
+        """{(狀態, 功能): (任務數, 平均耗時秒數或 None)}"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT state, feature, COUNT(*), AVG(finished - started) FROM jobs GROUP BY state, feature",
+            ).fetchall()
+        return {(state, feature): (count, avg) for state, feature, count, avg in rows}
+
+    def purge(self, ttl=JOB_TTL):
+        """刪除結束超過 ttl 秒的任務"""
+        with self._connect() as conn:
+            cur = conn.execute("DELETE FROM jobs WHERE state NOT IN ('queued', 'running') AND finished < ?",
+                               (time.time() - ttl,))
+            return cur.rowcount
+
+    # ---- 工作線程 ----
+    def start(self):
+        """啟動工作線程（只啟動一次）；提交任務時也會自動調用"""
+        with self._lock:
+            if self._threads:
+                return
+            self.purge()
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _claim(self):
+        """領取一個到期的任務：排隊中的，或租約已過期（執行它的進程已退出）的；沒有時返回 None"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # 多次執行都沒能完成的任務不再重試
+            conn.execute(
+                "UPDATE jobs SET state = 'error', error = '任务多次执行未完成', finished = ?"
+                " WHERE state = 'running' AND lease_until < ? AND attempts >= ?", (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id, kind, payload FROM jobs WHERE (state = 'queued' AND run_after <= ?)"
+                " OR (state = 'running' AND lease_until < ?) ORDER BY created LIMIT 1", (now, now),
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET state = 'running', started = ?, lease_until = ?, attempts = attempts + 1"
+                    " WHERE id = ?", (now, now + self.lease, row[0]),
+                )
+        return row
+
+    def _finish(self, job_id, state, result=None, error=None, run_after=None):
+        with self._connect() as conn:
+            if run_after is not None:
+                conn.execute("UPDATE jobs SET state = 'queued', run_after = ?, attempts = attempts - 1 WHERE id = ?",
+                             (run_after, job_id))
+            else:
+                conn.execute(
+                    "UPDATE jobs SET state = ?, result = ?, error = ?, finished = ?, lease_until = NULL WHERE id = ?",
+                    (state, None if result is None else json.dumps(result, ensure_ascii=False), error, time.time(),
+                     job_id),
+                )
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+            except sqlite3.OperationalError:
+                # 其他進程正在寫入，稍後再試
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            job_id, kind, payload = job
+            handler = self.handlers.get(kind)
+            if handler is None:
+                # 另一個進程提交的、本進程不認識的任務類型：放回隊列
+                self._finish(job_id, "queued", run_after=time.time() + self.poll_interval)
+                continue
+            try:
+                result = handler(json.loads(payload))
+            except Exception as e:
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after is not None:
+                    self._finish(job_id, "queued", run_after=time.time() + retry_after)
+                else:
+                    self._finish(job_id, "error", error=f"{type(e).__name__}: {e}")
+                continue
+            self._finish(job_id, "done", result=result)
+
+
+def main():
+    if sys.argv[1:] != ["stats"]:
+        sys.exit(__doc__.strip().splitlines()[-1])
+    queue = JobQueue()
+    stats = queue.stats()
+    if not stats:
+        print("没有任务")
+        return
+    print(f"{'状态':<8}{'功能':<16}{'任务数':>8}{'平均耗时':>10}")
+    for (state, feature), (count, avg) in sorted(stats.items()):
+        print(f"{STATE_LABELS.get(state, state):<8}{feature or '—':<16}{count:>8}"
+              f"{'' if avg is None else f'{avg:.1f}s':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""AI 回答的磁盘缓存（SQLite），按内容寻址，可在多个 Streamlit 会话 / 进程之间共享。"""
+import hashlib
+import json
+import os
+import time
+
+from db import connect
+
+DEFAULT_CACHE_PATH = os.getenv("DSE_LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+DEFAULT_TTL = int(os.getenv("DSE_LLM_CACHE_TTL", 7 * 24 * 3600))  # 默认保留 7 天
+DEFAULT_MAX_ENTRIES = int(os.getenv("DSE_LLM_CACHE_MAX_ENTRIES", 5000))
+
+
+def _normalize(obj):
+    """将 contents / config 转为稳定、可 JSON 序列化的结构（图片等二进制只保留哈希）"""
+    if obj is None or isinstance(obj, (bool, int, float)):
+        return obj
+    if isinstance(obj, str):
+        # 去掉首尾空白并统一换行，避免因复制粘贴造成的缓存未命中
+        return obj.replace("\r\n", "\n").strip()
+    if isinstance(obj, (bytes, bytearray)):
+        return {"sha256": hashlib.sha256(obj).hexdigest()}
+    if isinstance(obj, dict):
+        return {str(k): _normalize(v) for k, v in sorted(obj.items()) if v is not None}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(v) for v in obj]
+    if hasattr(obj, "model_dump"):  # google.genai.types 中的 pydantic 对象（Part、Config 等）
+        return _normalize(obj.model_dump(exclude_none=True))
+    return repr(obj)
+
+
+def make_key(model, contents, config=None):
+    """根据 (模型, 规范化后的内容, 配置) 计算缓存键"""
+    payload = json.dumps([model, _normalize(contents), _normalize(config)], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedResponse:
+    """缓存命中时返回的轻量响应对象，与 SDK 响应一样提供 .text"""
+
+    def __init__(self, text):
+        self.text = text
+        self.from_cache = True
+
+
+class ResponseCache:
+    """SQLite 响应缓存：TTL 过期 + 按最近访问时间（LRU）淘汰"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # 允许多进程并发读写
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, text TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)")
+
+    def _connect(self):
+        return connect(self.path)
+
+    def get(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT text, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key, text, model=None):
+        if not text:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, text, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, model, text, now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.ttl:
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
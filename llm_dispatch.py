@@ -0,0 +1,214 @@
+"""進程級 AI 請求調度器：每個模型限制並發、相同請求合併（single-flight）、排隊上限與 429/5xx 重試。
+
+調度器在後台線程中運行一個 asyncio 事件循環，Streamlit 腳本線程通過同步接口提交請求。
+generate / generate_stream 可以是 SDK 的 client.aio.models 方法，也可以是本地測試用的普通函數。
+"""
+import asyncio
+import functools
+import inspect
+import math
+import os
+import queue
+import random
+import threading
+import time
+
+_DONE = object()
+STALL_TIMEOUT = float(os.getenv("DSE_LLM_STALL_TIMEOUT", 60))  # 流式回答兩個片段之間的最長等待（秒）
+
+
+class DispatcherBusy(Exception):
+    """排隊請求過多時拋出，retry_after 為建議的重試等待秒數"""
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"AI 服務繁忙，請 {retry_after} 秒後重試")
+
+
+def is_retryable(exc):
+    """429（限流）與 5xx（服務端錯誤）可以重試，其餘錯誤直接返回給用戶"""
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return isinstance(code, int) and (code == 429 or 500 <= code < 600)
+
+
+class LLMDispatcher:
+    def __init__(self, generate, generate_stream=None, max_concurrency=None, max_queue=None,
+                 max_retries=3, base_delay=1.0, model_concurrency=None):
+        self._generate = generate
+        self._generate_stream = generate_stream
+        self.max_concurrency = max_concurrency or int(os.getenv("DSE_LLM_CONCURRENCY", 4))
+        self.max_queue = max_queue or int(os.getenv("DSE_LLM_MAX_QUEUE", 32))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.model_concurrency = model_concurrency or {}
+        self._semaphores = {}  # model -> asyncio.Semaphore，只在事件循環線程中訪問
+        self._inflight = {}  # 請求鍵 -> {future, waiters}：進行中的請求及等待它的調用方數，用於合併相同請求
+        self._pending = 0  # 已接納但未完成的請求數（含正在執行的）
+        self._avg_latency = 5.0  # 單次調用耗時的滑動平均，用於估算重試等待時間
+        self._lock = threading.RLock()  # 已完成的 Future 會在 add_done_callback 時立即回調，需可重入
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-dispatcher", daemon=True)
+        self._thread.start()
+
+    # ---- 同步接口（在 Streamlit 腳本線程中調用）----
+    def generate(self, key, model, contents, timeout=None, **kwargs):
+        """提交一次非流式請求並阻塞等待結果；key 相同的進行中請求只會調用一次上游。
+
+        超過 timeout 秒仍未完成時拋出 TimeoutError；超時只結束本調用方的等待，
+        所有等待同一請求的調用方都放棄後才取消上游請求。
+        """
+        with self._lock:
+            entry = self._inflight.get(key) if key else None
+            if entry is None:
+                self._admit()
+                fut = asyncio.run_coroutine_threadsafe(self._run(model, contents, kwargs), self._loop)
+                entry = {"future": fut, "waiters": 0}
+                if key:
+                    self._inflight[key] = entry
+                    fut.add_done_callback(functools.partial(self._forget, key, entry))
+            entry["waiters"] += 1
+            fut = entry["future"]
+        try:
+            return fut.result(timeout)
+        except TimeoutError:
+            if fut.done():
+                raise  # 上游自身拋出的超時
+            with self._lock:
+                entry["waiters"] -= 1
+                abandoned = entry["waiters"] == 0
+                if abandoned and key and self._inflight.get(key) is entry:
+                    # 之後的相同請求重新發起，而不是合併到已取消的請求上
+                    del self._inflight[key]
+            if abandoned:
+                fut.cancel()
+            raise TimeoutError(f"{model} 超過 {timeout:g} 秒未完成") from None
+
+    def generate_stream(self, model, contents, first_chunk_timeout=None, chunk_timeout=None, **kwargs):
+        """提交一次流式請求，逐個返回回答片段。
+
+        首個片段超過 first_chunk_timeout 秒未到達、或之後兩個片段之間超過 chunk_timeout 秒（默認 STALL_TIMEOUT）
+        時拋出 TimeoutError 並取消上游請求，卡住的流不會一直佔用並發名額。
+        """
+        chunk_timeout = chunk_timeout or STALL_TIMEOUT
+        with self._lock:
+            self._admit()
+        chunks = queue.Queue()
+        fut = asyncio.run_coroutine_threadsafe(self._run_stream(model, contents, kwargs, chunks), self._loop)
+        try:
+            try:
+                item = chunks.get(timeout=first_chunk_timeout)
+            except queue.Empty:
+                raise TimeoutError(f"{model} 超過 {first_chunk_timeout:g} 秒未開始回答") from None
+            while True:
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+                try:
+                    item = chunks.get(timeout=chunk_timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"{model} 超過 {chunk_timeout:g} 秒沒有新的片段") from None
+        finally:
+            # 調用方提前停止讀取（例如頁面 rerun）或超時時取消上游請求
+            fut.cancel()
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "inflight": len(self._inflight),
+                    "avg_latency": round(self._avg_latency, 2)}
+
+    # ---- 內部實現 ----
+    def _admit(self):
+        if self._pending >= self.max_queue:
+            raise DispatcherBusy(self._retry_after())
+        self._pending += 1
+
+    def _retry_after(self):
+        waves = self._pending / max(self.max_concurrency, 1)
+        return max(1, math.ceil(waves * self._avg_latency))
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _forget(self, key, entry, fut):
+        with self._lock:
+            if self._inflight.get(key) is entry:
+                del self._inflight[key]
+
+    def _semaphore(self, model):
+        if model not in self._semaphores:
+            limit = self.model_concurrency.get(model, self.max_concurrency)
+            self._semaphores[model] = asyncio.Semaphore(limit)
+        return self._semaphores[model]
+
+    def _backoff(self, attempt):
+        # 指數退避 + 隨機抖動，避免同一批請求同時重試
+        return self.base_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def _record_latency(self, started):
+        self._avg_latency = 0.8 * self._avg_latency + 0.2 * (time.monotonic() - started)
+
+    async def _call(self, fn, **kwargs):
+        if inspect.iscoroutinefunction(fn):
+            return await fn(**kwargs)
+        # 同步函數放到線程池中執行，避免阻塞事件循環
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, **kwargs))
+
+    async def _iterate(self, fn, **kwargs):
+        if inspect.iscoroutinefunction(fn) or inspect.isasyncgenfunction(fn):
+            it = fn(**kwargs)
+            if inspect.isawaitable(it):
+                it = await it
+            async for chunk in it:
+                yield chunk
+            return
+        loop = asyncio.get_running_loop()
+        it = iter(await loop.run_in_executor(None, functools.partial(fn, **kwargs)))
+        while True:
+            chunk = await loop.run_in_executor(None, next, it, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+
+    async def _run(self, model, contents, kwargs):
+        try:
+            async with self._semaphore(model):
+                for attempt in range(self.max_retries + 1):
+                    started = time.monotonic()
+                    try:
+                        res = await self._call(self._generate, model=model, contents=contents, **kwargs)
+                        self._record_latency(started)
+                        return res
+                    except Exception as e:
+                        if attempt >= self.max_retries or not is_retryable(e):
+                            raise
+                    await asyncio.sleep(self._backoff(attempt))
+        finally:
+            self._release()
+
+    async def _run_stream(self, model, contents, kwargs, chunks):
+        try:
+            async with self._semaphore(model):
+                for attempt in range(self.max_retries + 1):
+                    started = time.monotonic()
+                    received = False
+                    try:
+                        async for chunk in self._iterate(self._generate_stream, model=model, contents=contents, **kwargs):
+                            received = True
+                            chunks.put(chunk)
+                        self._record_latency(started)
+                        break
+                    except Exception as e:
+                        # 已經輸出過片段的請求不能重試，否則用戶會看到重複內容
+                        if received or attempt >= self.max_retries or not is_retryable(e):
+                            raise
+                    await asyncio.sleep(self._backoff(attempt))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            self._release()
+            chunks.put(_DONE)
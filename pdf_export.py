@@ -0,0 +1,516 @@
+"""PDF 報告導出：批改報告、分步解答、錯題本、整班批量批改結果、函數圖和統計圖。
+
+Report 只收集內容（標題、段落、表格、Plotly 圖表），排版在 render_pdf() 中用 fpdf2 完成；
+ReportWorker 在後台線程中排版並寫入 .cache/reports/，頁面只輪詢進度，幾百頁的整班報告也不會卡住會話。
+
+中文字體：DSE_PDF_FONT 指定的字體，否則依次查找 data/fonts/ 與常見的系統中文字體（.ttf / .otf / .ttc）。
+源字體（如 Noto Sans CJK，約 20 MB）第一次使用時裁剪成常用字子集並緩存在 .cache/fonts/，之後的報告
+只加載這個子集；報告用到子集外的字時，把這些字併入子集再生成一次。
+
+圖表：安裝了 kaleido（及其所需的 Chrome）時用 Plotly 官方引擎轉成 PNG，否則用 Pillow 畫簡化版
+（折線、柱形、箱形圖）。
+
+    python pdf_export.py   # 查找字體並預先生成子集緩存（部署時執行一次）
+"""
+import glob
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FONT_DIR = os.path.join(ROOT, "data", "fonts")
+FONT_CACHE_DIR = os.getenv("DSE_PDF_FONT_CACHE", os.path.join(ROOT, ".cache", "fonts"))
+REPORT_DIR = os.getenv("DSE_REPORT_DIR", os.path.join(".cache", "reports"))
+REPORT_TTL = 24 * 3600  # 生成的 PDF 保留的秒數
+
+# 常見的系統中文字體（Debian fonts-noto-cjk / fonts-wqy-microhei、macOS、Windows）
+SYSTEM_FONTS = [
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/STHeiti Light.ttc",
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/simhei.ttf",
+]
+
+# Plotly 默認配色
+COLORWAY = ["#636efa", "#EF553B", "#00cc96", "#ab63fa", "#FFA15A", "#19d3f3", "#FF6692", "#B6E880", "#FF97FF",
+            "#FECB52"]
+
+_font_lock = threading.Lock()
+_kaleido_failed = False
+
+
+# --- 字體 ---
+def find_font():
+    """返回 (源字體路徑, 字體集合中的序號)"""
+    index = int(os.getenv("DSE_PDF_FONT_INDEX", 0))
+    path = os.getenv("DSE_PDF_FONT")
+    if path:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"DSE_PDF_FONT 指向的字體不存在：{path}")
+        return path, index
+    for path in sorted(glob.glob(os.path.join(FONT_DIR, "*.[ot]t[fc]"))) + SYSTEM_FONTS:
+        if os.path.exists(path):
+            return path, index
+    raise FileNotFoundError("找不到中文字體：請把 .ttf / .otf / .ttc 字體放到 data/fonts/，或設置 DSE_PDF_FONT")
+
+
+def _base_chars():
+    """子集默認包含的字符：ASCII、Latin-1、常用標點與全角符號、GB2312 漢字和 Big5 常用字"""
+    ranges = [(0x20, 0x7f), (0xa0, 0x100), (0x2000, 0x2070), (0x2190, 0x2200), (0x2200, 0x2300), (0x2460, 0x24ff),
+              (0x25a0, 0x2600), (0x3000, 0x3040), (0xff00, 0xfff0)]
+    chars = {chr(cp) for lo, hi in ranges for cp in range(lo, hi)}
+    for cp in range(0x4e00, 0xa000):
+        c = chr(cp)
+        try:
+            c.encode("gb2312")
+            chars.add(c)
+            continue
+        except UnicodeEncodeError:
+            pass
+        try:
+            # Big5 常用字（A440-C67E），繁體報告所需的字基本都在這裡
+            if c.encode("big5") < b"\xc6\x7f":
+                chars.add(c)
+        except UnicodeEncodeError:
+            pass
+    return chars
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def cjk_font(chars=(), source=None):
+    """返回 (子集字體路徑, 子集覆蓋的字符)，保證覆蓋 chars 中源字體有的字。
+
+    子集按源字體（路徑、大小、修改時間、序號）緩存：第一次生成後直接使用，只在報告用到
+    子集外的字時重新生成；源字體中沒有的字（如 emoji）記錄下來，之後不再為它們讀取源字體。
+    """
+    path, index = source or find_font()
+    stat = os.stat(path)
+    key = hashlib.sha256(f"{os.path.abspath(path)}|{index}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()
+    base = os.path.join(FONT_CACHE_DIR, key[:16])
+    font_path, meta_path = base + ".ttf", base + ".json"
+    wanted = {c for c in chars if not c.isspace()}
+    with _font_lock:
+        meta = {"chars": "", "absent": ""}
+        if os.path.exists(font_path) and os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        covered, absent = set(meta["chars"]), set(meta["absent"])
+        missing = wanted - covered - absent
+        if covered and not missing:
+            return font_path, covered
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+
+        font = TTFont(path, fontNumber=index, lazy=False)
+        cmap = {chr(cp) for cp in font.getBestCmap()}
+        absent |= missing - cmap
+        new_covered = (covered or _base_chars() & cmap) | (missing & cmap)
+        if new_covered != covered:
+            options = subset.Options()
+            options.notdef_outline = True
+            subsetter = subset.Subsetter(options)
+            subsetter.populate(unicodes=[ord(c) for c in new_covered])
+            subsetter.subset(font)
+            os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+            buf = io.BytesIO()
+            font.save(buf)
+            _write_atomic(font_path, buf.getvalue())
+        meta = {"source": path, "chars": "".join(sorted(new_covered)), "absent": "".join(sorted(absent))}
+        _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        return font_path, new_covered
+
+
+# --- 圖表 ---
+def _floats(values):
+    import numpy as np
+    if values is None:
+        return np.array([])
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _nice_ticks(lo, hi, n=6):
+    span = hi - lo
+    step = 10 ** math.floor(math.log10(span / n))
+    for m in (1, 2, 5, 10):
+        if span / (step * m) <= n:
+            step *= m
+            break
+    start = math.ceil(lo / step) * step
+    return [start + i * step for i in range(int((hi - start) / step + 1e-9) + 1)]
+
+
+def _color(trace, i):
+    for attr in ("line", "marker"):
+        color = getattr(getattr(trace, attr, None), "color", None)
+        if isinstance(color, str):
+            return color
+    return COLORWAY[i % len(COLORWAY)]
+
+
+def _draw_figure(fig, font_path, width, height, scale):
+    """用 Pillow 畫出圖表的簡化版：Scatter 折線、Bar 柱形、Box 箱形圖，以及坐標軸、標題和圖例"""
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont
+
+    W, H = width * scale, height * scale
+    img = Image.new("RGB", (W, H), "white")
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.truetype(font_path, 11 * scale)
+    title_font = ImageFont.truetype(font_path, 15 * scale)
+    left, right, top, bottom = 70 * scale, W - 20 * scale, 50 * scale, H - 50 * scale
+
+    # 收集數據並確定坐標範圍
+    series, xs, ys = [], [], []
+    for i, trace in enumerate(fig.data):
+        color = _color(trace, i)
+        if trace.type == "scatter":
+            x, y = _floats(trace.x), _floats(trace.y)
+            series.append(("line", x, y, color, trace.name))
+            xs.append(x), ys.append(y)
+        elif trace.type == "bar":
+            x, y = _floats(trace.x), _floats(trace.y)
+            if trace.width is None or np.ndim(trace.width) == 0:
+                w = np.full(len(x), trace.width or 0.8 * (np.min(np.diff(x)) if len(x) > 1 else 1.0))
+            else:
+                w = _floats(trace.width)
+            series.append(("bar", x, y, color, w))
+            xs.append(np.concatenate([x - w / 2, x + w / 2])), ys.append(np.append(y, 0))
+        elif trace.type == "box":
+            if trace.q1 is not None:
+                stats = [_floats(getattr(trace, k))[0] for k in ("lowerfence", "q1", "median", "q3", "upperfence")]
+            else:
+                values = _floats(trace.y)
+                values = values[np.isfinite(values)]
+                stats = list(np.percentile(values, [0, 25, 50, 75, 100])) if len(values) else [0] * 5
+            series.append(("box", np.array([len(series)]), np.array(stats), color, trace.name))
+            xs.append(np.array([len(series) - 1.5, len(series) - 0.5])), ys.append(np.array(stats))
+    x_all = np.concatenate(xs) if xs else np.array([0.0, 1.0])
+    y_all = np.concatenate(ys) if ys else np.array([0.0, 1.0])
+    x_all, y_all = x_all[np.isfinite(x_all)], y_all[np.isfinite(y_all)]
+    x_range = fig.layout.xaxis.range or ((x_all.min(), x_all.max()) if len(x_all) else (0.0, 1.0))
+    y_range = fig.layout.yaxis.range or ((y_all.min(), y_all.max()) if len(y_all) else (0.0, 1.0))
+    (x0, x1), (y0, y1) = map(float, x_range), map(float, y_range)
+    if x1 <= x0:
+        x0, x1 = x0 - 1, x1 + 1
+    if y1 <= y0:
+        y0, y1 = y0 - 1, y1 + 1
+    if not fig.layout.yaxis.range:
+        pad = (y1 - y0) * 0.05
+        y0, y1 = y0 - pad, y1 + pad
+
+    def px(v):
+        return left + (v - x0) / (x1 - x0) * (right - left)
+
+    def py(v):
+        return bottom - (v - y0) / (y1 - y0) * (bottom - top)
+
+    # 網格與刻度
+    boxes_only = all(kind == "box" for kind, *_ in series) and series
+    for t in [] if boxes_only else _nice_ticks(x0, x1):
+        draw.line([(px(t), top), (px(t), bottom)], fill="#e5e5e5", width=scale)
+        draw.text((px(t), bottom + 6 * scale), f"{t:g}", fill="#444", font=font, anchor="mt")
+    for t in _nice_ticks(y0, y1):
+        draw.line([(left, py(t)), (right, py(t))], fill="#e5e5e5", width=scale)
+        draw.text((left - 6 * scale, py(t)), f"{t:g}", fill="#444", font=font, anchor="rm")
+
+    # 數據畫在透明圖層上，再按繪圖區裁剪貼回，超出範圍的部分不會畫到坐標軸外
+    layer = Image.new("RGBA", (W, H), (0, 0, 0, 0))
+    ldraw = ImageDraw.Draw(layer)
+    limit = 10 * max(W, H)
+    for kind, x, y, color, extra in series:
+        if kind == "line":
+            ok = np.isfinite(x) & np.isfinite(y)
+            points = np.column_stack([np.clip(px(x), -limit, limit), np.clip(py(y), -limit, limit)])
+            # 斷點（NaN）處分段畫
+            for segment in np.split(np.arange(len(x)), np.flatnonzero(~ok)):
+                segment = segment[ok[segment]]
+                if len(segment) > 1:
+                    ldraw.line([tuple(p) for p in points[segment]], fill=color, width=2 * scale, joint="curve")
+        elif kind == "bar":
+            for xc, h, w in zip(x, y, extra):
+                if np.isfinite(xc) and np.isfinite(h):
+                    ldraw.rectangle([px(xc - w / 2), py(max(h, 0)), px(xc + w / 2), py(min(h, 0))], fill=color,
+                                    outline="white", width=scale)
+        else:
+            low, q1, median, q3, high = (py(v) for v in y)
+            xc = px(x[0])
+            half = (px(x[0] + 0.25) - px(x[0] - 0.25)) / 2
+            ldraw.line([(xc, low), (xc, q3)], fill=color, width=2 * scale)
+            ldraw.line([(xc, q1), (xc, high)], fill=color, width=2 * scale)
+            ldraw.rectangle([xc - half, q3, xc + half, q1], fill="white", outline=color, width=2 * scale)
+            ldraw.line([(xc - half, median), (xc + half, median)], fill=color, width=2 * scale)
+            for v in (low, high):
+                ldraw.line([(xc - half / 2, v), (xc + half / 2, v)], fill=color, width=2 * scale)
+            if extra:
+                draw.text((xc, bottom + 6 * scale), extra, fill="#444", font=font, anchor="mt")
+    area = tuple(int(v) for v in (left, top, right, bottom))
+    clip = layer.crop(area)
+    img.paste(clip, area[:2], clip)
+
+    draw.rectangle([left, top, right, bottom], outline="#888", width=scale)
+    title = fig.layout.title.text
+    if title:
+        draw.text((W / 2, 18 * scale), title, fill="#222", font=title_font, anchor="mt")
+    if fig.layout.xaxis.title.text:
+        draw.text(((left + right) / 2, H - 8 * scale), fig.layout.xaxis.title.text, fill="#444", font=font,
+                  anchor="md")
+    if fig.layout.yaxis.title.text:
+        label = Image.new("RGBA", (int(font.getlength(fig.layout.yaxis.title.text)) + 4, 16 * scale), (0, 0, 0, 0))
+        ImageDraw.Draw(label).text((0, 0), fig.layout.yaxis.title.text, fill="#444", font=font)
+        label = label.rotate(90, expand=True)
+        img.paste(label, (4 * scale, int((top + bottom - label.height) / 2)), label)
+    # 圖例：多於一條折線時列在右上角
+    names = [(extra, color) for kind, _, _, color, extra in series if kind == "line" and extra]
+    if len(names) > 1:
+        y, x = top + 6 * scale, right - max(font.getlength(name) for name, _ in names[:12]) - 30 * scale
+        for name, color in names[:12]:
+            draw.line([(x, y + 6 * scale), (x + 18 * scale, y + 6 * scale)], fill=color, width=3 * scale)
+            draw.text((x + 22 * scale, y), name, fill="#222", font=font)
+            y += 16 * scale
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def rasterize(fig, font_path, width=900, height=450, scale=2):
+    """Plotly 圖表轉 PNG：優先用 kaleido，不可用時（未安裝、缺 Chrome）改用 Pillow 畫簡化版"""
+    global _kaleido_failed
+    if not _kaleido_failed:
+        try:
+            return fig.to_image(format="png", width=width, height=height, scale=scale)
+        except Exception:
+            # 失敗一次後不再嘗試，避免每張圖都等待瀏覽器啟動
+            _kaleido_failed = True
+    return _draw_figure(fig, font_path, width, height, scale)
+
+
+# --- 報告內容 ---
+class Report:
+    """報告內容：按順序排列的標題、段落、表格、圖表和分頁。只保存數據，排版在 render_pdf() 中進行"""
+
+    def __init__(self, title, subtitle=""):
+        self.title = title
+        self.subtitle = subtitle
+        self.blocks = []
+
+    def heading(self, text):
+        self.blocks.append(("heading", text))
+        return self
+
+    def text(self, text):
+        """一段文字，可以是 AI 回答的 Markdown（標題、列表、粗體會轉成相應的排版）"""
+        self.blocks.append(("text", text or ""))
+        return self
+
+    def table(self, columns, rows):
+        self.blocks.append(("table", (list(columns), [[str(v) for v in row] for row in rows])))
+        return self
+
+    def figure(self, fig, caption=""):
+        self.blocks.append(("figure", (fig, caption)))
+        return self
+
+    def page_break(self):
+        self.blocks.append(("page_break", None))
+        return self
+
+    def chars(self):
+        """報告中出現的所有字符（含圖表標題、圖例），用於裁剪字體子集"""
+        # 頁腳的頁碼在排版時才確定，先把所有數字算進去
+        parts = [self.title, self.subtitle, _FOOTER, "0123456789"]
+        for kind, value in self.blocks:
+            if kind in ("heading", "text"):
+                parts.append(value)
+            elif kind == "table":
+                parts += value[0] + [cell for row in value[1] for cell in row]
+            elif kind == "figure":
+                fig, caption = value
+                parts += [caption, fig.layout.title.text or "", fig.layout.xaxis.title.text or "",
+                          fig.layout.yaxis.title.text or ""]
+                parts += [t.name or "" for t in fig.data]
+        return set("".join(parts))
+
+
+_FOOTER = "第 {} 頁 · DSE AI 伴學夥伴"
+_MD_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_MD_BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_MD_INLINE = re.compile(r"\*\*|__|`")
+
+
+def _markdown_lines(text):
+    """把 Markdown 簡化為 (級別, 文字)：級別 1-3 為標題，0 為正文；列表轉成圓點，去掉粗體與代碼標記"""
+    for line in text.splitlines():
+        line = line.rstrip()
+        heading = _MD_HEADING.match(line)
+        if heading:
+            yield min(len(heading.group(1)), 3), _MD_INLINE.sub("", heading.group(2))
+            continue
+        bullet = _MD_BULLET.match(line)
+        if bullet and line.strip() not in ("---", "***"):
+            line = bullet.group(1) + "• " + bullet.group(2)
+        elif line.strip() in ("---", "***", "___"):
+            line = ""
+        yield 0, _MD_INLINE.sub("", line)
+
+
+def render_pdf(report, progress=None):
+    """排版報告並返回 PDF 字節；progress(已完成, 總數) 在每個內容塊完成後調用"""
+    from fpdf import FPDF
+
+    font_path, covered = cjk_font(report.chars())
+
+    def clean(text):
+        # 字體中沒有的字（如 emoji）直接略去，避免出現空白方塊
+        return "".join(c for c in text if c in covered or c in "\n\t ")
+
+    class _PDF(FPDF):
+        def footer(self):
+            self.set_y(-12)
+            self.set_font("cjk", size=8)
+            self.set_text_color(130)
+            self.cell(0, 6, _FOOTER.format(self.page_no()), align="C")
+            self.set_text_color(0)
+
+    pdf = _PDF(format="A4")
+    pdf.set_margins(18, 18, 18)
+    pdf.set_auto_page_break(True, margin=18)
+    pdf.add_font("cjk", "", font_path)
+    # 子集只有一種字重，粗體（表頭、標題）沿用同一字體
+    pdf.add_font("cjk", "B", font_path)
+    pdf.set_title(report.title)
+    pdf.add_page()
+    pdf.set_font("cjk", size=18)
+    pdf.multi_cell(0, 10, clean(report.title), new_x="LMARGIN", new_y="NEXT")
+    if report.subtitle:
+        pdf.set_font("cjk", size=10)
+        pdf.set_text_color(100)
+        pdf.multi_cell(0, 6, clean(report.subtitle), new_x="LMARGIN", new_y="NEXT")
+        pdf.set_text_color(0)
+    pdf.ln(4)
+
+    for done, (kind, value) in enumerate(report.blocks, 1):
+        if kind == "heading":
+            pdf.ln(2)
+            pdf.set_font("cjk", size=14)
+            pdf.multi_cell(0, 8, clean(value), new_x="LMARGIN", new_y="NEXT")
+            pdf.ln(1)
+        elif kind == "text":
+            for level, line in _markdown_lines(clean(value)):
+                if not line.strip():
+                    pdf.ln(3)
+                    continue
+                pdf.set_font("cjk", size={0: 11, 1: 14, 2: 13, 3: 12}[level])
+                pdf.multi_cell(0, 6.5 if level else 6, line, new_x="LMARGIN", new_y="NEXT")
+        elif kind == "table":
+            columns, rows = value
+            pdf.set_font("cjk", size=10)
+            with pdf.table(text_align="LEFT", line_height=6) as table:
+                header = table.row()
+                for col in columns:
+                    header.cell(clean(col))
+                for row in rows:
+                    cells = table.row()
+                    for cell in row:
+                        cells.cell(clean(cell))
+        elif kind == "figure":
+            fig, caption = value
+            png = rasterize(fig, font_path)
+            pdf.image(io.BytesIO(png), w=pdf.epw)
+            if caption:
+                pdf.set_font("cjk", size=9)
+                pdf.set_text_color(100)
+                pdf.multi_cell(0, 5, clean(caption), align="C", new_x="LMARGIN", new_y="NEXT")
+                pdf.set_text_color(0)
+            pdf.ln(2)
+        elif kind == "page_break":
+            pdf.add_page()
+        if progress:
+            progress(done, len(report.blocks))
+    return bytes(pdf.output())
+
+
+# --- 後台生成 ---
+class ReportWorker:
+    """後台線程池：submit() 立即返回任務號，排版完成後 PDF 寫入 out_dir/<任務號>.pdf。
+
+    任務狀態在進程內記錄；進程重啟後已生成的文件仍可按任務號取回，超過 keep 秒的文件在提交新任務時清理。
+    """
+
+    def __init__(self, out_dir=REPORT_DIR, workers=2, keep=REPORT_TTL):
+        self.out_dir = out_dir
+        self.keep = keep
+        os.makedirs(out_dir, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-report")
+        self._jobs = {}  # 任務號 -> {"future", "progress"}
+        self._lock = threading.Lock()
+
+    def _path(self, job_id):
+        return os.path.join(self.out_dir, f"{job_id}.pdf")
+
+    def _run(self, job, job_id, report):
+        def progress(done, total):
+            job["progress"] = done / total if total else 1.0
+        data = render_pdf(report, progress)
+        _write_atomic(self._path(job_id), data)
+
+    def _prune(self):
+        cutoff = time.time() - self.keep
+        for path in glob.glob(os.path.join(self.out_dir, "*.pdf")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            for job_id in [j for j, job in self._jobs.items() if job["future"].done() and job["submitted"] < cutoff]:
+                del self._jobs[job_id]
+
+    def submit(self, report):
+        self._prune()
+        job_id = uuid.uuid4().hex
+        job = {"progress": 0.0, "submitted": time.time()}
+        job["future"] = self._pool.submit(self._run, job, job_id, report)
+        with self._lock:
+            self._jobs[job_id] = job
+        return job_id
+
+    def status(self, job_id):
+        """返回 {"state": pending / done / error / missing, "progress": 0-1, "error": 錯誤信息}"""
+        job = self._jobs.get(job_id)
+        if job and not job["future"].done():
+            return {"state": "pending", "progress": job["progress"], "error": None}
+        if job and job["future"].exception():
+            return {"state": "error", "progress": 1.0, "error": str(job["future"].exception())}
+        if os.path.exists(self._path(job_id)):
+            return {"state": "done", "progress": 1.0, "error": None}
+        return {"state": "missing", "progress": 0.0, "error": None}
+
+    def read(self, job_id):
+        with open(self._path(job_id), "rb") as f:
+            return f.read()
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    source = find_font()
+    path, covered = cjk_font(source=source)
+    print(f"源字體：{source[0]}（{os.path.getsize(source[0]) / 1e6:.1f} MB）")
+    print(f"子集：{path}（{os.path.getsize(path) / 1e6:.1f} MB，{len(covered)} 字），用時 {time.perf_counter() - started:.1f}s")
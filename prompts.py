@@ -0,0 +1,118 @@
+"""提示模板註冊表：每個功能一段固定前綴（角色與要求）加一個填入用戶內容的模板。
+
+前綴每次調用都完全相同、且放在用戶內容之前，作為 system_instruction 發送；模型支持隱式緩存
+（如 gemini-2.5-*）且請求前部達到其最小長度時，重複的前綴會自動命中緩存。
+節省的輸入 token 從響應的 usage_metadata.cached_content_token_count 讀取，記入遙測（見 telemetry.py）。
+"""
+import re
+
+_CJK_RE = re.compile(r"[㐀-鿿豈-﫿　-〿＀-￯]")
+
+# 批量批改要求模型在第一行給出等級，以便整理成表格（見 batch_grade.extract_grade）
+_GRADE_LINE = "\n请在回答的第一行写出「GRADE: 等级或分数」。"
+
+PROMPTS = {
+    # 數學
+    "math_step": {"prefix": "你是一位DSE数学名师，请分步详细解答下列题目，使用LaTeX格式：", "template": "{question}"},
+    "math_trap": {"prefix": "You are a DSE Maths teacher. For the given topic, list 3 common traps/mistakes students make.",
+                  "template": "DSE Maths Topic: {topic}."},
+    "math_hw": {"prefix": "你是一位DSE数学老师，请批改下列作业并给出分数与建议：", "template": "{answer}"},
+    "math_hw_batch": {"prefix": "你是一位DSE数学老师，请批改下列作业并给出分数与建议。" + _GRADE_LINE, "template": ""},
+    # 英文
+    "eng_essay": {"prefix": "你是一位DSE英文写作专家，请严格按照DSE评分标准（内容、结构、语言）批改下文作文，给出：1. 预估等级"
+                            "（Level 1-5*），2. 优缺点分析，3. 具体修改建议，4. 润色后的句子，5. 针对弱项的微型范文。",
+                  "template": "{essay}"},
+    "eng_essay_batch": {"prefix": "你是一位DSE英文写作专家，请严格按照DSE评分标准（内容、结构、语言）批改下文作文，给出预估等级"
+                                  "（Level 1-5*）、优缺点分析和具体修改建议。" + _GRADE_LINE,
+                        "template": ""},
+    "eng_sample": {"prefix": "你是一位DSE英文写作老师。",
+                   "template": "请给出一篇DSE英文写作高分范文，并总结写作技巧与常见失分点。"},
+    "eng_speak": {"prefix": "请以DSE英文口语考试标准，针对给定话题生成一段高分口语答案。", "template": "话题：{topic}"},
+    "eng_read": {"prefix": "请根据下文生成3道DSE英文阅读理解题及答案。", "template": "{passage}"},
+    "eng_word": {"prefix": "请为给定单词生成英文释义、例句和记忆法。", "template": "单词：{word}"},
+    "eng_sent": {"prefix": "请将下列句子变换为另一种表达方式：", "template": "{sentence}"},
+    "eng_past": {"prefix": "请为下列DSE历年真题评分并给出详细解析：Write an essay about the importance of teamwork.",
+                 "template": "学生答案：{answer}"},
+    # 中文
+    "chi_wyw": {"prefix": "请将下列文言文翻译为现代白话文：", "template": "{text}"},
+    "chi_read": {"prefix": "请根据下文生成3道DSE中文阅读理解题及答案。", "template": "{passage}"},
+    "chi_essay": {"prefix": "你是一位DSE中文写作专家，请严格按照DSE评分标准批改下文作文，给出等级、优缺点、修改建议和范文。",
+                  "template": "{essay}"},
+    "chi_essay_batch": {"prefix": "你是一位DSE中文写作专家，请严格按照DSE评分标准批改下文作文，给出等级、优缺点和修改建议。"
+                                  + _GRADE_LINE,
+                        "template": ""},
+    "chi_write": {"prefix": "请以给定题目写一篇DSE中文现代文范文。", "template": "题目：{topic}"},
+    "chi_word": {"prefix": "请为给定词语做注释和用法说明。", "template": "词语：{word}"},
+    "chi_idiom": {"prefix": "请为给定成语做释义并造句。", "template": "成语：{idiom}"},
+    "chi_past": {"prefix": "请为下列DSE历年真题评分并给出详细解析：请写一篇关于‘诚信’的议论文。",
+                 "template": "学生答案：{answer}"},
+    "chi_poem": {"prefix": "请对下列诗词进行赏析：", "template": "{poem}"},
+    # 公社科
+    "csd_kw": {"prefix": "请简明解释给定的DSE公社科概念。", "template": "概念：{keyword}"},
+    "csd_event": {"prefix": "请用DSE公社科视角分析下列时事：", "template": "{event}"},
+    "csd_data": {"prefix": "请对下列数据进行解读和分析：", "template": "{data}"},
+    "csd_news": {"prefix": "请用简明扼要的语言总结下列新闻：", "template": "{news}"},
+    "csd_view": {"prefix": "请对下列观点进行论证和完善：", "template": "{view}"},
+    "csd_qbank": {"prefix": "请为下列DSE公社科题目评分并给出详细解析。", "template": "题目：{question}\n学生答案：{answer}"},
+    "csd_past": {"prefix": "请为下列DSE历年真题评分并给出详细解析：简述香港社会的多元文化现象。",
+                 "template": "学生答案：{answer}"},
+    "csd_term": {"prefix": "请为给定术语生成简明解释和记忆法。", "template": "术语：{term}"},
+    "csd_world": {"prefix": "请用DSE公社科视角介绍下列国际话题：", "template": "{topic}"},
+    # AI 助手（多輪對話，歷史由 chat_memory.Conversation 插在問題之前）
+    "chat": {"prefix": "你是一位香港DSE备考AI助手，熟悉数学、英文、中文和公民与社会发展科。请结合之前的对话，"
+                       "简明、准确地回答学生的问题；涉及计算时写出关键步骤。",
+             "template": "{question}"},
+    "chat_summary": {"prefix": "请把下列学生与AI助手的对话压缩成不超过200字的摘要，保留学生的科目、目标、已讨论的要点、"
+                               "结论和尚未解决的问题，省略寒暄。只输出摘要本身。",
+                     "template": "{dialogue}"},
+}
+
+
+class Prompt:
+    """一次調用的提示：prefix 為功能的固定前綴，contents 為本次的可變內容（字符串或多模態片段）。
+
+    question 是填入模板的用戶內容（不含參考資料和圖片），導出報告時與回答一起列出。
+    """
+
+    def __init__(self, feature, prefix, contents, question=""):
+        self.feature = feature
+        self.prefix = prefix
+        self.contents = list(contents)
+        self.question = question
+
+    def prepend(self, *parts):
+        """在可變內容之前（固定前綴之後）插入片段，如檢索到的參考資料"""
+        return Prompt(self.feature, self.prefix, list(parts) + self.contents, self.question)
+
+    def attach(self, *parts):
+        """在可變內容之後追加片段，如作業圖片"""
+        return Prompt(self.feature, self.prefix, self.contents + list(parts), self.question)
+
+
+def get_prompt(feature, **values):
+    """按註冊表生成提示；模板為空的功能（批量批改）由調用方 attach 作業內容"""
+    spec = PROMPTS[feature]
+    text = spec["template"].format(**values) if spec["template"] else ""
+    return Prompt(feature, spec["prefix"], [text] if text else [], text)
+
+
+def estimate_tokens(text):
+    """粗略估算 token 數：漢字約 1 個 / 字，其他字符約 4 個 / token"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk) // 4
+
+
+def _as_dict(config):
+    if config is None:
+        return {}
+    if hasattr(config, "model_dump"):
+        return config.model_dump(exclude_none=True)
+    return dict(config)
+
+
+def prefix_config(prefix, config=None):
+    """把前綴作為 system_instruction 併入 config；發送請求與計算回答緩存鍵都用這個結果"""
+    if not prefix:
+        return config
+    return dict(_as_dict(config), system_instruction=prefix)
+
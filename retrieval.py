@@ -0,0 +1,229 @@
+"""本地檢索：把歷屆試題、評分準則和筆記切塊，建立 BM25 倒排索引（numpy 內存映射），按問題取 top-k 段落放進提示。
+
+資料放在 data/corpus/<科目>/ 下（.txt / .md），必讀篇章（data/content.json）也會一併收錄。
+索引寫到 .cache/retrieval/：每個詞的倒排表（塊序號 + 預先算好的 BM25 權重）連續存放在 .npy 中，
+用 mmap 打開，多個進程共享同一份頁緩存；查詢只讀取命中詞的那幾段，不需要把整個索引讀進內存。
+資料變化（文件增刪改）後下一次打開索引時自動重建。
+
+用法：python retrieval.py build   # 預先建立索引
+     python retrieval.py search <科目> <問題>
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+from content_store import DEFAULT_CONTENT_PATH, tokenize
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.getenv("DSE_CORPUS_DIR", os.path.join(ROOT, "data", "corpus"))
+INDEX_DIR = os.getenv("DSE_RETRIEVAL_DIR", os.path.join(".cache", "retrieval"))
+INDEX_VERSION = 1
+CHUNK_CHARS = 400  # 每塊最多字符數
+TOP_K = 4
+CONTEXT_CHARS = 1600  # 每次提示中參考資料的總字符上限
+K1, B = 1.5, 0.75  # BM25 參數
+# 相關度下限：分數須達到「每個查詢詞都取其最高權重」之和的這一比例；
+# 查詢中有兩字詞或英文單詞時，還須至少命中其中一個（只靠單字命中的段落與問題多半無關）
+MIN_RELATIVE_SCORE = 0.25
+SUBJECTS = ("math", "eng", "chi", "csd")
+
+_SENTENCE_RE = re.compile(r"(?<=[。！？!?；;])|(?<=\.)\s+")
+
+
+def chunk_text(text, size=CHUNK_CHARS):
+    """按段落切塊；段落過長時按句子再切，單句仍超長則硬切"""
+    chunks, current = [], ""
+    for para in re.split(r"\n\s*\n", text.replace("\r\n", "\n")):
+        para = " ".join(para.split())
+        if not para:
+            continue
+        pieces = [para] if len(para) <= size else [s for s in _SENTENCE_RE.split(para) if s and s.strip()]
+        for piece in pieces:
+            if current and len(current) + len(piece) + 1 > size:
+                chunks.append(current)
+                current = ""
+            while len(piece) > size:
+                chunks.append(piece[:size])
+                piece = piece[size:]
+            current = f"{current} {piece}".strip() if current else piece
+        if current and len(current) > size // 2:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _corpus_files(corpus_dir):
+    files = []
+    for subject in SUBJECTS:
+        base = os.path.join(corpus_dir, subject)
+        for dirpath, _, names in os.walk(base):
+            files += [(subject, os.path.join(dirpath, n)) for n in sorted(names) if n.lower().endswith((".txt", ".md"))]
+    return files
+
+
+def _fingerprint(corpus_dir, content_path):
+    """資料文件的路徑、大小和修改時間；任何變化都會觸發重建"""
+    h = hashlib.sha256(f"v{INDEX_VERSION} {K1} {B} {CHUNK_CHARS}".encode())
+    paths = [p for _, p in _corpus_files(corpus_dir)] + ([content_path] if os.path.exists(content_path) else [])
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def load_documents(corpus_dir=CORPUS_DIR, content_path=DEFAULT_CONTENT_PATH):
+    """返回 [(科目, 來源, 全文)]"""
+    docs = []
+    for subject, path in _corpus_files(corpus_dir):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            docs.append((subject, os.path.relpath(path, corpus_dir), f.read()))
+    if os.path.exists(content_path):
+        with open(content_path, encoding="utf-8") as f:
+            passages = json.load(f).get("passages", [])
+        for p in passages:
+            text = "\n\n".join([f"{p['title']}（{p['author']}，{p['source']}）", p["excerpt"], p["translation"],
+                                "；".join(p["analysis"]), p["exam_tips"]])
+            docs.append(("chi", f"必讀：{p['title']}", text))
+    return docs
+
+
+def _write(index_dir, name, payload):
+    """先寫臨時文件再原子替換：其他進程已 mmap 的舊文件不會被原地截斷"""
+    path = os.path.join(index_dir, name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if isinstance(payload, np.ndarray):
+        with open(tmp, "wb") as f:
+            np.save(f, payload)
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(payload)
+    os.replace(tmp, path)
+
+
+def build_index(index_dir=INDEX_DIR, corpus_dir=CORPUS_DIR, content_path=DEFAULT_CONTENT_PATH):
+    """切塊並建立 BM25 倒排索引，寫入 index_dir"""
+    chunks = []
+    for subject, source, text in load_documents(corpus_dir, content_path):
+        chunks += [{"subject": subject, "source": source, "text": c} for c in chunk_text(text)]
+    vocab, postings = {}, []
+    lengths = np.zeros(len(chunks))
+    for doc_id, chunk in enumerate(chunks):
+        tokens = tokenize(chunk["text"])
+        lengths[doc_id] = len(tokens)
+        counts = {}
+        for t in tokens:
+            counts[t] = counts.get(t, 0) + 1
+        for t, tf in counts.items():
+            postings.append((vocab.setdefault(t, len(vocab)), doc_id, tf))
+    avg_len = lengths.mean() if len(chunks) else 1.0
+    post = np.array(postings, dtype=np.float64).reshape(-1, 3)
+    term_ids, doc_ids, tf = post[:, 0].astype(np.int64), post[:, 1].astype(np.int64), post[:, 2]
+    df = np.bincount(term_ids, minlength=len(vocab))
+    idf = np.log1p((len(chunks) - df + 0.5) / (df + 0.5))
+    # 預先算好每個 (詞, 塊) 的 BM25 分數，查詢時只需相加
+    weights = idf[term_ids] * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths[doc_ids] / avg_len))
+    order = np.lexsort((doc_ids, term_ids))
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(df, out=indptr[1:])
+
+    os.makedirs(index_dir, exist_ok=True)
+    _write(index_dir, "indptr.npy", indptr)
+    _write(index_dir, "docs.npy", doc_ids[order].astype(np.int32))
+    _write(index_dir, "weights.npy", weights[order].astype(np.float32))
+    _write(index_dir, "subjects.npy", np.array([SUBJECTS.index(c["subject"]) for c in chunks], dtype=np.int8))
+    _write(index_dir, "vocab.json", json.dumps(vocab, ensure_ascii=False))
+    _write(index_dir, "chunks.jsonl", "".join(json.dumps(c, ensure_ascii=False) + "\n" for c in chunks))
+    # meta.json 最後寫入：它存在且指紋一致才表示索引完整
+    _write(index_dir, "meta.json", json.dumps({"fingerprint": _fingerprint(corpus_dir, content_path),
+                                               "chunks": len(chunks), "terms": len(vocab)}))
+    return len(chunks)
+
+
+class RetrievalIndex:
+    """只讀的檢索索引；倒排表以 mmap 方式打開"""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.indptr = np.load(os.path.join(index_dir, "indptr.npy"), mmap_mode="r")
+        self.docs = np.load(os.path.join(index_dir, "docs.npy"), mmap_mode="r")
+        self.weights = np.load(os.path.join(index_dir, "weights.npy"), mmap_mode="r")
+        self.subjects = np.load(os.path.join(index_dir, "subjects.npy"), mmap_mode="r")
+        with open(os.path.join(index_dir, "vocab.json"), encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        with open(os.path.join(index_dir, "chunks.jsonl"), encoding="utf-8") as f:
+            self.chunks = [json.loads(line) for line in f]
+
+    @classmethod
+    def open(cls, index_dir=INDEX_DIR, corpus_dir=CORPUS_DIR, content_path=DEFAULT_CONTENT_PATH):
+        """打開索引；不存在或資料已變化時先重建"""
+        try:
+            with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+                fresh = json.load(f)["fingerprint"] == _fingerprint(corpus_dir, content_path)
+        except (OSError, ValueError, KeyError):
+            fresh = False
+        if not fresh:
+            build_index(index_dir, corpus_dir, content_path)
+        return cls(index_dir)
+
+    def search(self, query, k=TOP_K, subject=None, min_score=MIN_RELATIVE_SCORE):
+        """返回最相關的 k 個塊 [(分數, {subject, source, text})]；沒有段落達到相關度下限時返回空列表"""
+        tokens = set(tokenize(query))
+        term_ids = {self.vocab[t] for t in tokens if t in self.vocab}
+        if not term_ids or not self.chunks:
+            return []
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        strong_hits = np.zeros(len(self.chunks), dtype=bool)
+        best = 0.0
+        for t in term_ids:
+            lo, hi = self.indptr[t], self.indptr[t + 1]
+            scores[self.docs[lo:hi]] += self.weights[lo:hi]
+            best += float(self.weights[lo:hi].max())
+        strong = {self.vocab[t] for t in tokens if t in self.vocab and not _is_single_char(t)}
+        for t in strong:
+            strong_hits[self.docs[self.indptr[t]:self.indptr[t + 1]]] = True
+        if any(not _is_single_char(t) for t in tokens):
+            scores[~strong_hits] = 0.0
+        scores[scores < min_score * best] = 0.0
+        if subject is not None:
+            scores[self.subjects != SUBJECTS.index(subject)] = 0.0
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.chunks[i]) for i in top]
+
+
+def _is_single_char(token):
+    """單個漢字（或單個字母）：tokenize 為中文同時生成的單字詞，單獨命中時不足以說明相關"""
+    return len(token) == 1
+
+
+def format_context(hits, max_chars=CONTEXT_CHARS):
+    """把檢索結果整理成提示前綴，總長度不超過 max_chars"""
+    parts, used = [], 0
+    for i, (_, chunk) in enumerate(hits, 1):
+        text = chunk["text"][:max(0, max_chars - used)]
+        if not text:
+            break
+        parts.append(f"[{i}] 来源：{chunk['source']}\n{text}")
+        used += len(text)
+    if not parts:
+        return ""
+    return ("以下是本地题库 / 评分准则 / 笔记中与问题最相关的资料，请优先依据这些资料作答，"
+            "资料未涉及的部分再使用你的知识：\n" + "\n\n".join(parts))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        print(f"已建立索引：{build_index()} 個段落")
+    elif len(sys.argv) >= 4 and sys.argv[1] == "search":
+        for score, chunk in RetrievalIndex.open().search(" ".join(sys.argv[3:]), subject=sys.argv[2]):
+            print(f"{score:6.2f}  {chunk['source']}  {chunk['text'][:60]}")
+    else:
+        sys.exit(__doc__)
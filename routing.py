@@ -0,0 +1,79 @@
+"""按功能選擇模型：快速檔（fast）與質量檔（quality），每檔有後備模型鏈和延遲預算。
+
+處理函數不再指定模型，只標明功能名（如 eng_word）；AI 客戶端包裝按此表選模型。
+首選模型超時（非流式為總耗時，流式為首個片段的等待時間）或出錯時，依次改用鏈上的下一個模型。
+各檔的模型可用環境變量 DSE_MODELS_FAST / DSE_MODELS_QUALITY（逗號分隔）覆蓋。
+"""
+import os
+
+TIERS = {
+    # 卡片、注釋、短解釋：優先低延遲、低成本
+    "fast": {
+        "models": ("gemini-2.0-flash-lite", "gemini-2.0-flash"),
+        "budget": 8.0,  # 秒
+    },
+    # 作文批改、範文、逐步解題：優先質量
+    "quality": {
+        "models": ("gemini-2.5-flash", "gemini-2.0-flash"),
+        "budget": 45.0,
+    },
+}
+DEFAULT_TIER = "quality"
+
+ROUTES = {
+    # 數學
+    "math_step": "quality",
+    "math_trap": "fast",
+    "math_hw": "quality",
+    "math_hw_batch": "quality",
+    # 英文
+    "eng_essay": "quality",
+    "eng_essay_batch": "quality",
+    "eng_sample": "quality",
+    "eng_speak": "fast",
+    "eng_read": "fast",
+    "eng_word": "fast",
+    "eng_sent": "fast",
+    "eng_past": "quality",
+    # 中文
+    "chi_wyw": "quality",
+    "chi_read": "fast",
+    "chi_essay": "quality",
+    "chi_essay_batch": "quality",
+    "chi_write": "fast",
+    "chi_word": "fast",
+    "chi_idiom": "fast",
+    "chi_past": "quality",
+    "chi_poem": "fast",
+    # 公社科
+    "csd_kw": "fast",
+    "csd_event": "quality",
+    "csd_data": "quality",
+    "csd_news": "fast",
+    "csd_view": "quality",
+    "csd_qbank": "fast",
+    "csd_past": "quality",
+    "csd_term": "fast",
+    "csd_world": "fast",
+    # 側邊欄 AI 助手
+    "chat": "fast",
+    "chat_summary": "fast",
+}
+
+
+def _tier(name):
+    tier = TIERS[name]
+    override = os.getenv(f"DSE_MODELS_{name.upper()}")
+    if override:
+        models = tuple(m.strip() for m in override.split(",") if m.strip())
+        if models:
+            return dict(tier, models=models)
+    return tier
+
+
+def route(feature=None, model=None):
+    """返回 (依次嘗試的模型, 每次嘗試的延遲預算秒數)；明確指定 model 時只用該模型、不設預算"""
+    if model:
+        return (model,), None
+    tier = _tier(ROUTES.get(feature, DEFAULT_TIER))
+    return tier["models"], tier["budget"]
@@ -0,0 +1,141 @@
+"""服務器端的會話狀態持久化：XP、等級、考試日期、各科當前功能等寫入共享存儲。
+
+st.session_state 只存在於單個 Streamlit 進程的內存中；把需要長期保留的鍵同步到 SQLite（默認）
+或 Redis 後，重新部署或請求被負載均衡到另一個副本時，都能按用戶標識找回狀態。
+每個鍵在會話中第一次用到時才讀取（懶加載），每次 rerun 只寫回值有變化的鍵。
+"""
+import datetime
+import json
+import os
+import time
+
+from db import connect
+
+DEFAULT_DB_PATH = os.getenv("DSE_SESSION_PATH", os.path.join(".cache", "sessions.sqlite3"))
+_SNAPSHOT_KEY = "_persisted_snapshot"  # st.session_state 中記錄「上次寫入的值」的鍵
+
+
+def _encode(value):
+    """JSON 編碼；date 等類型以帶標記的字典保存"""
+    def default(obj):
+        if isinstance(obj, datetime.date):
+            return {"__date__": obj.isoformat()}
+        raise TypeError(f"無法持久化 {type(obj).__name__}")
+    return json.dumps(value, ensure_ascii=False, default=default, sort_keys=True)
+
+
+def _decode(raw):
+    def hook(obj):
+        if set(obj) == {"__date__"}:
+            return datetime.date.fromisoformat(obj["__date__"])
+        return obj
+    return json.loads(raw, object_hook=hook)
+
+
+class SQLiteBackend:
+    """默認後端：單個 SQLite 文件（WAL），適合單機或共享磁盤上的多個副本"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_values ("
+                " user TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, updated REAL NOT NULL,"
+                " PRIMARY KEY (user, key))"
+            )
+
+    def _connect(self):
+        return connect(self.path)
+
+    def get(self, user, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM session_values WHERE user = ? AND key = ?", (user, key)).fetchone()
+        return row[0] if row else None
+
+    def set_many(self, user, items):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO session_values (user, key, value, updated) VALUES (?, ?, ?, ?)",
+                [(user, k, v, now) for k, v in items.items()],
+            )
+
+
+class RedisBackend:
+    """Redis 後端：每個用戶一個 hash（dse:session:<用戶>）。
+
+    client 可以是任何提供 hget / hset(mapping=...) 的對象（redis-py、fakeredis 等）；
+    不傳時按 url 創建 redis.Redis，需要另外安裝 redis。
+    """
+
+    def __init__(self, client=None, url=None, prefix="dse:session:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("使用 Redis 後端需要先安裝 redis：pip install redis") from None
+            client = redis.Redis.from_url(url or os.getenv("DSE_SESSION_URL", "redis://localhost:6379/0"))
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, user, key):
+        raw = self.client.hget(self.prefix + user, key)
+        return raw.decode("utf-8") if isinstance(raw, bytes) else raw
+
+    def set_many(self, user, items):
+        self.client.hset(self.prefix + user, mapping=items)
+
+
+def make_backend(kind=None):
+    """按環境變量 DSE_SESSION_BACKEND（sqlite / redis）創建後端"""
+    kind = (kind or os.getenv("DSE_SESSION_BACKEND", "sqlite")).lower()
+    if kind == "redis":
+        return RedisBackend()
+    if kind == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"未知的會話存儲後端：{kind}")
+
+
+class PersistentState:
+    """把 st.session_state 中登記過的鍵與後端同步。
+
+    state 為 st.session_state（或任何支持 in / [] 的映射）。init() 在鍵不存在時從後端懶加載，
+    flush() 只寫回與上次寫入值不同的鍵；腳本開頭和結尾各調用一次 flush()，
+    即使上一輪因 st.rerun() / st.stop() 提前結束，其修改也會在下一輪開始時寫回。
+    """
+
+    def __init__(self, backend, state, user):
+        self.backend = backend
+        self.state = state
+        self.user = user
+        if _SNAPSHOT_KEY not in state:
+            state[_SNAPSHOT_KEY] = {}
+        self._snapshot = state[_SNAPSHOT_KEY]
+
+    def init(self, key, default):
+        """登記需要持久化的鍵；會話中第一次用到時從後端讀取，沒有記錄則使用默認值"""
+        if key in self._snapshot:
+            return
+        raw = self.backend.get(self.user, key)
+        if raw is not None:
+            self.state[key] = _decode(raw)
+        elif key not in self.state:
+            self.state[key] = default
+        # 仍是默認值時不必寫入，直到真正被修改
+        self._snapshot[key] = raw if raw is not None else _encode(self.state[key])
+
+    def flush(self):
+        """寫回有變化的鍵，返回寫入的鍵數"""
+        dirty = {}
+        for key, last in self._snapshot.items():
+            if key in self.state:
+                raw = _encode(self.state[key])
+                if raw != last:
+                    dirty[key] = raw
+        if dirty:
+            self.backend.set_many(self.user, dirty)
+            self._snapshot.update(dirty)
+        return len(dirty)
@@ -0,0 +1,226 @@
+"""方程求解器：在獨立子進程中求解，超時強制終止，並退回數值解法；結果按規範化後的方程組緩存。
+
+sp.solve 遇到高次多項式或超越方程組時可能長時間佔滿 CPU，放在 Streamlit 線程中會卡死整個會話，
+因此每次求解都交給常駐的子進程執行，超時後直接 kill 該子進程並補充一個新的。
+"""
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+
+import sympy as sp
+
+from expr_parser import ParseError, parse_equation
+
+SOLVE_TIMEOUT = float(os.getenv("DSE_SOLVE_TIMEOUT", 5))  # 符號求解的時限（秒）
+NSOLVE_TIMEOUT = float(os.getenv("DSE_NSOLVE_TIMEOUT", 5))  # 數值求解的時限（秒）
+POOL_SIZE = int(os.getenv("DSE_SOLVER_WORKERS", 2))
+CACHE_SIZE = 256
+
+
+class SolverError(Exception):
+    """方程無法解析或求解"""
+
+
+class SolverTimeout(SolverError):
+    """求解超時（子進程已被終止）"""
+
+
+class SolverUnsupported(SolverError):
+    """SymPy 沒有對應的符號解法（如超越方程），可改用數值方法"""
+
+
+def canonical_system(text):
+    """規範化方程組：每個方程解析為「左邊 - 右邊」的 SymPy 標準形式，去重並按其字符串排序。
+
+    返回 ((字符串形式, 表達式), ...)：字符串只用作緩存鍵（x+y=5 與 y + x = 5、x^2=4 與 x**2-4=0 得到相同的鍵），
+    交給子進程求解的是表達式本身（經 pickle 傳遞）。受限解析器讀不了 SymPy 的輸出（如 1.0e-5、zoo），
+    不能把字符串再解析一次。解析失敗或含有無窮大 / 未定義的值（如除以 0）時拋出 SolverError。
+    """
+    eqs = {}
+    for eq in text.replace("\n", ",").split(","):
+        if eq.strip():
+            try:
+                expr = parse_equation(eq)
+            except ParseError as e:
+                raise SolverError(f"方程格式有誤：{eq.strip()}（{e}）") from None
+            if expr.has(sp.zoo, sp.oo, -sp.oo, sp.nan):
+                raise SolverError(f"方程含有無窮大或未定義的值（如除以 0）：{eq.strip()}")
+            eqs[str(expr)] = expr
+    return tuple(sorted(eqs.items()))
+
+
+def _symbols(eqs):
+    # 與原來的約定一致：單個方程解 x，方程組解 x, y
+    return sp.symbols("x y") if len(eqs) > 1 else (sp.Symbol("x"),)
+
+
+def _solve_symbolic(exprs):
+    syms = _symbols(exprs)
+    sol = sp.solve(exprs, syms) if len(exprs) > 1 else sp.solve(exprs[0], syms[0])
+    return str(sol)
+
+
+def _solve_numeric(exprs):
+    """從多個初始點出發用 nsolve 找實數解"""
+    syms = _symbols(exprs)
+    if len(exprs) == 1:
+        guesses = [(g,) for g in range(-10, 11, 2)]
+    else:
+        guesses = [(a, b) for a in (-5, 0, 5) for b in (-5, 0, 5)]
+    roots = set()
+    for guess in guesses:
+        try:
+            root = sp.nsolve(exprs if len(exprs) > 1 else exprs[0], syms if len(exprs) > 1 else syms[0],
+                             guess if len(exprs) > 1 else guess[0])
+        except Exception:
+            continue
+        values = [complex(v) for v in (root if len(exprs) > 1 else [root])]
+        if all(abs(v.imag) < 1e-9 for v in values):
+            roots.add(tuple(round(v.real, 8) for v in values))
+    if not roots:
+        raise SolverError("數值方法未找到實數解")
+    names = [str(s) for s in syms]
+    return str([dict(zip(names, r)) if len(names) > 1 else r[0] for r in sorted(roots)])
+
+
+def _serve():
+    """子進程主循環：從 stdin 讀取 (方法, 方程組的表達式列表)，向 stdout 寫回 ("ok", 結果)、("unsupported", 信息) 或 ("error", 信息)"""
+    tasks = {"symbolic": _solve_symbolic, "numeric": _solve_numeric}
+    inp, out = sys.stdin.buffer, sys.stdout.buffer
+    sys.stdout = sys.stderr  # 防止意外的 print 破壞通訊
+    while True:
+        try:
+            kind, eqs = pickle.load(inp)
+        except EOFError:
+            return
+        try:
+            reply = ("ok", tasks[kind](eqs))
+        except NotImplementedError as e:
+            reply = ("unsupported", str(e))
+        except Exception as e:
+            reply = ("error", str(e))
+        pickle.dump(reply, out)
+        out.flush()
+
+
+class _Worker:
+    """一個求解子進程。
+
+    用 subprocess 直接運行本文件，而不是 multiprocessing：在 Streamlit 中 __main__ 是 app.py，
+    multiprocessing 的 spawn 會在子進程中重新執行整個頁面腳本。
+    """
+
+    def __init__(self):
+        self.proc = subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def call(self, task, timeout):
+        """發送任務並等待結果；超時返回 None"""
+        replies = queue.Queue()
+
+        def read_reply():
+            try:
+                replies.put(pickle.load(self.proc.stdout))
+            except Exception:
+                replies.put(("crashed", None))  # 子進程被 kill 或崩潰
+
+        pickle.dump(task, self.proc.stdin)
+        self.proc.stdin.flush()
+        threading.Thread(target=read_reply, daemon=True).start()
+        try:
+            return replies.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def kill(self):
+        self.proc.kill()
+        self.proc.wait()
+
+
+class SolverPool:
+    """常駐子進程池；每個任務獨佔一個子進程，超時則 kill 並在下次使用時重新創建"""
+
+    def __init__(self, size=POOL_SIZE):
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            # 預先啟動子進程，避免第一次求解時把導入 sympy 的時間算進時限
+            self._idle.put(_Worker())
+
+    def _acquire_worker(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return _Worker()
+            if worker.alive():
+                return worker
+
+    def run(self, kind, eqs, timeout):
+        if not self._slots.acquire(timeout=timeout):
+            raise SolverTimeout("求解器繁忙，請稍後再試")
+        try:
+            worker = self._acquire_worker()
+            try:
+                reply = worker.call((kind, eqs), timeout)
+            except OSError:
+                reply = ("crashed", None)
+            if reply is None or reply[0] == "crashed":
+                # 超時或子進程崩潰：強制終止，釋放 CPU
+                worker.kill()
+                if reply is None:
+                    raise SolverTimeout(f"求解超過 {timeout:g} 秒，已中止")
+                raise SolverError("求解進程異常退出")
+            self._idle.put(worker)
+            status, payload = reply
+            if status == "unsupported":
+                raise SolverUnsupported(payload)
+            if status == "error":
+                raise SolverError(payload)
+            return payload
+        finally:
+            self._slots.release()
+
+
+class EquationSolver:
+    """對外接口：先符號求解，超時後改用數值求解；成功的結果按規範化方程組緩存"""
+
+    def __init__(self, pool_size=POOL_SIZE, cache_size=CACHE_SIZE):
+        self.pool = SolverPool(pool_size)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def solve(self, text):
+        """返回 (方法, 解的字符串)；方法為 "symbolic"（精確解）或 "numeric"（數值近似解）"""
+        system = canonical_system(text)
+        if not system:
+            raise SolverError("請輸入方程")
+        key, exprs = tuple(k for k, _ in system), [e for _, e in system]
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+        try:
+            result = ("symbolic", self.pool.run("symbolic", exprs, SOLVE_TIMEOUT))
+        except (SolverTimeout, SolverUnsupported):
+            result = ("numeric", self.pool.run("numeric", exprs, NSOLVE_TIMEOUT))
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+if __name__ == "__main__":
+    _serve()
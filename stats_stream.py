@@ -0,0 +1,133 @@
+"""統計工具的數據讀取與單次遍歷累加器，適合幾萬到幾十萬個數據的成績表。"""
+import re
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 50_000  # 分塊讀取 CSV 的行數
+RESERVOIR_SIZE = 50_000  # 分位數 / 直方圖所用蓄水池樣本大小；數據量不超過此值時結果是精確的
+_SEPARATORS = re.compile(r"[,，\s]+")
+
+
+def parse_text(text):
+    """解析以逗號 / 空白 / 換行分隔的數字，空字段忽略；格式有誤時拋出 ValueError"""
+    fields = [f for f in _SEPARATORS.split(text) if f]
+    try:
+        # 由 NumPy 逐個轉換，比逐個 float() 再建數組快
+        return np.array(fields, dtype=float)
+    except ValueError:
+        raise ValueError("请只输入数字，并用逗号分隔") from None
+
+
+def numeric_columns(uploaded, name):
+    """讀取表頭與前幾行，返回可作為數值分析的列名"""
+    preview = _read_table(uploaded, name, nrows=50)
+    uploaded.seek(0)
+    return [c for c in preview.columns if pd.api.types.is_numeric_dtype(preview[c])]
+
+
+def iter_column(uploaded, name, column, chunk_size=CHUNK_SIZE):
+    """逐塊讀取上傳文件中的一列，返回 float 數組的迭代器；CSV 不會一次性讀入內存"""
+    if name.lower().endswith(".csv"):
+        reader = pd.read_csv(uploaded, usecols=[column], chunksize=chunk_size, engine="c")
+        for chunk in reader:
+            yield pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=float)
+        return
+    # Excel 無法分塊讀取，只讀取所需的一列後再分塊累加
+    values = pd.to_numeric(_read_table(uploaded, name, usecols=[column])[column], errors="coerce").to_numpy(dtype=float)
+    for start in range(0, values.size, chunk_size):
+        yield values[start:start + chunk_size]
+
+
+def _read_table(uploaded, name, **kwargs):
+    if name.lower().endswith(".csv"):
+        return pd.read_csv(uploaded, engine="c", **kwargs)
+    return pd.read_excel(uploaded, **kwargs)
+
+
+class StreamingStats:
+    """單次遍歷的統計累加器。
+
+    每塊數據用 NumPy 向量化求出塊內均值與平方和，再按 Chan 等人的並行 Welford 公式合併，
+    同時更新最值，並以蓄水池抽樣保留固定大小的樣本用於分位數與直方圖。
+    """
+
+    def __init__(self, reservoir_size=RESERVOIR_SIZE, seed=0):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.skipped = 0  # 非數字 / 空白單元格數
+        self._reservoir = np.empty(reservoir_size)
+        self._filled = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=float).ravel()
+        finite = np.isfinite(chunk)
+        self.skipped += int(chunk.size - finite.sum())
+        chunk = chunk[finite]
+        if chunk.size == 0:
+            return self
+        n_b = chunk.size
+        mean_b = chunk.mean()
+        m2_b = np.square(chunk - mean_b).sum()
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self._sample(chunk)
+        self.n = n
+        self.min = min(self.min, chunk.min())
+        self.max = max(self.max, chunk.max())
+        return self
+
+    def _sample(self, chunk):
+        """向量化的蓄水池抽樣（Algorithm R）：先填滿，之後第 i 個元素以 k/(i+1) 的概率替換"""
+        k = self._reservoir.size
+        take = min(k - self._filled, chunk.size)
+        if take > 0:
+            self._reservoir[self._filled:self._filled + take] = chunk[:take]
+            self._filled += take
+        rest = chunk[take:]
+        if rest.size:
+            seen = np.arange(self.n + take, self.n + take + rest.size)
+            slots = self._rng.integers(0, seen + 1)
+            keep = slots < k
+            self._reservoir[slots[keep]] = rest[keep]
+
+    @property
+    def exact(self):
+        """數據量不超過蓄水池大小時，分位數與直方圖是精確值"""
+        return self.n <= self._reservoir.size
+
+    @property
+    def var(self):
+        """總體方差（與 np.var 一致）"""
+        return self.m2 / self.n if self.n else float("nan")
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.var))
+
+    def quantiles(self, qs=(0.25, 0.5, 0.75)):
+        return np.quantile(self._reservoir[:self._filled], qs)
+
+    def histogram(self, bins=30):
+        """在服務器端分箱，返回 (各箱計數, 箱邊界)；抽樣時按總數等比放大"""
+        counts, edges = np.histogram(self._reservoir[:self._filled], bins=bins, range=(self.min, self.max))
+        if not self.exact:
+            counts = np.round(counts * self.n / self._filled).astype(int)
+        return counts, edges
+
+    def box(self):
+        """箱形圖所需的五數概括（須在圖上直接使用，瀏覽器不需要原始數據）"""
+        q1, median, q3 = self.quantiles()
+        iqr = q3 - q1
+        return {
+            "q1": q1, "median": median, "q3": q3,
+            "lowerfence": max(self.min, q1 - 1.5 * iqr),
+            "upperfence": min(self.max, q3 + 1.5 * iqr),
+            "mean": self.mean, "sd": self.std,
+        }
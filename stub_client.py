@@ -0,0 +1,179 @@
+"""離線用的模擬 AI 客戶端：按請求內容重放錄製的回答，延遲可配置，用於基準測試和壓力測試。
+
+與 google.genai.Client 提供相同的調用面（models / aio.models 的 generate_content 與
+generate_content_stream），features/common.get_ai() 在 DSE_LLM_STUB=1 時使用它，
+此時不需要 API Key。
+
+    DSE_STUB_RECORDINGS=路徑   錄製文件（JSONL），默認 .cache/llm_recordings.jsonl
+    DSE_STUB_TTFB=0.8          首個片段到達前的延遲（秒）
+    DSE_STUB_CHUNK_DELAY=0.05  之後每個片段的間隔（秒）
+    DSE_STUB_JITTER=0.2        延遲的隨機浮動比例
+
+錄製：設置 DSE_LLM_RECORD=路徑 後用真實 API Key 運行，每個回答都會追加到該文件（見 record_to）。
+沒有錄製的請求返回按提示生成的模擬回答。
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import types
+
+from llm_cache import make_key
+from prompts import estimate_tokens
+
+DEFAULT_RECORDINGS = os.getenv("DSE_STUB_RECORDINGS", os.path.join(".cache", "llm_recordings.jsonl"))
+CHUNK_CHARS = 24  # 流式回答每個片段的字符數
+
+
+def request_key(contents, config=None):
+    """錄製與重放使用的請求鍵：只看內容和固定前綴，與路由選中的模型無關"""
+    if hasattr(config, "model_dump"):
+        config = config.model_dump(exclude_none=True)
+    prefix = (config or {}).get("system_instruction")
+    return make_key("", contents, {"system_instruction": prefix} if prefix else None)
+
+
+def _text_of(contents):
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(_text_of(c) for c in contents)
+    if isinstance(contents, dict):
+        # 多輪對話的 Content 字典
+        return _text_of([part.get("text", "") for part in contents.get("parts", [])])
+    return ""
+
+
+def _usage(prompt_tokens, output_tokens, cached_tokens=0):
+    return types.SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens,
+                                 cached_content_token_count=cached_tokens)
+
+
+def load_recordings(path):
+    """讀取錄製文件，返回 {請求鍵: 記錄}；同一請求錄製多次時以最後一次為準"""
+    recordings = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    recordings[entry["key"]] = entry
+    return recordings
+
+
+class StubClient:
+    def __init__(self, api_key=None, recordings=DEFAULT_RECORDINGS, ttfb=None, chunk_delay=None, jitter=None,
+                 seed=None):
+        self.recordings = load_recordings(recordings) if isinstance(recordings, str) else dict(recordings or {})
+        self.ttfb = float(os.getenv("DSE_STUB_TTFB", 0.8)) if ttfb is None else ttfb
+        self.chunk_delay = float(os.getenv("DSE_STUB_CHUNK_DELAY", 0.05)) if chunk_delay is None else chunk_delay
+        self.jitter = float(os.getenv("DSE_STUB_JITTER", 0.2)) if jitter is None else jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.models = _Models(self)
+        self.aio = types.SimpleNamespace(models=_AsyncModels(self))
+
+    def _delay(self, seconds):
+        with self._lock:
+            return max(0.0, seconds * (1 + self._random.uniform(-self.jitter, self.jitter)))
+
+    def _answer(self, model, contents, config):
+        """返回 (回答文本, usage)；沒有錄製時按提示生成模擬回答"""
+        with self._lock:
+            self.calls += 1
+        entry = self.recordings.get(request_key(contents, config))
+        prompt_text = _text_of(contents)
+        if entry:
+            return entry["text"], _usage(*entry.get("usage", (estimate_tokens(prompt_text), 0)))
+        text = f"（模擬回答 · {model}）{prompt_text[:80]}\n\n" + "這是離線模擬客戶端生成的回答。" * 8
+        return text, _usage(estimate_tokens(prompt_text), estimate_tokens(text))
+
+    def _chunks(self, text, usage):
+        pieces = [text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)] or [""]
+        for i, piece in enumerate(pieces):
+            # 與 SDK 一樣，用量統計隨最後一個片段返回
+            yield types.SimpleNamespace(text=piece, usage_metadata=usage if i == len(pieces) - 1 else None)
+
+
+class _Models:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def generate_content(self, *, model, contents, config=None, **kwargs):
+        text, usage = self._owner._answer(model, contents, config)
+        chunks = len(text) // CHUNK_CHARS
+        time.sleep(self._owner._delay(self._owner.ttfb + chunks * self._owner.chunk_delay))
+        return types.SimpleNamespace(text=text, usage_metadata=usage)
+
+    def generate_content_stream(self, *, model, contents, config=None, **kwargs):
+        text, usage = self._owner._answer(model, contents, config)
+        time.sleep(self._owner._delay(self._owner.ttfb))
+        for i, chunk in enumerate(self._owner._chunks(text, usage)):
+            if i:
+                time.sleep(self._owner._delay(self._owner.chunk_delay))
+            yield chunk
+
+
+class _AsyncModels:
+    def __init__(self, owner):
+        self._owner = owner
+
+    async def generate_content(self, *, model, contents, config=None, **kwargs):
+        text, usage = self._owner._answer(model, contents, config)
+        chunks = len(text) // CHUNK_CHARS
+        await asyncio.sleep(self._owner._delay(self._owner.ttfb + chunks * self._owner.chunk_delay))
+        return types.SimpleNamespace(text=text, usage_metadata=usage)
+
+    async def generate_content_stream(self, *, model, contents, config=None, **kwargs):
+        text, usage = self._owner._answer(model, contents, config)
+
+        async def stream():
+            await asyncio.sleep(self._owner._delay(self._owner.ttfb))
+            for i, chunk in enumerate(self._owner._chunks(text, usage)):
+                if i:
+                    await asyncio.sleep(self._owner._delay(self._owner.chunk_delay))
+                yield chunk
+        return stream()
+
+
+def record_to(client, path):
+    """包裝真實客戶端的 aio.models，把每個成功的回答追加到錄製文件，供 StubClient 重放"""
+    lock = threading.Lock()
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    generate, generate_stream = client.aio.models.generate_content, client.aio.models.generate_content_stream
+
+    def append(model, contents, config, text, response):
+        usage = getattr(response, "usage_metadata", None)
+        entry = {"key": request_key(contents, config), "model": model, "text": text,
+                 "usage": [getattr(usage, "prompt_token_count", None) or 0,
+                           getattr(usage, "candidates_token_count", None) or 0,
+                           getattr(usage, "cached_content_token_count", None) or 0]}
+        with lock, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    async def recorded_generate(*, model, contents, config=None, **kwargs):
+        res = await generate(model=model, contents=contents, config=config, **kwargs)
+        if res.text:
+            append(model, contents, config, res.text, res)
+        return res
+
+    async def recorded_stream(*, model, contents, config=None, **kwargs):
+        it = await generate_stream(model=model, contents=contents, config=config, **kwargs)
+
+        async def stream():
+            parts, last = [], None
+            async for chunk in it:
+                parts.append(chunk.text or "")
+                last = chunk
+                yield chunk
+            if parts:
+                append(model, contents, config, "".join(parts), last)
+        return stream()
+
+    client.aio.models.generate_content = recorded_generate
+    client.aio.models.generate_content_stream = recorded_stream
+    return client
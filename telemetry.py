@@ -0,0 +1,290 @@
+"""AI 調用遙測：按功能記錄模型、首字節時間（TTFB）與總耗時、輸入 / 輸出 token、緩存命中和錯誤。
+
+輸入 token 中命中提示前綴緩存（上下文緩存）的部分單獨記錄，按折扣價估算費用並統計節省的金額。
+
+記錄寫入本地 SQLite（WAL，可多進程共享），供管理頁顯示各功能的 p50 / p95 / p99 與估算費用，
+也可以導出 Prometheus 文本格式：
+
+    python telemetry.py prometheus          # 輸出一次
+    python telemetry.py serve [端口]        # 啟動 /metrics 供 Prometheus 抓取（默認 9464）
+"""
+import math
+import os
+import sqlite3
+import sys
+import time
+
+from db import connect
+
+DEFAULT_DB_PATH = os.getenv("DSE_METRICS_PATH", os.path.join(".cache", "metrics.sqlite3"))
+RETENTION_DAYS = int(os.getenv("DSE_METRICS_RETENTION_DAYS", 30))
+QUANTILES = (0.5, 0.95, 0.99)
+# 每百萬 token 的美元價格（輸入, 輸出），只用於估算；未列出的模型不計費用
+# 命中隱式上下文緩存的輸入 token 按輸入價的 CACHED_INPUT_RATE 計
+MODEL_PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gpt-5-mini": (0.25, 2.00),
+}
+CACHED_INPUT_RATE = 0.25
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS llm_calls ("
+    " id INTEGER PRIMARY KEY, ts REAL NOT NULL, feature TEXT NOT NULL, model TEXT NOT NULL,"
+    " stream INTEGER NOT NULL, ttfb_ms REAL, total_ms REAL NOT NULL,"
+    " input_tokens INTEGER NOT NULL DEFAULT 0, output_tokens INTEGER NOT NULL DEFAULT 0,"
+    " cached INTEGER NOT NULL DEFAULT 0, error TEXT, cached_tokens INTEGER NOT NULL DEFAULT 0)",
+    "CREATE INDEX IF NOT EXISTS idx_llm_calls_ts ON llm_calls(ts)",
+    # 累計值：明細按保留期刪除，這裡只增不減，供 Prometheus 的 counter 使用（rate() 要求單調）
+    "CREATE TABLE IF NOT EXISTS llm_totals ("
+    " feature TEXT NOT NULL, model TEXT NOT NULL, calls INTEGER NOT NULL DEFAULT 0,"
+    " errors INTEGER NOT NULL DEFAULT 0, cache_hits INTEGER NOT NULL DEFAULT 0,"
+    " input_tokens INTEGER NOT NULL DEFAULT 0, output_tokens INTEGER NOT NULL DEFAULT 0,"
+    " cached_tokens INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (feature, model))",
+]
+_TOTAL_COLUMNS = ("calls", "errors", "cache_hits", "input_tokens", "output_tokens", "cached_tokens")
+# 舊版數據庫缺少的列
+_MIGRATIONS = {"cached_tokens": "ALTER TABLE llm_calls ADD COLUMN cached_tokens INTEGER NOT NULL DEFAULT 0"}
+
+
+def estimate_cost(model, input_tokens, output_tokens, cached_tokens=0):
+    """估算費用（美元）；cached_tokens 是 input_tokens 中命中上下文緩存的部分"""
+    price = MODEL_PRICES.get(model)
+    if not price:
+        return 0.0
+    billed_input = input_tokens - cached_tokens + cached_tokens * CACHED_INPUT_RATE
+    return (billed_input * price[0] + output_tokens * price[1]) / 1e6
+
+
+def estimate_savings(model, cached_tokens):
+    """上下文緩存節省的輸入費用（美元）"""
+    price = MODEL_PRICES.get(model)
+    return cached_tokens * price[0] * (1 - CACHED_INPUT_RATE) / 1e6 if price else 0.0
+
+
+def usage_tokens(response):
+    """從 SDK 響應的 usage_metadata 取 (輸入, 輸出, 其中命中上下文緩存的輸入) token 數；沒有統計時為 0"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0, 0, 0
+    return (getattr(usage, "prompt_token_count", None) or 0,
+            getattr(usage, "candidates_token_count", None) or 0,
+            getattr(usage, "cached_content_token_count", None) or 0)
+
+
+def percentile(sorted_values, q):
+    """最近秩（nearest-rank）百分位數；sorted_values 須已排序"""
+    if not sorted_values:
+        return None
+    rank = min(max(1, math.ceil(len(sorted_values) * q)), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+class CallTimer:
+    """計時一次調用：first_byte() 標記首個片段到達，finish() 寫入記錄（只寫一次）"""
+
+    def __init__(self, store, feature, model, stream):
+        self.store, self.feature, self.model, self.stream = store, feature, model, stream
+        self.started = time.perf_counter()
+        self.ttfb = None
+        self.done = False
+
+    def first_byte(self):
+        if self.ttfb is None:
+            self.ttfb = time.perf_counter() - self.started
+
+    def finish(self, input_tokens=0, output_tokens=0, cached_tokens=0, cached=False, error=None):
+        if self.done or self.store is None:
+            return
+        self.done = True
+        total = time.perf_counter() - self.started
+        try:
+            self.store.record(self.feature, self.model, total, self.ttfb if self.ttfb is not None else total,
+                              input_tokens, output_tokens, cached, error, stream=self.stream, cached_tokens=cached_tokens)
+        except sqlite3.Error:
+            # 遙測寫入失敗（如磁盤只讀）不影響正常回答
+            pass
+
+
+class MetricsStore:
+    """每次操作使用獨立連接，可在多個會話 / 線程之間共享"""
+
+    def __init__(self, path=DEFAULT_DB_PATH, retention_days=RETENTION_DAYS):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            new_totals = not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'llm_totals'").fetchone()
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(llm_calls)")}
+            for column, stmt in _MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(stmt)
+            if new_totals:
+                # 舊版數據庫：累計值從尚未刪除的明細開始
+                conn.execute(
+                    "INSERT INTO llm_totals SELECT feature, model, COUNT(*), COUNT(error),"
+                    " SUM(cached AND error IS NULL), SUM(input_tokens), SUM(output_tokens), SUM(cached_tokens)"
+                    " FROM llm_calls GROUP BY feature, model")
+            if retention_days:
+                conn.execute("DELETE FROM llm_calls WHERE ts < ?", (time.time() - retention_days * 86400,))
+
+    def _connect(self):
+        return connect(self.path)
+
+    def timer(self, feature, model, stream=False):
+        return CallTimer(self, feature, model, stream)
+
+    def record(self, feature, model, total, ttfb=None, input_tokens=0, output_tokens=0, cached=False, error=None,
+               stream=False, cached_tokens=0):
+        """寫入一次調用；total / ttfb 單位為秒"""
+        feature = feature or "other"
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO llm_calls (ts, feature, model, stream, ttfb_ms, total_ms, input_tokens, output_tokens,"
+                " cached, error, cached_tokens) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), feature, model, int(stream), None if ttfb is None else ttfb * 1000,
+                 total * 1000, int(input_tokens), int(output_tokens), int(bool(cached)), error, int(cached_tokens)),
+            )
+            conn.execute(
+                "INSERT INTO llm_totals VALUES (?, ?, 1, ?, ?, ?, ?, ?) ON CONFLICT (feature, model) DO UPDATE SET"
+                " calls = calls + 1, errors = errors + excluded.errors, cache_hits = cache_hits + excluded.cache_hits,"
+                " input_tokens = input_tokens + excluded.input_tokens,"
+                " output_tokens = output_tokens + excluded.output_tokens,"
+                " cached_tokens = cached_tokens + excluded.cached_tokens",
+                (feature, model, int(error is not None), int(bool(cached) and error is None), int(input_tokens),
+                 int(output_tokens), int(cached_tokens)),
+            )
+
+    def totals(self):
+        """按 (功能, 模型) 的累計值（不受保留期影響，只增不減），含估算費用與節省"""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT feature, model, {', '.join(_TOTAL_COLUMNS)} FROM llm_totals"
+                                " ORDER BY feature, model").fetchall()
+        result = []
+        for feature, model, *values in rows:
+            g = dict(zip(_TOTAL_COLUMNS, values), feature=feature, model=model)
+            g["cost_usd"] = estimate_cost(model, g["input_tokens"], g["output_tokens"], g["cached_tokens"])
+            g["saved_usd"] = estimate_savings(model, g["cached_tokens"])
+            result.append(g)
+        return result
+
+    def summary(self, since=None):
+        """按 (功能, 模型) 匯總：調用數、錯誤數、緩存命中、token（含前綴緩存命中部分）、估算費用與節省、耗時百分位（毫秒）。
+
+        百分位只統計真正發往模型且成功的調用，緩存命中和錯誤另計，以免拉低延遲分佈。
+        """
+        since = since or 0
+        groups = {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT feature, model, cached, error, ttfb_ms, total_ms, input_tokens, output_tokens, cached_tokens"
+                " FROM llm_calls WHERE ts >= ? ORDER BY feature, model, total_ms", (since,),
+            ).fetchall()
+        for feature, model, cached, error, ttfb, total, tin, tout, tcached in rows:
+            g = groups.setdefault((feature, model), {
+                "feature": feature, "model": model, "calls": 0, "errors": 0, "cache_hits": 0,
+                "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "_total": [], "_ttfb": [],
+            })
+            g["calls"] += 1
+            g["input_tokens"] += tin
+            g["output_tokens"] += tout
+            g["cached_tokens"] += tcached
+            if error:
+                g["errors"] += 1
+            elif cached:
+                g["cache_hits"] += 1
+            else:
+                g["_total"].append(total)
+                if ttfb is not None:
+                    g["_ttfb"].append(ttfb)
+        result = []
+        for g in groups.values():
+            latencies, ttfbs = g.pop("_total"), sorted(g.pop("_ttfb"))
+            g["cost_usd"] = estimate_cost(g["model"], g["input_tokens"], g["output_tokens"], g["cached_tokens"])
+            g["saved_usd"] = estimate_savings(g["model"], g["cached_tokens"])
+            for q in QUANTILES:
+                g[f"p{int(q * 100)}_ms"] = percentile(latencies, q)
+                g[f"ttfb_p{int(q * 100)}_ms"] = percentile(ttfbs, q)
+            result.append(g)
+        return result
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(store, window=3600):
+    """Prometheus 文本格式：計數器為只增不減的累計值（見 MetricsStore.totals），延遲百分位取最近 window 秒"""
+    lines = []
+    totals, recent = store.totals(), store.summary(time.time() - window)
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if value is None:
+                continue
+            text = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+            lines.append(f"{name}{{{text}}} {value:g}")
+
+    def by(g, **extra):
+        return dict({"feature": g["feature"], "model": g["model"]}, **extra)
+
+    metric("dse_llm_requests_total", "counter", "AI calls by feature and model.",
+           [(by(g), g["calls"]) for g in totals])
+    metric("dse_llm_errors_total", "counter", "Failed AI calls.", [(by(g), g["errors"]) for g in totals])
+    metric("dse_llm_cache_hits_total", "counter", "AI calls answered from the response cache.",
+           [(by(g), g["cache_hits"]) for g in totals])
+    metric("dse_llm_tokens_total", "counter", "Tokens sent to / generated by the model.",
+           [(by(g, direction="input"), g["input_tokens"]) for g in totals]
+           + [(by(g, direction="output"), g["output_tokens"]) for g in totals]
+           + [(by(g, direction="cached_input"), g["cached_tokens"]) for g in totals])
+    metric("dse_llm_cost_usd_total", "counter", "Estimated spend in USD.", [(by(g), g["cost_usd"]) for g in totals])
+    metric("dse_llm_prefix_cache_savings_usd_total", "counter", "Estimated input spend saved by context caching.",
+           [(by(g), g["saved_usd"]) for g in totals])
+    for name, prefix, help_text in (("dse_llm_latency_seconds", "p", "Total AI call latency."),
+                                    ("dse_llm_ttfb_seconds", "ttfb_p", "Time to first byte of AI calls.")):
+        samples = []
+        for g in recent:
+            for q in QUANTILES:
+                ms = g[f"{prefix}{int(q * 100)}_ms"]
+                samples.append((by(g, quantile=q), None if ms is None else ms / 1000))
+        metric(name, "summary", f"{help_text} Quantiles over the last {window}s.", samples)
+    return "\n".join(lines) + "\n"
+
+
+def serve(port=9464, path=DEFAULT_DB_PATH):
+    """以標準庫 http.server 提供 /metrics"""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    store = MetricsStore(path)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text(store).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    print(f"metrics: http://0.0.0.0:{port}/metrics")
+    HTTPServer(("", port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "prometheus":
+        sys.stdout.write(prometheus_text(MetricsStore()))
+    elif len(sys.argv) >= 2 and sys.argv[1] == "serve":
+        serve(int(sys.argv[2]) if len(sys.argv) >= 3 else 9464)
+    else:
+        sys.exit(__doc__)
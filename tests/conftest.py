@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 測試直接導入倉庫根目錄下的模塊
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
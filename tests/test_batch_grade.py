@@ -0,0 +1,107 @@
+"""整班批量批改：壓縮包的文件數與解壓大小上限，以及中斷後從檢查點續批。"""
+import collections
+import io
+import threading
+import zipfile
+
+import pytest
+
+import batch_grade
+from batch_grade import Checkpoint, batch_id, extract_grade, load_submissions, run_batch
+
+
+def _zip(files, compression=zipfile.ZIP_DEFLATED):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", compression) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    return out.getvalue()
+
+
+def test_students_from_files_and_folders():
+    data = _zip({"4A班/陳大文.txt": "作文", "4A班/李小明/p1.jpg": b"\xff", "4A班/李小明/p2.png": b"\x89",
+                 "4A班/.DS_Store": b"", "__MACOSX/4A班/._陳大文.txt": b"", "4A班/notes.pdf": b"%PDF"})
+    subs = load_submissions([("class.zip", data)])
+    assert [(s.student, s.text, len(s.images)) for s in subs] == [("李小明", "", 2), ("陳大文", "作文", 0)]
+
+
+def test_too_many_entries_rejected(monkeypatch):
+    monkeypatch.setattr(batch_grade, "MAX_ENTRIES", 5)
+    data = _zip({f"s{i}.txt": "x" for i in range(6)})
+    with pytest.raises(ValueError, match="過多"):
+        load_submissions([("class.zip", data)])
+
+
+def test_oversized_entry_rejected_before_reading(monkeypatch):
+    monkeypatch.setattr(batch_grade, "MAX_FILE_BYTES", 1024 * 1024)
+    # 1 MB 以上的零字節壓縮後只有約 1 KB
+    data = _zip({"bomb.txt": b"0" * (2 * 1024 * 1024)})
+    assert len(data) < 10 * 1024
+    with pytest.raises(ValueError, match="MB"):
+        load_submissions([("class.zip", data)])
+
+
+def test_total_size_capped_across_files_and_zips(monkeypatch):
+    monkeypatch.setattr(batch_grade, "MAX_TOTAL_BYTES", 3000)
+    data = _zip({f"s{i}.txt": "x" * 1000 for i in range(2)})
+    assert len(load_submissions([("a.zip", data)])) == 2
+    with pytest.raises(ValueError, match="總大小"):
+        load_submissions([("a.zip", data), ("b.zip", _zip({"t.txt": "y" * 1500}))])
+    with pytest.raises(ValueError, match="總大小"):
+        load_submissions([("c.txt", b"z" * 1500), ("a.zip", data)])
+
+
+def test_bad_zip_rejected():
+    with pytest.raises(ValueError, match="無法解壓"):
+        load_submissions([("class.zip", b"not a zip")])
+
+
+def test_extract_grade():
+    assert extract_grade("GRADE: Level 4\n評語") == "Level 4"
+    assert extract_grade("**等级：5***") == "5"
+    assert extract_grade("沒有等級") == ""
+
+
+def _submissions(n):
+    return load_submissions([(f"s{i:02d}.txt", f"作業 {i}".encode()) for i in range(n)])
+
+
+def test_resume_after_interrupted_run(tmp_path):
+    subs = _submissions(6)
+    checkpoint = Checkpoint(batch_id("eng_essay", "批改", subs), directory=str(tmp_path))
+    calls, lock = [], threading.Lock()
+
+    def grade(sub):
+        with lock:
+            calls.append(sub.student)
+        if sub.student == "s03":
+            raise RuntimeError("timeout")
+        return f"GRADE: {sub.student}"
+
+    # 第一次：讀到兩行後頁面停止，未開始的請求被取消
+    rows = run_batch(subs, grade, checkpoint, workers=1)
+    first = [next(rows), next(rows)]
+    rows.close()
+    assert all(not r["resumed"] for r in first)
+    # 崩潰時寫了一半的最後一行
+    with open(checkpoint.path, "a", encoding="utf-8") as f:
+        f.write('{"student": "s0')
+    done_before = len(checkpoint.load())
+
+    second = list(run_batch(subs, grade, checkpoint, workers=2))
+    assert sorted(r["student"] for r in second) == [s.student for s in subs]
+    assert sum(r["resumed"] for r in second) == done_before
+    # 已完成的學生不會再次批改，只有失敗的 s03 會在下次重試
+    counts = collections.Counter(calls)
+    assert all(counts[s.student] == 1 for s in subs if s.student != "s03")
+    assert counts["s03"] in (1, 2)
+    (failed,) = [r for r in second if r["error"]]
+    assert failed["student"] == "s03" and not failed["resumed"]
+    third = list(run_batch(subs, grade, checkpoint))
+    assert sum(r["resumed"] for r in third) == 5
+
+
+def test_batch_id_tracks_content():
+    assert batch_id("f", "i", _submissions(2)) == batch_id("f", "i", _submissions(2))
+    assert batch_id("f", "i", _submissions(2)) != batch_id("f", "i2", _submissions(2))
+    assert batch_id("f", "i", _submissions(2)) != batch_id("f", "i", _submissions(3))
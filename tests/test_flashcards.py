@@ -0,0 +1,73 @@
+"""間隔重複：SM-2 的間隔與難度係數變化，以及卡片庫的到期查詢與複習記錄。"""
+import pytest
+
+from flashcards import DAY, DEFAULT_EASE, MIN_EASE, RELEARN_DELAY, CardDeck, describe_interval, schedule
+
+NEW = {"interval": 0, "ease": DEFAULT_EASE, "reps": 0, "lapses": 0}
+
+
+def _run(qualities, now=0.0):
+    state, history = dict(NEW), []
+    for quality in qualities:
+        state = schedule(state, quality, now)
+        history.append(state)
+        now = state["due"]
+    return history
+
+
+def test_intervals_grow_by_ease():
+    history = _run([4, 4, 4, 4])
+    assert [s["interval"] for s in history] == [1, 6, 15, 38]
+    assert all(s["ease"] == pytest.approx(DEFAULT_EASE) for s in history)
+    assert history[1]["due"] - history[0]["due"] == 6 * DAY
+
+
+@pytest.mark.parametrize("quality, delta", [(5, 0.1), (4, 0.0), (3, -0.14)])
+def test_ease_adjusts_with_quality(quality, delta):
+    assert schedule(NEW, quality, 0)["ease"] == pytest.approx(DEFAULT_EASE + delta)
+
+
+def test_easy_answers_lengthen_intervals():
+    easy, good = _run([5, 5, 5]), _run([4, 4, 4])
+    assert easy[-1]["interval"] > good[-1]["interval"]
+
+
+def test_lapse_resets_and_relearns_soon():
+    state = _run([4, 4, 4])[-1]
+    lapsed = schedule(state, 1, now=100.0)
+    assert (lapsed["reps"], lapsed["interval"], lapsed["lapses"]) == (0, 0, 1)
+    assert lapsed["due"] == 100.0 + RELEARN_DELAY
+    assert lapsed["ease"] == pytest.approx(DEFAULT_EASE - 0.54)
+    # 重新記住後從 1 天開始
+    assert schedule(lapsed, 4, now=200.0)["interval"] == 1
+
+
+def test_ease_never_below_minimum():
+    history = _run([1] * 10)
+    assert min(s["ease"] for s in history) == pytest.approx(MIN_EASE)
+
+
+def test_describe_interval():
+    assert describe_interval({"due": 600}, now=0) == "10 分钟"
+    assert describe_interval({"due": 6 * 3600}, now=0) == "6 小时"
+    assert describe_interval({"due": 6 * DAY}, now=0) == "6 天"
+
+
+def test_deck_review_flow(tmp_path):
+    deck = CardDeck(str(tmp_path / "f.db"))
+    card = deck.add_card("eng_word", "  Resilient ", "能迅速恢復的")
+    assert deck.add_card("eng_word", "resilient", "另一個解釋")["content"] == "能迅速恢復的"
+    assert deck.add_cards("eng_word", [("ambiguous", "模稜兩可的"), ("", "x"), ("candid", "")]) == 1
+    assert deck.missing("eng_word", ["Ambiguous", "diligent", "diligent"]) == ["diligent"]
+    assert deck.enroll("u", card["id"], now=0) is True
+    assert deck.enroll("u", card["id"], now=0) is False
+    assert deck.enroll_new("u", "eng_word", now=0) == 1
+    assert deck.counts("u", "eng_word", now=0) == (2, 2)
+    state = deck.review("u", card["id"], 4, now=0)
+    assert state["interval"] == 1
+    assert [c["front"] for c in deck.due("u", "eng_word", now=0)] == ["ambiguous"]
+    assert [c["front"] for c in deck.due("u", "eng_word", now=DAY)] == ["ambiguous", "resilient"]
+    # 進度按用戶分開
+    assert deck.counts("other", "eng_word", now=0) == (0, 0)
+    with pytest.raises(KeyError):
+        deck.review("other", card["id"], 4)
@@ -0,0 +1,76 @@
+"""函數繪圖：自適應取樣在間斷處加密並斷開曲線；參數族範圍在展開前檢查個數與方向。"""
+import time
+
+import numpy as np
+import pytest
+
+from grapher import MAX_FAMILY, adaptive_sample, parse_family
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("a*x^2 ; a = -2, -1, 1, 2", ("a*x^2", (("a", (-2.0, -1.0, 1.0, 2.0)),))),
+    ("a*x ; a = -1:1:0.5", ("a*x", (("a", (-1.0, -0.5, 0.0, 0.5, 1.0)),))),
+    ("a*x ; a = 0:0.3:0.1", ("a*x", (("a", (0.0, 0.1, 0.2, 0.3)),))),
+    ("a*x ; a = 1:3", ("a*x", (("a", (1.0, 2.0, 3.0)),))),
+    ("a*x ; a = 2:2", ("a*x", (("a", (2.0,)),))),
+    ("x^2", ("x^2", ())),
+])
+def test_parse_family(line, expected):
+    assert parse_family(line) == expected
+
+
+@pytest.mark.parametrize("spec", ["0:1e7", "0:1e12", "0:1e300:1e-300", f"1:{MAX_FAMILY + 1}"])
+def test_parse_family_rejects_large_ranges_before_expanding(spec):
+    started = time.perf_counter()
+    with pytest.raises(ValueError, match="最多"):
+        parse_family(f"a*x ; a = {spec}")
+    assert time.perf_counter() - started < 0.5
+
+
+@pytest.mark.parametrize("spec", ["0:1:0", "0:1:-1", "2:1", "0:inf", "nan:1", "0:1:2:3", "a:b"])
+def test_parse_family_rejects_bad_ranges(spec):
+    with pytest.raises(ValueError):
+        parse_family(f"a*x ; a = {spec}")
+
+
+def test_parse_family_limits_product_of_families():
+    with pytest.raises(ValueError):
+        parse_family("a*x+b ; a = 1:5 ; b = 1:5")
+
+
+def test_adaptive_sample_keeps_smooth_curves_uniform():
+    x_vals, y_vals = adaptive_sample(lambda x: 2 * x + 1, -10, 10, initial=200)
+    assert len(x_vals) == 200
+    assert np.isfinite(y_vals).all()
+
+
+def test_adaptive_sample_refines_and_breaks_at_jump():
+    x_vals, y_vals = adaptive_sample(np.sign, -10, 10, initial=200)
+    uniform_step = 20 / 199
+    near = (x_vals > -uniform_step) & (x_vals < uniform_step)
+    assert np.diff(x_vals[near]).min() < uniform_step / 1000
+    # 跳躍處插入 NaN，兩側不會連成豎線
+    finite = np.isfinite(y_vals)
+    assert not (finite[:-1] & finite[1:] & (np.abs(np.diff(y_vals)) > 1)).any()
+    assert np.isnan(y_vals).any()
+
+
+def test_adaptive_sample_separates_asymptote():
+    x_vals, y_vals = adaptive_sample(lambda x: 1 / x, -10, 10)
+    finite = np.isfinite(y_vals)
+    assert np.abs(x_vals[finite]).min() < 1e-2
+    # 相鄰的兩個有限點不會跨過 x = 0
+    crossing = finite[:-1] & finite[1:] & (np.sign(x_vals[:-1]) != np.sign(x_vals[1:]))
+    assert not crossing.any()
+
+
+def test_adaptive_sample_finds_domain_boundary():
+    x_vals, y_vals = adaptive_sample(np.sqrt, -10, 10)
+    assert x_vals[np.isfinite(y_vals)].min() < 1e-6
+
+
+def test_adaptive_sample_respects_budget():
+    x_vals, y_vals = adaptive_sample(lambda x: np.sin(1 / x), -1, 1, budget=500)
+    # 超出預算的只有 _break_jumps 插入的斷點
+    assert len(x_vals) <= 500 + np.isnan(y_vals).sum()
+    assert np.all(np.diff(x_vals) >= 0)
@@ -0,0 +1,48 @@
+"""上傳圖片預處理：損壞的文件報 ValueError，透明背景轉為白色。"""
+import io
+
+import pytest
+from PIL import Image
+
+from image_prep import PreparedImageCache, preprocess_image
+
+
+def _encode(img, fmt="PNG"):
+    out = io.BytesIO()
+    img.save(out, fmt)
+    return out.getvalue()
+
+
+def _decode(data):
+    return Image.open(io.BytesIO(data))
+
+
+def test_resizes_to_grayscale_jpeg():
+    img = _decode(preprocess_image(_encode(Image.new("RGB", (3200, 800), "red")), max_side=1600))
+    assert (img.format, img.mode, img.size) == ("JPEG", "L", (1600, 400))
+
+
+@pytest.mark.parametrize("data", [b"", b"not an image", _encode(Image.new("RGB", (400, 400), "blue"))[:200],
+                                  _encode(Image.new("RGB", (400, 400), "blue"), "JPEG")[:300]])
+def test_corrupt_or_truncated_raises_value_error(data):
+    with pytest.raises(ValueError):
+        preprocess_image(data)
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "LA"])
+def test_transparent_areas_become_white(mode):
+    img = _decode(preprocess_image(_encode(Image.new(mode, (50, 50), 0))))
+    assert img.getpixel((25, 25)) > 250
+
+
+def test_palette_transparency_becomes_white():
+    img = Image.new("P", (50, 50), 0)
+    img.info["transparency"] = 0
+    assert _decode(preprocess_image(_encode(img))).getpixel((25, 25)) > 250
+
+
+def test_cache_reuses_prepared_bytes():
+    cache = PreparedImageCache(max_entries=1)
+    data = _encode(Image.new("RGB", (20, 20), "white"))
+    assert cache.get(data) == cache.get(data)
+    assert (cache.hits, cache.misses) == (1, 1)
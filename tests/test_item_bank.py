@@ -0,0 +1,84 @@
+"""自適應測驗：Elo 更新的方向與幅度、選題策略，以及並發作答時能力與難度不丟失更新。"""
+import math
+import threading
+import types
+
+import numpy as np
+import pytest
+
+from item_bank import K_ITEM, K_USER, K_USER_MIN, QuizStore, elo_update, p_correct, select_item
+
+
+def _bank(n=3):
+    return types.SimpleNamespace(ids=[f"q{i}" for i in range(n)], subject_names=["math"],
+                                 subject_codes=np.zeros(n, dtype=int), difficulty=np.zeros(n))
+
+
+def test_p_correct_is_rasch():
+    assert p_correct(0.0, 0.0) == pytest.approx(0.5)
+    assert p_correct(1.0, 0.0) == pytest.approx(1 / (1 + math.exp(-1)))
+    np.testing.assert_allclose(p_correct(0.0, np.array([-1.0, 1.0])).sum(), 1.0)
+
+
+def test_elo_update_direction_and_magnitude():
+    theta, b, p = elo_update(0.0, 0.0, correct=True)
+    assert p == pytest.approx(0.5)
+    assert theta == pytest.approx(K_USER * 0.5)
+    assert b == pytest.approx(-K_ITEM * 0.5)
+    theta, b, _ = elo_update(0.0, 0.0, correct=False)
+    assert (theta, b) == (pytest.approx(-K_USER * 0.5), pytest.approx(K_ITEM * 0.5))
+
+
+def test_surprising_answers_move_more():
+    hard = elo_update(0.0, 2.0, correct=True)[0]
+    easy = elo_update(0.0, -2.0, correct=True)[0]
+    assert hard > easy > 0
+    assert elo_update(0.0, -2.0, correct=False)[0] < elo_update(0.0, 2.0, correct=False)[0] < 0
+
+
+def test_step_shrinks_with_attempts():
+    steps = [elo_update(0.0, 0.0, True, user_attempts=n)[0] for n in (0, 10, 1000)]
+    assert steps == [pytest.approx(K_USER * 0.5), pytest.approx(K_USER / 2 * 0.5), pytest.approx(K_USER_MIN * 0.5)]
+
+
+def test_select_item_targets_success_rate():
+    difficulty = np.linspace(-3, 3, 61)
+    candidates = np.arange(61)
+    pos = select_item(1.0, difficulty, candidates, top_k=1)
+    assert p_correct(1.0, difficulty[pos]) == pytest.approx(0.7, abs=0.02)
+    picks = {select_item(1.0, difficulty, candidates, rng=np.random.default_rng(seed)) for seed in range(50)}
+    assert len(picks) == 5
+    assert all(abs(p_correct(1.0, difficulty[p]) - 0.7) < 0.06 for p in picks)
+
+
+def test_select_item_skips_seen_until_exhausted():
+    difficulty = np.array([0.0, -0.85, -0.8, 3.0])
+    candidates = np.array([1, 2, 3])
+    seen = np.array([False, True, True, False])
+    assert select_item(0.0, difficulty, candidates, seen=seen, top_k=2) == 3
+    seen[3] = True
+    assert select_item(0.0, difficulty, candidates, seen=seen, top_k=1) == 1
+    assert select_item(0.0, difficulty, np.array([], dtype=int)) is None
+
+
+def test_concurrent_answers_do_not_lose_updates(tmp_path):
+    store, bank = QuizStore(str(tmp_path / "q.db")), _bank()
+    errors = []
+
+    def answer(i):
+        try:
+            for n in range(20):
+                store.record("u", bank, n % 3, correct=(i + n) % 2 == 0)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=answer, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert store.ability("u", "math")[1] == 120
+    with store._connect() as conn:
+        attempts = dict(conn.execute("SELECT item_id, attempts FROM item_stats").fetchall())
+    assert attempts == {"q0": 42, "q1": 42, "q2": 36}
@@ -0,0 +1,86 @@
+"""後台任務隊列：重啟後繼續執行遺留任務，重複提交在 reuse_ttl 內沿用已完成結果。"""
+import sqlite3
+import time
+
+import pytest
+
+from job_queue import JobQueue
+
+
+def _wait(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["state"] not in ("queued", "running"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"任務未完成：{queue.get(job_id)}")
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+def test_queued_job_survives_restart(path):
+    # 提交後進程退出：任務留在隊列中，工作線程沒有啟動
+    before = JobQueue(path, handlers={"echo": lambda p: p})
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO jobs (id, owner, kind, dedupe_key, payload, state, created, run_after)"
+                     " VALUES ('j1', 'u', 'echo', 'k', '{\"n\": 1}', 'queued', ?, ?)", (time.time(), time.time()))
+    assert before.pending() == 1
+    after = JobQueue(path, handlers={"echo": lambda p: p}, poll_interval=0.05)
+    after.start()
+    try:
+        assert _wait(after, "j1")["result"] == {"n": 1}
+        assert after.pending() == 0
+    finally:
+        after.stop(1)
+
+
+def test_expired_lease_is_reclaimed(path):
+    queue = JobQueue(path, handlers={"echo": lambda p: p}, poll_interval=0.05)
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO jobs (id, owner, kind, dedupe_key, payload, state, attempts, created, run_after,"
+                     " started, lease_until) VALUES ('j1', 'u', 'echo', 'k', '2', 'running', 1, ?, ?, ?, ?)",
+                     (time.time() - 20, time.time() - 20, time.time() - 20, time.time() - 10))
+    queue.start()
+    try:
+        job = _wait(queue, "j1")
+        assert (job["state"], job["result"], job["attempts"]) == ("done", 2, 2)
+    finally:
+        queue.stop(1)
+
+
+def test_resubmit_reuses_recent_result_only(path):
+    calls = []
+    queue = JobQueue(path, handlers={"echo": lambda p: calls.append(p) or p}, poll_interval=0.05, reuse_ttl=60)
+    try:
+        first = queue.submit("u", "echo", {"n": 1})
+        _wait(queue, first)
+        assert queue.submit("u", "echo", {"n": 1}) == first
+        other = queue.submit("other", "echo", {"n": 1})
+        assert other != first
+        _wait(queue, other)
+        # 超過 reuse_ttl 後重新執行
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE jobs SET finished = finished - 120 WHERE id = ?", (first,))
+        second = queue.submit("u", "echo", {"n": 1})
+        assert second != first
+        _wait(queue, second)
+        assert calls == [{"n": 1}] * 3
+    finally:
+        queue.stop(1)
+
+
+def test_failed_job_is_rerun(path):
+    def fail(payload):
+        raise RuntimeError("boom")
+
+    queue = JobQueue(path, handlers={"fail": fail}, poll_interval=0.05)
+    try:
+        first = queue.submit("u", "fail", {})
+        assert _wait(queue, first)["error"] == "RuntimeError: boom"
+        assert queue.submit("u", "fail", {}) != first
+    finally:
+        queue.stop(1)
@@ -0,0 +1,56 @@
+"""AI 回答緩存：按內容尋址、TTL 過期、按最近訪問時間淘汰。"""
+import types
+
+import pytest
+
+import llm_cache
+from llm_cache import ResponseCache, make_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_key_ignores_whitespace_and_none_config_values():
+    assert make_key("m", " 題目\r\n內容 ") == make_key("m", "題目\n內容")
+    assert make_key("m", "q", {"temperature": None}) == make_key("m", "q", {})
+    assert make_key("m", "q") != make_key("other", "q")
+    assert make_key("m", [b"img"]) != make_key("m", [b"img2"])
+
+
+def test_hit_and_miss(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "c.db"))
+    key = make_key("m", "q")
+    assert cache.get(key) is None
+    cache.set(key, "answer", model="m")
+    assert cache.get(key) == "answer"
+    # 空回答不寫入
+    cache.set(make_key("m", "empty"), "")
+    assert cache.get(make_key("m", "empty")) is None
+
+
+def test_ttl_expiry(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "c.db"), ttl=60)
+    cache.set("k", "v")
+    clock[0] += 59
+    assert cache.get("k") == "v"
+    clock[0] += 2
+    assert cache.get("k") is None
+    # 過期的記錄已刪除，時間倒回也不會再命中
+    clock[0] -= 30
+    assert cache.get("k") is None
+
+
+def test_lru_eviction_keeps_recently_read(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "c.db"), ttl=0, max_entries=2)
+    cache.set("a", "1")
+    clock[0] += 1
+    cache.set("b", "2")
+    clock[0] += 1
+    assert cache.get("a") == "1"  # a 變為最近訪問
+    clock[0] += 1
+    cache.set("c", "3")
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
@@ -0,0 +1,129 @@
+"""調度器測試：用離線模擬客戶端（stub_client.py）代替真實 API。"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_dispatch import DispatcherBusy, LLMDispatcher
+from stub_client import StubClient
+
+
+def make(ttfb=0.3, chunk_delay=0.01, **kwargs):
+    client = StubClient(recordings={}, ttfb=ttfb, chunk_delay=chunk_delay, jitter=0)
+    dispatcher = LLMDispatcher(client.aio.models.generate_content, client.aio.models.generate_content_stream,
+                               base_delay=0.01, **kwargs)
+    return client, dispatcher
+
+
+def run_threads(fn, n):
+    results, threads = [None] * n, []
+    for i in range(n):
+        def target(i=i):
+            try:
+                results[i] = fn()
+            except Exception as e:
+                results[i] = e
+        threads.append(threading.Thread(target=target))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_identical_requests_are_coalesced():
+    client, dispatcher = make()
+    results = run_threads(lambda: dispatcher.generate("k", "m", "同一个问题", timeout=5).text, 5)
+    assert client.calls == 1
+    assert len(set(results)) == 1 and isinstance(results[0], str)
+
+
+def test_waiter_timeout_does_not_cancel_other_waiters():
+    client, dispatcher = make(ttfb=0.5)
+    results = {}
+
+    def slow():
+        results["slow"] = dispatcher.generate("k", "m", "问题", timeout=5).text
+    waiter = threading.Thread(target=slow)
+    waiter.start()
+    time.sleep(0.05)
+    with pytest.raises(TimeoutError):
+        dispatcher.generate("k", "m", "问题", timeout=0.1)
+    waiter.join()
+    assert results["slow"] and client.calls == 1
+
+
+def test_busy_when_queue_is_full():
+    client, dispatcher = make(ttfb=0.5, max_concurrency=1, max_queue=2)
+    background = [threading.Thread(target=dispatcher.generate, args=(f"k{i}", "m", f"问题{i}"), kwargs={"timeout": 5})
+                  for i in range(2)]
+    for t in background:
+        t.start()
+    time.sleep(0.05)
+    with pytest.raises(DispatcherBusy) as e:
+        dispatcher.generate("k3", "m", "问题3", timeout=5)
+    assert e.value.retry_after >= 1
+    for t in background:
+        t.join()
+    assert dispatcher.stats()["pending"] == 0
+
+
+def test_retryable_errors_are_retried():
+    client = StubClient(recordings={}, ttfb=0, chunk_delay=0, jitter=0)
+    attempts = []
+
+    class RateLimited(Exception):
+        code = 429
+
+    async def flaky(**kwargs):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited()
+        return await client.aio.models.generate_content(**kwargs)
+    dispatcher = LLMDispatcher(flaky, base_delay=0.01)
+    assert dispatcher.generate(None, "m", "问题", timeout=5).text
+    assert len(attempts) == 3
+
+
+def test_non_retryable_errors_are_raised():
+    async def broken(**kwargs):
+        raise ValueError("bad request")
+    dispatcher = LLMDispatcher(broken, base_delay=0.01)
+    with pytest.raises(ValueError):
+        dispatcher.generate(None, "m", "问题", timeout=5)
+
+
+def test_timeout_cancels_and_releases_slot():
+    client, dispatcher = make(ttfb=1.0, max_concurrency=1)
+    with pytest.raises(TimeoutError):
+        dispatcher.generate("k", "m", "问题", timeout=0.1)
+    time.sleep(0.05)
+    stats = dispatcher.stats()
+    assert stats["pending"] == 0 and stats["inflight"] == 0
+
+
+def test_stalled_stream_times_out_and_releases_slot():
+    client = StubClient(recordings={}, ttfb=0, chunk_delay=0, jitter=0)
+
+    async def stalling(**kwargs):
+        async def stream():
+            yield next(client._chunks("第一段", None))
+            await asyncio.sleep(10)
+            yield next(client._chunks("第二段", None))
+        return stream()
+    dispatcher = LLMDispatcher(None, stalling, max_concurrency=1)
+    received = []
+    with pytest.raises(TimeoutError):
+        for chunk in dispatcher.generate_stream("m", "问题", first_chunk_timeout=1, chunk_timeout=0.2):
+            received.append(chunk.text)
+    assert received == ["第一段"]
+    time.sleep(0.05)
+    assert dispatcher.stats()["pending"] == 0
+
+
+def test_stream_through_stub():
+    client, dispatcher = make(ttfb=0.05)
+    text = "".join(c.text for c in dispatcher.generate_stream("m", "问题", first_chunk_timeout=2))
+    assert "模擬回答" in text
+
@@ -0,0 +1,21 @@
+"""檢索的相關度下限：只靠單字命中的必讀篇章不應被放進提示。"""
+import pytest
+
+from retrieval import RetrievalIndex
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    root = tmp_path_factory.mktemp("retrieval")
+    return RetrievalIndex.open(index_dir=str(root / "index"), corpus_dir=str(root / "corpus"))
+
+
+@pytest.mark.parametrize("query", ["请写一篇关于‘诚信’的议论文 评分准则", "手机"])
+def test_unrelated_queries_return_nothing(index, query):
+    assert index.search(query, subject="chi") == []
+
+
+@pytest.mark.parametrize("query, source", [("岳阳楼记的主旨", "必讀：岳阳楼记"), ("宴遊", "必讀：始得西山宴游记")])
+def test_relevant_passage_found(index, query, source):
+    hits = index.search(query, subject="chi")
+    assert hits and hits[0][1]["source"] == source
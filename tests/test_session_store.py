@@ -0,0 +1,84 @@
+"""會話狀態持久化：重啟後按用戶找回、只寫回有變化的鍵、日期等類型往返不變。"""
+import datetime
+
+import pytest
+
+from session_store import PersistentState, RedisBackend, SQLiteBackend, make_backend
+
+
+class CountingBackend(SQLiteBackend):
+    def __init__(self, path):
+        super().__init__(path)
+        self.writes = []
+
+    def set_many(self, user, items):
+        self.writes.append(dict(items))
+        super().set_many(user, items)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def hget(self, name, key):
+        value = self.hashes.get(name, {}).get(key)
+        return value.encode("utf-8") if value is not None else None
+
+    def hset(self, name, mapping):
+        self.hashes.setdefault(name, {}).update(mapping)
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "s.db"))
+    return RedisBackend(client=FakeRedis())
+
+
+def test_state_survives_restart(backend):
+    state = {}
+    persist = PersistentState(backend, state, "u1")
+    persist.init("xp", 0)
+    persist.init("exam_date", datetime.date(2027, 4, 1))
+    state["xp"] = 120
+    state["exam_date"] = datetime.date(2027, 4, 15)
+    assert persist.flush() == 2
+    # 新進程 / 新副本：全新的 session_state
+    state = {}
+    persist = PersistentState(backend, state, "u1")
+    persist.init("xp", 0)
+    persist.init("exam_date", None)
+    assert (state["xp"], state["exam_date"]) == (120, datetime.date(2027, 4, 15))
+    # 其他用戶看不到
+    other = {}
+    PersistentState(backend, other, "u2").init("xp", 0)
+    assert other["xp"] == 0
+
+
+def test_flush_writes_only_changed_keys(tmp_path):
+    backend = CountingBackend(str(tmp_path / "s.db"))
+    state = {}
+    persist = PersistentState(backend, state, "u")
+    persist.init("xp", 0)
+    persist.init("level", 1)
+    # 仍是默認值時不寫入
+    assert persist.flush() == 0
+    state["xp"] = 10
+    assert persist.flush() == 1
+    assert persist.flush() == 0
+    assert backend.writes == [{"xp": "10"}]
+
+
+def test_unregistered_and_unencodable_keys(tmp_path):
+    state = {"scratch": object()}
+    persist = PersistentState(SQLiteBackend(str(tmp_path / "s.db")), state, "u")
+    assert persist.flush() == 0
+    persist.init("bad", 0)
+    state["bad"] = object()
+    with pytest.raises(TypeError):
+        persist.flush()
+
+
+def test_make_backend_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        make_backend("memcached")
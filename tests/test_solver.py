@@ -0,0 +1,57 @@
+"""方程求解器與受限解析器的回歸測試：SymPy 輸出的字符串不能再經受限解析器解析一次。"""
+import pytest
+import sympy as sp
+
+from expr_parser import ParseError, parse_expression
+from solver import EquationSolver, SolverError, canonical_system
+
+
+@pytest.fixture(scope="module")
+def solver():
+    return EquationSolver(pool_size=1)
+
+
+def test_scientific_notation():
+    assert parse_expression("1e5") == sp.Float(100000)
+    assert parse_expression("2.5E-3x") == sp.Float("0.0025") * sp.Symbol("x")
+    # e 後面沒有數字時仍是常數 e
+    assert parse_expression("2e") == 2 * sp.E
+    assert parse_expression("2e-x") == 2 * sp.E - sp.Symbol("x")
+    with pytest.raises(ParseError):
+        parse_expression("1e5000")
+
+
+
+@pytest.mark.parametrize("text", ["3.5.2", "1 2", "1.2.3x", "x^2 3", "2 .5"])
+def test_adjacent_numbers_rejected(text):
+    with pytest.raises(ParseError):
+        parse_expression(text)
+
+
+def test_implicit_multiplication_still_allowed():
+    x = sp.Symbol("x")
+    assert parse_expression("2x") == 2 * x
+    assert parse_expression("2 (x+1)") == 2 * (x + 1)
+    assert parse_expression("x 2") == 2 * x
+
+def test_small_float_is_solved_exactly(solver):
+    # 鍵為 x - 1.0e-5；曾被重新解析成 x - 1.0*E - 5，得出 7.718...
+    method, result = solver.solve("x = 0.00001")
+    assert sp.sympify(result) == [sp.Float("1e-5")]
+
+
+def test_scientific_notation_input(solver):
+    method, result = solver.solve("0.5x = 1e5")
+    assert sp.sympify(result) == [sp.Float(200000)]
+
+
+@pytest.mark.parametrize("text", ["x = 1/0", "x + 0/0 = 1", "x = log(0)"])
+def test_non_finite_rejected(text):
+    with pytest.raises(SolverError):
+        canonical_system(text)
+
+
+def test_cache_key_is_canonical(solver):
+    assert [k for k, _ in canonical_system("x+y=5, x-y=1")] == [k for k, _ in canonical_system("x - y = 1\ny + x = 5")]
+    assert solver.solve("x^2=4") == solver.solve("x**2 - 4 = 0")
+    assert solver.hits >= 1
@@ -0,0 +1,21 @@
+"""統計輸入解析：接受的格式與原來逐個 float() 的寫法一致，空字段忽略。"""
+import numpy as np
+import pytest
+
+from stats_stream import parse_text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1,,2", [1, 2]),
+    ("1 2 3", [1, 2, 3]),
+    ("1，2\n3\n", [1, 2, 3]),
+    (" , 1.5e2, -3 ,", [150, -3]),
+    ("", []),
+])
+def test_parse_text(text, expected):
+    np.testing.assert_array_equal(parse_text(text), np.array(expected, dtype=float))
+
+
+def test_parse_text_rejects_words():
+    with pytest.raises(ValueError):
+        parse_text("1, two, 3")
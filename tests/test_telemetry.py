@@ -0,0 +1,89 @@
+"""AI 調用遙測：百分位、費用估算、明細匯總，以及刪除明細後仍單調的 Prometheus 計數器。"""
+import sqlite3
+import time
+
+import pytest
+
+from telemetry import CallTimer, MetricsStore, estimate_cost, estimate_savings, percentile, prometheus_text
+
+
+def _sample(text, name, **labels):
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{{wanted}}} "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MetricsStore(str(tmp_path / "m.db"))
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert [percentile(values, q) for q in (0.5, 0.95, 0.99)] == [50, 95, 99]
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) is None
+
+
+def test_cost_discounts_cached_input():
+    full = estimate_cost("gemini-2.5-flash", 1_000_000, 0)
+    assert full == pytest.approx(0.30)
+    assert estimate_cost("gemini-2.5-flash", 1_000_000, 0, cached_tokens=1_000_000) == pytest.approx(0.075)
+    assert estimate_savings("gemini-2.5-flash", 1_000_000) == pytest.approx(0.225)
+    assert estimate_cost("unknown-model", 10**6, 10**6) == 0.0
+
+
+def test_summary_excludes_cache_hits_and_errors_from_latency(store):
+    for ms in (100, 200, 300, 400):
+        store.record("eng_essay", "m", ms / 1000, ttfb=0.05, input_tokens=10, output_tokens=5)
+    store.record("eng_essay", "m", 0.001, cached=True)
+    store.record("eng_essay", "m", 9.0, error="TimeoutError")
+    (g,) = store.summary()
+    assert (g["calls"], g["errors"], g["cache_hits"]) == (6, 1, 1)
+    assert (g["input_tokens"], g["output_tokens"]) == (40, 20)
+    assert g["p50_ms"] == pytest.approx(200)
+    assert g["p99_ms"] == pytest.approx(400)
+    assert g["ttfb_p50_ms"] == pytest.approx(50)
+
+
+def test_counters_stay_monotonic_after_retention(tmp_path):
+    path = str(tmp_path / "m.db")
+    store = MetricsStore(path)
+    store.record("chat", "gemini-2.5-flash", 0.5, input_tokens=1000, output_tokens=100, cached_tokens=400)
+    store.record("chat", "gemini-2.5-flash", 0.5, error="boom")
+    before = prometheus_text(store)
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE llm_calls SET ts = ?", (time.time() - 90 * 86400,))
+    store = MetricsStore(path, retention_days=30)  # 重新打開時刪除過期明細
+    assert store.summary() == []
+    after = prometheus_text(store)
+    labels = {"feature": "chat", "model": "gemini-2.5-flash"}
+    assert _sample(after, "dse_llm_requests_total", **labels) == _sample(before, "dse_llm_requests_total", **labels) == 2
+    assert _sample(after, "dse_llm_errors_total", **labels) == 1
+    assert _sample(after, "dse_llm_tokens_total", **labels, direction="cached_input") == 400
+    assert _sample(after, "dse_llm_cost_usd_total", **labels) > 0
+
+
+def test_totals_backfilled_from_old_database(tmp_path):
+    path = str(tmp_path / "m.db")
+    with sqlite3.connect(path) as conn:
+        # 舊版：沒有 cached_tokens 列，也沒有 llm_totals 表
+        conn.execute("CREATE TABLE llm_calls (id INTEGER PRIMARY KEY, ts REAL NOT NULL, feature TEXT NOT NULL,"
+                     " model TEXT NOT NULL, stream INTEGER NOT NULL, ttfb_ms REAL, total_ms REAL NOT NULL,"
+                     " input_tokens INTEGER NOT NULL DEFAULT 0, output_tokens INTEGER NOT NULL DEFAULT 0,"
+                     " cached INTEGER NOT NULL DEFAULT 0, error TEXT)")
+        conn.execute("INSERT INTO llm_calls (ts, feature, model, stream, total_ms, input_tokens)"
+                     " VALUES (?, 'math_step', 'm', 0, 120, 30)", (time.time(),))
+    (g,) = MetricsStore(path).totals()
+    assert (g["feature"], g["calls"], g["input_tokens"], g["cached_tokens"]) == ("math_step", 1, 30, 0)
+
+
+def test_call_timer_records_once(store):
+    timer = CallTimer(store, "csd_kw", "m", stream=True)
+    timer.first_byte()
+    timer.finish(input_tokens=3, output_tokens=4)
+    timer.finish(error="late")
+    (g,) = store.totals()
+    assert (g["calls"], g["errors"], g["feature"]) == (1, 0, "csd_kw")
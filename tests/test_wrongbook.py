@@ -0,0 +1,68 @@
+"""錯題本：FTS5 全文搜索、短關鍵詞回退 LIKE、按用戶隔離、分頁與刪除後索引同步。"""
+import pytest
+
+from wrongbook import WrongBook
+
+
+@pytest.fixture
+def book(tmp_path):
+    book = WrongBook(str(tmp_path / "w.db"))
+    book.add("u", "math", "解二次方程 x^2 - 5x + 6 = 0，忘記檢查判別式", "代數")
+    book.add("u", "math", "三角形面積公式用錯：應為 1/2 ab sin C", "三角")
+    book.add("u", "eng", "Subject-verb agreement: 'the list of items are' should be 'is'", "Grammar")
+    book.add("other", "math", "解二次方程時因式分解出錯", "代數")
+    return book
+
+
+def _contents(result):
+    rows, total = result
+    return [r[2] for r in rows], total
+
+
+def test_fts_search_matches_substring(book):
+    contents, total = _contents(book.search("u", "math", "二次方程"))
+    assert total == 1 and "判別式" in contents[0]
+    contents, total = _contents(book.search("u", "eng", "agreement"))
+    assert total == 1
+
+
+def test_short_query_falls_back_to_like(book):
+    # 兩個字符的關鍵詞 trigram 無法匹配
+    contents, total = _contents(book.search("u", "math", "面積"))
+    assert total == 1 and "三角形" in contents[0]
+    assert book.search("u", "math", "%")[1] == 0
+
+
+def test_search_is_scoped_to_owner_subject_and_topic(book):
+    assert book.search("other", "math", "二次方程")[1] == 1
+    assert book.search("u", "eng", "二次方程")[1] == 0
+    assert book.search("u", "math", topic="三角")[1] == 1
+    assert book.topics("u", "math") == ["三角", "代數"]
+
+
+def test_quotes_in_query_are_literal(book):
+    assert book.search("u", "eng", "'the list")[1] == 1
+    assert book.search("u", "eng", 'list "of')[1] == 0
+
+
+def test_delete_updates_index(book):
+    rows, _ = book.search("u", "math", "二次方程")
+    book.delete("other", rows[0][0])  # 不能刪除別人的錯題
+    assert book.search("u", "math", "二次方程")[1] == 1
+    book.delete("u", rows[0][0])
+    assert book.search("u", "math", "二次方程")[1] == 0
+    assert book.search("u", "math")[1] == 1
+
+
+def test_pagination_newest_first(tmp_path):
+    book = WrongBook(str(tmp_path / "w.db"))
+    ids = [book.add("u", "math", f"第 {i} 題") for i in range(5)]
+    rows, total = book.search("u", "math", per_page=2, page=1)
+    assert total == 5 and [r[0] for r in rows] == ids[::-1][:2]
+    rows, _ = book.search("u", "math", per_page=2, page=3)
+    assert [r[0] for r in rows] == ids[:1]
+
+
+def test_empty_content_rejected(book):
+    with pytest.raises(ValueError):
+        book.add("u", "math", "   ")
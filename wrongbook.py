@@ -0,0 +1,96 @@
+"""錯題本的本地存儲（SQLite + FTS5 全文索引），按用戶、科目和課題標籤分類，支持分頁與搜索。"""
+import os
+import time
+
+from db import connect
+
+DEFAULT_DB_PATH = os.getenv("DSE_WRONGBOOK_PATH", os.path.join(".cache", "wrongbook.sqlite3"))
+PAGE_SIZE = 20
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS wrong_questions ("
+    " id INTEGER PRIMARY KEY, owner TEXT NOT NULL, subject TEXT NOT NULL,"
+    " topic TEXT NOT NULL DEFAULT '', content TEXT NOT NULL, created REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_wrong_owner ON wrong_questions(owner, subject, created)",
+    "CREATE INDEX IF NOT EXISTS idx_wrong_topic ON wrong_questions(owner, subject, topic)",
+    # trigram 分詞對中文同樣有效（unicode61 會把連續漢字當成一個詞）
+    "CREATE VIRTUAL TABLE IF NOT EXISTS wrong_fts USING fts5("
+    " content, topic, content='wrong_questions', content_rowid='id', tokenize='trigram')",
+    # 外部內容表：用觸發器讓索引與主表保持同步
+    "CREATE TRIGGER IF NOT EXISTS wrong_ai AFTER INSERT ON wrong_questions BEGIN"
+    " INSERT INTO wrong_fts(rowid, content, topic) VALUES (new.id, new.content, new.topic); END",
+    "CREATE TRIGGER IF NOT EXISTS wrong_ad AFTER DELETE ON wrong_questions BEGIN"
+    " INSERT INTO wrong_fts(wrong_fts, rowid, content, topic) VALUES ('delete', old.id, old.content, old.topic); END",
+    "CREATE TRIGGER IF NOT EXISTS wrong_au AFTER UPDATE ON wrong_questions BEGIN"
+    " INSERT INTO wrong_fts(wrong_fts, rowid, content, topic) VALUES ('delete', old.id, old.content, old.topic);"
+    " INSERT INTO wrong_fts(rowid, content, topic) VALUES (new.id, new.content, new.topic); END",
+]
+
+
+class WrongBook:
+    """錯題本：每次操作使用獨立連接，可在多個會話 / 線程之間共享"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+
+    def _connect(self):
+        return connect(self.path)
+
+    def add(self, owner, subject, content, topic=""):
+        content, topic = content.strip(), topic.strip()
+        if not content:
+            raise ValueError("錯題內容不能為空")
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO wrong_questions (owner, subject, topic, content, created) VALUES (?, ?, ?, ?, ?)",
+                (owner, subject, topic, content, time.time()),
+            )
+            return cur.lastrowid
+
+    def delete(self, owner, question_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM wrong_questions WHERE id = ? AND owner = ?", (question_id, owner))
+
+    def topics(self, owner, subject):
+        """該科目下已使用的課題標籤"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT topic FROM wrong_questions WHERE owner = ? AND subject = ? AND topic != ''"
+                " ORDER BY topic", (owner, subject),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def search(self, owner, subject, query="", topic=None, page=1, per_page=PAGE_SIZE):
+        """返回 (當頁記錄 [(id, topic, content, created)], 總數)，按添加時間倒序。
+
+        query 不少於 3 個字符時走 FTS5 索引；更短的關鍵詞（如兩個漢字）trigram 無法匹配，
+        改用 LIKE 在該用戶該科目的記錄中查找。
+        """
+        where, args = ["q.owner = ?", "q.subject = ?"], [owner, subject]
+        query = query.strip()
+        if query and len(query) >= 3:
+            # 用子查詢讓 FTS 索引先篩出候選行，避免逐行執行 MATCH
+            where.append("q.id IN (SELECT rowid FROM wrong_fts WHERE wrong_fts MATCH ?)")
+            args.append('"' + query.replace('"', '""') + '"')
+        elif query:
+            where.append("(q.content LIKE ? ESCAPE '\\' OR q.topic LIKE ? ESCAPE '\\')")
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            args += [pattern, pattern]
+        if topic:
+            where.append("q.topic = ?")
+            args.append(topic)
+        cond = " AND ".join(where)
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM wrong_questions q WHERE {cond}", args).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT q.id, q.topic, q.content, q.created FROM wrong_questions q WHERE {cond}"
+                " ORDER BY q.created DESC, q.id DESC LIMIT ? OFFSET ?",
+                args + [per_page, (max(page, 1) - 1) * per_page],
+            ).fetchall()
+        return rows, total